@@ -0,0 +1,28 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts.
+
+Importing this module points DATABASE_PATH at a throwaway SQLite file, so it must
+be imported before anything from ``config`` or ``database``.
+"""
+import os
+import tempfile
+
+if 'BENCH_KEEP_DATABASE' not in os.environ:
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='esb-bench-'), 'bench.db')
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values (nearest-rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(label, latencies_ms):
+    """Print count, p50, p99 and max for a list of latencies in milliseconds."""
+    print(
+        f"{label:<28} n={len(latencies_ms):<6} "
+        f"p50={percentile(latencies_ms, 50):8.2f}ms "
+        f"p99={percentile(latencies_ms, 99):8.2f}ms "
+        f"max={max(latencies_ms, default=0):8.2f}ms"
+    )
@@ -0,0 +1,91 @@
+# benchmarks/db_latency.py
+"""p99 update latency while concurrent registrations are writing.
+
+Replays an open-loop stream of updates: a share of them confirm a registration
+(write), the rest open the profile and listings (read), and some only touch the
+event loop (menu replies). The stream is run once with the blocking
+DatabaseManager called from the event loop and once through AsyncDatabaseManager.
+
+    python -m benchmarks.db_latency --updates 2000 --rate 400 --write-ratio 0.3
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from benchmarks.common import summarize
+from database import db, AsyncDatabaseManager
+from database.dates import local_day_start
+
+BENCH_EVENT = 'رویداد بنچمارک'
+
+def prepare():
+    if not any(e.name == BENCH_EVENT for e in db.get_events()):
+        db.add_event(BENCH_EVENT, 'benchmark', local_day_start(30), 10 ** 9)
+
+async def run(mode, args, user_ids):
+    async_db = AsyncDatabaseManager(db, max_workers=args.workers)
+    rng = random.Random(42)
+
+    async def call(method, *call_args):
+        if mode == 'sync':
+            return getattr(db, method)(*call_args)
+        return await getattr(async_db, method)(*call_args)
+
+    async def write(user_id):
+        await call('add_registration', user_id, 'کاربر بنچمارک', '12345678',
+                   '0012345678', '09123456789', BENCH_EVENT)
+
+    async def read(user_id):
+        await call('get_user_registrations', user_id)
+        await call('get_events')
+
+    async def menu(user_id):
+        await asyncio.sleep(0)
+
+    latencies = {'write': [], 'read': [], 'menu': []}
+
+    async def update(kind, action, user_id, arrived):
+        await action(user_id)
+        latencies[kind].append((time.perf_counter() - arrived) * 1000)
+
+    pending = []
+    interval = 1 / args.rate
+    started = time.perf_counter()
+    for i in range(args.updates):
+        roll = rng.random()
+        if roll < args.write_ratio:
+            kind, action = 'write', write
+        elif roll < args.write_ratio + args.menu_ratio:
+            kind, action = 'menu', menu
+        else:
+            kind, action = 'read', read
+        # latency is measured from the scheduled arrival, so time spent waiting
+        # for a blocked loop counts against the update
+        arrived = started + i * interval
+        pending.append(asyncio.create_task(update(kind, action, next(user_ids), arrived)))
+        delay = arrived + interval - time.perf_counter()
+        await asyncio.sleep(max(0, delay))
+    await asyncio.gather(*pending)
+    async_db.shutdown()
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=300, help='updates per second')
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--menu-ratio', type=float, default=0.3)
+    parser.add_argument('--workers', type=int, default=4, help='database worker threads')
+    args = parser.parse_args()
+
+    prepare()
+    user_ids = itertools.count(10 ** 6)
+    for mode in ('sync', 'async'):
+        latencies = asyncio.run(run(mode, args, user_ids))
+        for kind, values in latencies.items():
+            summarize(f"{mode} {kind}", values)
+        summarize(f"{mode} all updates", [v for values in latencies.values() for v in values])
+
+if __name__ == '__main__':
+    main()
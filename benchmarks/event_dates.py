@@ -0,0 +1,78 @@
+# benchmarks/event_dates.py
+"""Loading every active event vs the indexed upcoming range, and Jalali formatting.
+
+Seeds --events events, --past-share of them already held, and times the
+catalog load the previous way (every active event, past ones included) and
+the current range query on (active, starts_at). Then formats event dates for
+a listing with the previous converter (imports and parses on every call) and
+with the memoised format_event_date, checking both produce the same dates.
+
+    python -m benchmarks.event_dates --events 5000 --past-share 0.9
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from benchmarks.common import percentile
+from database import db, Event
+from database.dates import to_local
+from main.utils.jalali import format_event_date
+
+def legacy_convert_gregorian_to_jalali(gregorian_date):
+    from datetime import datetime
+    if isinstance(gregorian_date, str):
+        gregorian_date = datetime.strptime(gregorian_date, '%Y-%m-%d %H:%M:%S')
+    from jdatetime import date as jdate
+    jalali_date = jdate.fromgregorian(year=gregorian_date.year, month=gregorian_date.month, day=gregorian_date.day)
+    return f"{jalali_date.year:04d}/{jalali_date.month:02d}/{jalali_date.day:02d}"
+
+def legacy_load_active_events():
+    with db.ReadSession() as session:
+        return session.query(Event.type, Event.name, Event.starts_at).filter(
+            Event.active == True
+        ).order_by(Event.starts_at).all()
+
+def seed(count, past_share):
+    now = datetime.utcnow()
+    past = int(count * past_share)
+    with db.Session() as session:
+        session.add_all(Event(
+            name=f'رویداد تاریخ {i}', description='benchmark', capacity=10, type='event',
+            starts_at=now + timedelta(days=(i - past) * 0.5 + (-1 if i < past else 1))
+        ) for i in range(count))
+        session.commit()
+    db.catalog.invalidate()
+
+def measure(func, repeat):
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 50), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--past-share', type=float, default=0.9)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    seed(args.events, args.past_share)
+
+    before, every = measure(legacy_load_active_events, args.repeat)
+    after, upcoming = measure(db._load_active_events, args.repeat)
+    print(f"catalog load   all active {before:8.2f}ms ({len(every)} rows)  "
+          f"upcoming range {after:8.2f}ms ({len(upcoming)} rows)  x{before / after:5.1f}")
+
+    starts = [event.starts_at for _, event in upcoming]
+    format_event_date.cache_clear()
+    before, legacy = measure(lambda: [legacy_convert_gregorian_to_jalali(to_local(s)) for s in starts], 5)
+    after, current = measure(lambda: [format_event_date(s) for s in starts], 5)
+    same = [date.translate(str.maketrans('۰۱۲۳۴۵۶۷۸۹', '0123456789')) for date in current] == legacy
+    print(f"format {len(starts)} dates  per-call convert {before:8.2f}ms  memoised {after:8.2f}ms  "
+          f"x{before / after:5.1f}  same dates: {same}")
+    sys.exit(0 if same else 1)
+
+if __name__ == '__main__':
+    main()
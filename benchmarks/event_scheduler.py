@@ -0,0 +1,108 @@
+# benchmarks/event_scheduler.py
+"""Scheduled closing of events: catalog size, job cost and catch-up after downtime.
+
+Seeds --events active events, --past-share of them already held and a few
+starting inside the registration cutoff. Checks that registration for an
+event inside the cutoff is refused, then starts the maintenance scheduler on
+an event loop as the bot does and reports how long the first run took, how
+many events it closed and the catalog size before and after. Then stops the
+scheduler for longer than --interval (a short one, so the benchmark stays
+quick), reopens the events and starts it again: the run missed while it was
+down must fire at once instead of one interval later.
+
+    python -m benchmarks.event_scheduler --events 5000 --interval 0.05
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+import benchmarks.common  # noqa: F401
+from database import db, async_db, Event
+from main.scheduler import CLOSE_EVENTS_JOB, MaintenanceScheduler
+from config import Config
+
+def seed(count, past_share):
+    now = datetime.utcnow()
+    past = int(count * past_share)
+    soon = max(1, count // 100)
+    with db.Session() as session:
+        session.add_all(Event(
+            name=f'رویداد زمان‌بند {i}', description='benchmark', capacity=10, type='event',
+            starts_at=now - timedelta(days=1 + i) if i < past
+            else now + timedelta(minutes=Config.REGISTRATION_CUTOFF_MINUTES // 2) if i < past + soon
+            else now + timedelta(days=1 + i - past)
+        ) for i in range(count))
+        session.commit()
+    db.catalog.invalidate()
+    return past, soon
+
+async def wait_for(condition, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+def active_count():
+    with db.ReadSession() as session:
+        return session.query(Event).filter(Event.active == True).count()
+
+async def run(args):
+    past, soon = seed(args.events, args.past_share)
+    due = past + soon
+    listed_before = len(db.get_events())
+    active_before = active_count()
+    scheduler = MaintenanceScheduler(Config.DATABASE_PATH, interval_minutes=args.interval, timezone=Config.TIMEZONE)
+
+    late = f'رویداد زمان‌بند {past}'
+    try:
+        await async_db.add_registration(1, 'علی احمدی', '40012345', '0012345679', '09123456789', late)
+        refused = False
+    except ValueError as e:
+        refused = True
+        print(f"registration inside the cutoff refused: {e}")
+
+    started = time.perf_counter()
+    scheduler.start()
+    ran = await wait_for(lambda: active_count() <= active_before - due, timeout=args.interval * 30)
+    elapsed = (time.perf_counter() - started) * 1000
+    # اجرای کار پس از غیرفعال‌سازی، کش را هم بارگذاری می‌کند؛ توقف زودتر آن را لغو می‌کند
+    await asyncio.sleep(0.5)
+    listed_after = len(db.get_events())
+    print(f"first run: {'ok' if ran else 'timed out'} in {elapsed:.1f}ms, {active_before - active_count()} of "
+          f"{active_before} events closed ({due} due); catalog {listed_before} -> {listed_after} events")
+
+    # خاموش بودن ربات بیش از یک بازه؛ اجرای بعدی در این مدت از دست می‌رود
+    scheduler.stop()
+    with db.engine.begin() as connection:
+        connection.execute(text("UPDATE events SET active = 1"))
+    db.catalog.invalidate()
+    await asyncio.sleep(args.interval * 60 + 1)
+    started = time.perf_counter()
+    scheduler.start()
+    caught_up = await wait_for(lambda: active_count() == active_before - due, timeout=args.interval * 30)
+    elapsed = (time.perf_counter() - started) * 1000
+    await asyncio.sleep(0.5)
+    with db.engine.connect() as connection:
+        next_run = connection.execute(text("SELECT next_run_time FROM apscheduler_jobs WHERE id = :id"),
+                                      {'id': CLOSE_EVENTS_JOB}).scalar()
+    scheduler.stop()
+    print(f"after simulated downtime: missed run {'fired' if caught_up else 'did not fire'} in {elapsed:.1f}ms, "
+          f"next run stored {next_run - time.time():.0f}s ahead")
+    return ran and refused and caught_up and listed_after == listed_before - soon
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--past-share', type=float, default=0.9)
+    parser.add_argument('--interval', type=float, default=0.05, help='minutes between runs')
+    args = parser.parse_args()
+    ok = asyncio.run(run(args))
+    async_db.shutdown()
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/inbox_pages.py
+"""Per-page cost of the keyset inbox against OFFSET paging on a large inbox.
+
+Fills user_messages with --messages rows, then times the first, middle and last
+pages through get_inbox_page (following cursors) and through the equivalent
+LIMIT/OFFSET query.
+
+    python -m benchmarks.inbox_pages --messages 300000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select, func
+from benchmarks.common import percentile
+from database import db, UserMessage
+
+STATUSES = ('unread', 'read', 'replied')
+
+def fill(count):
+    with db.Session() as session:
+        existing = session.query(func.count(UserMessage.id)).scalar()
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1)
+    batch = []
+    for i in range(existing, count):
+        batch.append({
+            'user_id': rng.randrange(1, 50000),
+            'user_full_name': 'کاربر آزمایشی',
+            'message_text': 'متن پیام آزمایشی ' * 8,
+            'message_date': start + timedelta(seconds=i),
+            'status': rng.choice(STATUSES),
+            'message_type': 'contact',
+        })
+        if len(batch) == 10000:
+            _insert(batch)
+            batch = []
+    if batch:
+        _insert(batch)
+
+def _insert(batch):
+    with db.engine.begin() as connection:
+        connection.execute(insert(UserMessage), batch)
+
+def time_call(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 50)
+
+def offset_page(status, offset, page_size):
+    with db.ReadSession() as session:
+        query = session.query(UserMessage)
+        if status:
+            query = query.filter(UserMessage.status == status)
+        return query.order_by(UserMessage.message_date.desc()).offset(offset).limit(page_size).all()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=300000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fill(args.messages)
+    for status in (None, 'unread'):
+        with db.ReadSession() as session:
+            query = select(func.count(UserMessage.id))
+            if status:
+                query = query.where(UserMessage.status == status)
+            total = session.execute(query).scalar()
+        pages = total // args.page_size
+        print(f"status={status or 'all'} messages={total} pages={pages}")
+        for label, page_number in (('first', 0), ('middle', pages // 2), ('last', pages - 1)):
+            offset = page_number * args.page_size
+            # the cursor for page n is the id just above it, found once up front
+            with db.ReadSession() as session:
+                query = session.query(UserMessage.id)
+                if status:
+                    query = query.filter(UserMessage.status == status)
+                cursor = query.order_by(UserMessage.id.desc()).offset(offset - 1).limit(1).scalar() if offset else None
+            keyset_ms = time_call(lambda: db.get_inbox_page(status, cursor, 'older', args.page_size), args.repeat)
+            offset_ms = time_call(lambda: offset_page(status, offset, args.page_size), args.repeat)
+            print(f"  {label:<7} page {page_number:>6}: keyset {keyset_ms:7.3f}ms   offset {offset_ms:8.3f}ms")
+
+if __name__ == '__main__':
+    main()
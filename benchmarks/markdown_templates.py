@@ -0,0 +1,124 @@
+# benchmarks/markdown_templates.py
+"""Hand-built MarkdownV2 f-strings vs compiled message templates.
+
+Renders the registration summary, the profile message and an events listing
+the previous way (an f-string per message, escape_markdown as a per-character
+scan and list join on every field) and through the compiled templates the
+handlers now use. Also times the escaper alone. Reports microseconds per
+render and checks that both ways produce the same text.
+
+    python -m benchmarks.markdown_templates --events 20 --repeat 2000
+"""
+import argparse
+import sys
+import time
+from types import SimpleNamespace
+from benchmarks.common import percentile
+from main.handlers.registration import SUMMARY_MESSAGE
+from main.handlers.profile import create_profile_message
+from main.handlers.events import EVENTS_HEADER
+from main.utils.listings import render_event_listing
+from main.utils.markdown import escape_markdown
+from database.dates import parse_jalali
+
+def legacy_escape_markdown(text):
+    if not text:
+        return ""
+    escape_chars = r'\_*[]()~`>#+-=|{.}!'
+    return ''.join(['\\' + char if char in escape_chars else char for char in str(text)])
+
+def legacy_summary(data):
+    return (
+        f"📋 *خلاصه اطلاعات ثبت‌نام*\n\n"
+        f"👤 *نام:* {legacy_escape_markdown(data['full_name'])}\n"
+        f"🎫 *شماره دانشجویی:* {legacy_escape_markdown(data['student_id'])}\n"
+        f"🆔 *شماره ملی:* {legacy_escape_markdown(data['national_id'])}\n"
+        f"📞 *شماره تماس:* {legacy_escape_markdown(data['phone_number'])}\n"
+        f"🎯 *رویداد:* {legacy_escape_markdown(data['event'])}\n\n"
+        f"⚠️ *آیا اطلاعات فوق صحیح است؟*"
+    )
+
+def legacy_profile(user, registrations, total_count):
+    first_name = legacy_escape_markdown(user.first_name or '')
+    last_name = legacy_escape_markdown(user.last_name or '')
+    username = f"@{legacy_escape_markdown(user.username)}" if user.username else "❌ تنظیم نشده"
+    profile_text = (
+        f"👤 *پروفایل کاربر*\n\n"
+        f"🆔 *شناسه یکتا:* `{user.id}`\n"
+        f"📛 *نام:* {first_name} {last_name}\n"
+        f"🔖 *نام کاربری:* {username}\n"
+        f"📅 *تعداد رویدادهای ثبت‌نام شده:* {total_count}\n\n"
+    )
+    profile_text += "🎯 *رویدادهای ثبت‌نام شده:*\n"
+    for i, reg in enumerate(registrations, 1):
+        event_name_escaped = legacy_escape_markdown(reg.event_name)
+        date_escaped = legacy_escape_markdown(reg.event_date)
+        profile_text += f"{i}\\. {event_name_escaped} \\(📅 {date_escaped}\\)\n"
+    profile_text += "\n⚠️ *توجه:* برای انصراف از ثبت‌نام، از دکمه زیر استفاده کنید\\.\n"
+    return profile_text
+
+def legacy_listing(events):
+    parts = ["📅 *رویدادهای پیش‌رو:*\n\n"]
+    for event in events:
+        parts.append(
+            f"✨ *{legacy_escape_markdown(event.name)}*\n"
+            f"📅 *تاریخ برگزاری:* {legacy_escape_markdown(event.date)}\n"
+            f"⏰ *زمان:* {legacy_escape_markdown(event.time)}\n"
+            f"📍 *محل:* {legacy_escape_markdown(event.location)}\n"
+            f"👥 *ظرفیت:* {legacy_escape_markdown(str(event.capacity))}\n"
+            f"✅ *ثبت‌نام‌شده:* {legacy_escape_markdown(str(event.registered_count))}\n"
+            f"📝 *توضیحات:* {legacy_escape_markdown(event.description)}\n\n"
+        )
+    return ''.join(parts)
+
+def measure(func, repeat):
+    """Median microseconds per call, over batches of 10 calls."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(10):
+            func()
+        samples.append((time.perf_counter() - started) * 100000)
+    return percentile(samples, 50)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20, help='events in the listing')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    registration = {
+        'full_name': 'علی احمدی', 'student_id': '40012345678', 'national_id': '0012345678',
+        'phone_number': '09123456789', 'event': 'کارگاه C++ (مقدماتی) - ترم ۱'
+    }
+    user = SimpleNamespace(id=123456789, first_name='Ali_Reza', last_name='Ahmadi', username='ali_reza.a')
+    registrations = [SimpleNamespace(event_name=f'رویداد شماره {i} (ویژه!)', event_date='۱۴۰۴/۰۸/۱۵',
+                                     event_starts_at=parse_jalali('۱۴۰۴/۰۸/۱۵')) for i in range(5)]
+    events = [SimpleNamespace(
+        name=f'کارگاه طراحی {i}.0', date='۱۴۰۴/۰۹/۰۱', time='10:00', starts_at=parse_jalali('۱۴۰۴/۰۹/۰۱', '10:00'),
+        location='سالن [A] طبقه ۲',
+        capacity=40, registered_count=i, description='مقدمه‌ای بر CAD/CAM و ساخت + تولید! ' * 4
+    ) for i in range(args.events)]
+    text = registration['event'] * 4
+
+    cases = [
+        ('escape only', lambda: legacy_escape_markdown(text), lambda: escape_markdown(text)),
+        ('registration summary', lambda: legacy_summary(registration),
+         lambda: SUMMARY_MESSAGE.render(**registration)),
+        ('profile (5 registrations)', lambda: legacy_profile(user, registrations, 5),
+         lambda: create_profile_message(user, registrations, 5)),
+        (f'listing ({args.events} events)', lambda: legacy_listing(events),
+         lambda: render_event_listing(EVENTS_HEADER, events)),
+    ]
+    ok = True
+    for label, legacy, compiled in cases:
+        same = legacy() == compiled()
+        ok = ok and same
+        before, after = measure(legacy, args.repeat), measure(compiled, args.repeat)
+        print(f"{label:<28} f-string {before:8.2f}us  template {after:8.2f}us  "
+              f"x{before / after:5.2f}  same output: {same}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
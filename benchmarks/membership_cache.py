@@ -0,0 +1,71 @@
+# benchmarks/membership_cache.py
+"""Membership checks with and without MembershipCache.
+
+Replays gated actions from a skewed user population against a fake bot whose
+get_chat_member takes --api-ms, including bursts where one user taps several
+buttons at once, and reports API calls, hit ratio and time saved.
+
+    python -m benchmarks.membership_cache --actions 5000 --users 500
+"""
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from benchmarks.common import summarize
+from main.middleware.membership_cache import MembershipCache
+
+class FakeBot:
+    def __init__(self, api_ms):
+        self.api_seconds = api_ms / 1000
+        self.calls = 0
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.calls += 1
+        await asyncio.sleep(self.api_seconds)
+        return SimpleNamespace(status='member' if user_id % 5 else 'left')
+
+async def replay(args, cache):
+    bot = FakeBot(args.api_ms)
+    rng = random.Random(1)
+    latencies = []
+
+    async def check(user_id):
+        started = time.perf_counter()
+        if cache is None:
+            await bot.get_chat_member(0, user_id)
+        else:
+            await cache.get(user_id, lambda: bot.get_chat_member(0, user_id))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    pending = []
+    for _ in range(args.actions):
+        user_id = int(rng.paretovariate(1.2)) % args.users
+        # a user often fires a few gated actions back to back
+        for _ in range(rng.choice((1, 1, 1, 3))):
+            pending.append(asyncio.create_task(check(user_id)))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*pending)
+    return bot.calls, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--actions', type=int, default=3000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=500, help='actions per second')
+    parser.add_argument('--api-ms', type=float, default=80)
+    args = parser.parse_args()
+
+    calls, latencies = asyncio.run(replay(args, None))
+    print(f"uncached: {calls} API calls")
+    summarize("uncached check", latencies)
+
+    cache = MembershipCache(positive_ttl=600, negative_ttl=30)
+    calls, latencies = asyncio.run(replay(args, cache))
+    stats = cache.stats()
+    print(f"cached: {calls} API calls, hit ratio {stats['hit_ratio']:.1%}, "
+          f"coalesced {stats['coalesced']}, saved {stats['saved_latency_ms'] / 1000:.1f}s of API time")
+    summarize("cached check", latencies)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/reservation_burst.py
+"""Burst of concurrent registration confirms against a small-capacity workshop.
+
+Fires --confirms concurrent add_registration calls (every user taps confirm
+--taps times) through AsyncDatabaseManager, then checks that the event was not
+overbooked, that nobody is registered twice and that registered_count matches
+the registration rows. Exits non-zero if any invariant is violated.
+
+    python -m benchmarks.reservation_burst --confirms 5000 --capacity 150
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from benchmarks.common import percentile
+from database import db, AsyncDatabaseManager, Event, Registration
+from database.dates import local_day_start
+
+async def burst(args, event_name):
+    async_db = AsyncDatabaseManager(db, max_workers=args.workers)
+    users = args.confirms // args.taps
+
+    async def confirm(user_id):
+        started = time.perf_counter()
+        try:
+            await async_db.add_registration(user_id, 'کاربر آزمایشی', '12345678',
+                                            '0012345678', '09123456789', event_name)
+            outcome = 'registered'
+        except ValueError as e:
+            outcome = str(e)
+        return outcome, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        confirm(2 * 10 ** 6 + i % users) for i in range(users * args.taps)
+    ))
+    elapsed = time.perf_counter() - started
+    async_db.shutdown()
+    return results, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--confirms', type=int, default=3000)
+    parser.add_argument('--taps', type=int, default=2, help='confirm taps per user')
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=16, help='database worker threads')
+    args = parser.parse_args()
+
+    event_name = f'کارگاه پرطرفدار {time.time_ns()}'
+    db.add_event(event_name, 'burst test', local_day_start(30), args.capacity, 'workshop')
+    results, elapsed = asyncio.run(burst(args, event_name))
+
+    outcomes = Counter(outcome for outcome, _ in results)
+    latencies = [latency for _, latency in results]
+    with db.Session() as session:
+        event = session.query(Event).filter_by(name=event_name).one()
+        rows = session.query(Registration.user_id).filter_by(event_name=event_name).all()
+    per_user = Counter(user_id for (user_id,) in rows)
+
+    print(f"confirms={len(results)} elapsed={elapsed:.2f}s throughput={len(results) / elapsed:.0f} confirms/s")
+    print(f"latency p50={percentile(latencies, 50):.1f}ms p99={percentile(latencies, 99):.1f}ms")
+    for outcome, count in outcomes.most_common():
+        print(f"  {count:>6}  {outcome}")
+    print(f"capacity={event.capacity} registered_count={event.registered_count} rows={len(rows)}")
+
+    failures = []
+    if len(rows) > event.capacity:
+        failures.append("event overbooked")
+    if event.registered_count != len(rows):
+        failures.append("registered_count does not match registration rows")
+    if any(count > 1 for count in per_user.values()):
+        failures.append("user registered more than once")
+    if outcomes['registered'] != len(rows):
+        failures.append("successful confirms do not match registration rows")
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK: no overbooking, no double registration")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/row_hydration.py
+"""ORM hydration + positional tuples vs column queries + slotted rows.
+
+Times a profile load (a user's registrations with event details) and the
+inbox list, each through the previous approach (full ORM entities converted to
+tuples, then re-wrapped as dicts the way safe_unpack_registration did) and
+through the current DatabaseManager methods. Reports time per call and peak
+allocation per call.
+
+    python -m benchmarks.row_hydration --registrations 40 --messages 200
+"""
+import argparse
+import time
+import tracemalloc
+from benchmarks.common import percentile
+from database import db, Event, Registration, UserMessage
+from database.dates import local_day_start
+
+USER_ID = 3 * 10 ** 6
+LEGACY_KEYS = ['reg_id', 'user_id', 'full_name', 'student_id', 'national_id', 'phone_number',
+               'event_name', 'reg_date', 'status', 'notified_admin', 'event_type', 'event_starts_at',
+               'event_description', 'event_location']
+
+def legacy_user_registrations(user_id):
+    with db.ReadSession() as session:
+        rows = session.query(Registration, Event).outerjoin(
+            Event, Event.name == Registration.event_name
+        ).filter(Registration.user_id == user_id).order_by(Registration.registration_date.desc()).all()
+        result = []
+        for reg, event in rows:
+            reg_tuple = (reg.id, reg.user_id, reg.full_name, reg.student_id, reg.national_id,
+                         reg.phone_number, reg.event_name, reg.registration_date, reg.status,
+                         reg.notified_admin, 'event')
+            reg_tuple += (event.starts_at, event.description, event.location)
+            result.append(dict(zip(list(LEGACY_KEYS), reg_tuple)))
+        return result
+
+def legacy_all_messages():
+    with db.ReadSession() as session:
+        messages = session.query(UserMessage).order_by(UserMessage.message_date.desc()).all()
+        return [(m.id, m.user_id, m.user_full_name, m.message_text, m.message_date, m.status,
+                 m.admin_reply, m.reply_date, m.replied_by, m.message_type) for m in messages]
+
+def prepare(registrations, messages):
+    for i in range(registrations):
+        name = f'رویداد هیدراته {i}'
+        try:
+            db.add_event(name, 'توضیحات طولانی رویداد ' * 20, local_day_start(30), 10)
+            db.add_registration(USER_ID, 'علی احمدی', '12345678', '0012345678', '09123456789', name)
+        except ValueError:
+            pass
+    with db.Session() as session:
+        session.add_all(UserMessage(user_id=USER_ID + i, user_full_name='کاربر',
+                                    message_text='متن طولانی پیام ' * 40) for i in range(messages))
+        session.commit()
+
+def measure(func, repeat):
+    func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return percentile(samples, 50), peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registrations', type=int, default=40)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    prepare(args.registrations, args.messages)
+    cases = [
+        ('profile', lambda: legacy_user_registrations(USER_ID), lambda: db.get_user_registrations(USER_ID)),
+        ('inbox list', legacy_all_messages, db.get_all_messages),
+    ]
+    for label, legacy, current in cases:
+        legacy_ms, legacy_kib = measure(legacy, args.repeat)
+        current_ms, current_kib = measure(current, args.repeat)
+        print(f"{label:<11} tuples+dicts {legacy_ms:7.3f}ms {legacy_kib:8.1f}KiB peak | "
+              f"slotted rows {current_ms:7.3f}ms {current_kib:8.1f}KiB peak | "
+              f"{legacy_ms / current_ms:4.1f}x faster")
+
+if __name__ == '__main__':
+    main()
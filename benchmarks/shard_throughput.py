@@ -0,0 +1,135 @@
+# benchmarks/shard_throughput.py
+"""Throughput of the sharded deployment with 1, 2, 4... worker processes.
+
+A fake Bot API runs in this process, next to the real front pieces
+(WorkerPool, ShardRouter, FrontServer). Each worker is a separate process
+running an Application whose only handler burns --cpu-ms of CPU and replies
+through the fake API (--rtt-ms round trip), one update at a time like the bot.
+--updates webhook calls from --users users are fired at the front as fast as
+it accepts them; throughput is counted until the last reply arrives.
+
+Also checks that every user was served by one worker only and got their
+replies in the order their updates were sent.
+
+    python -m benchmarks.shard_throughput --workers 1 2 4 --cpu-ms 2 --rtt-ms 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+import aiohttp
+from aiohttp import web
+from benchmarks.common import summarize
+from benchmarks.webhook_latency import FakeBotAPI, TOKEN, SECRET, free_port
+from telegram.ext import Application, MessageHandler, filters
+from main.server import WebServer, SECRET_TOKEN_HEADER, serve
+from main.sharding import WorkerPool, ShardRouter, FrontServer
+from config import Config
+
+class RecordingBotAPI(FakeBotAPI):
+    """Also records which shard answered each chat, in reply order."""
+
+    def __init__(self, rtt_ms):
+        super().__init__(rtt_ms)
+        self.replies = defaultdict(list)
+
+    def send_message(self, chat_id, text):
+        shard, _, update_id = text.split()
+        self.replies[chat_id].append((int(shard), int(update_id)))
+        return super().send_message(chat_id, text)
+
+def worker_main():
+    """Entry point of one benchmark worker process (env comes from WorkerPool)."""
+    cpu = float(os.environ['BENCH_CPU_MS']) / 1000
+
+    async def reply(update, context):
+        deadline = time.process_time() + cpu
+        while time.process_time() < deadline:
+            pass
+        update_id = update.message.text.split()[-1]
+        await update.message.reply_text(f'{Config.SHARD_INDEX} ping {update_id}')
+
+    application = Application.builder().token(TOKEN)\
+        .base_url(f"http://127.0.0.1:{os.environ['BENCH_API_PORT']}/bot")\
+        .build()
+    application.add_handler(MessageHandler(filters.TEXT, reply))
+    web_server = WebServer(application, Config.PORT, host='127.0.0.1',
+                           webhook_path=Config.WEBHOOK_PATH, secret_token=Config.WEBHOOK_SECRET)
+    asyncio.run(serve(application, 'worker', web_server))
+
+async def run(args, workers):
+    api = RecordingBotAPI(args.rtt_ms)
+    api.expected = args.updates
+    api_port, front_port = free_port(), free_port()
+    runner = web.AppRunner(api.create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', api_port).start()
+
+    pool = WorkerPool(
+        workers, free_port(), 'worker-secret',
+        command=[sys.executable, '-m', 'benchmarks.shard_throughput', '--worker'],
+        env={'BENCH_API_PORT': str(api_port), 'BENCH_CPU_MS': str(args.cpu_ms), 'LOG_LEVEL': 'WARNING'}
+    )
+    # پورت‌های کارگرها پشت سر هم هستند؛ در صورت اشغال بودن یکی، اجرا را تکرار کنید
+    router = ShardRouter(pool.urls, pool.secret_token)
+    front = FrontServer(router, front_port, host='127.0.0.1', webhook_path='/telegram', secret_token=SECRET)
+    await pool.start()
+    await router.start()
+    await front.start()
+    if not await pool.wait_ready():
+        raise RuntimeError("workers did not start")
+
+    async with aiohttp.ClientSession() as session:
+        async def deliver(update):
+            async with session.post(f'http://127.0.0.1:{front_port}/telegram', data=json.dumps(update),
+                                    headers={SECRET_TOKEN_HEADER: SECRET,
+                                             'Content-Type': 'application/json'}) as response:
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        # تحویل یکی‌یکی، مثل تلگرام که به‌روزرسانی‌ها را به ترتیب می‌فرستد
+        for update_id in range(1, args.updates + 1):
+            await deliver(api.make_update(update_id, 1 + update_id % args.users))
+        await asyncio.wait_for(api.done.wait(), 300)
+        elapsed = time.perf_counter() - started
+
+    await front.stop()
+    await router.stop()
+    await pool.stop()
+    await runner.cleanup()
+
+    sticky = all(len({shard for shard, _ in replies}) == 1 for replies in api.replies.values())
+    ordered = all([update_id for _, update_id in replies] == sorted(update_id for _, update_id in replies)
+                  for replies in api.replies.values())
+    per_shard = defaultdict(int)
+    for replies in api.replies.values():
+        per_shard[replies[0][0]] += len(replies)
+    return args.updates / elapsed, api.latencies, sticky, ordered, dict(sorted(per_shard.items()))
+
+def main():
+    if '--worker' in sys.argv:
+        worker_main()
+        return
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--cpu-ms', type=float, default=2, help='handler CPU time per update')
+    parser.add_argument('--rtt-ms', type=float, default=40, help='round trip to the Bot API')
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs, {args.cpu_ms}ms CPU + {args.rtt_ms}ms RTT per update")
+
+    ok = True
+    for workers in args.workers:
+        throughput, latencies, sticky, ordered, per_shard = asyncio.run(run(args, workers))
+        print(f"{workers} workers: {throughput:7.1f} updates/s, per worker {per_shard}, "
+              f"one worker per user: {sticky}, in order: {ordered}")
+        summarize(f"{workers} workers update-to-reply", latencies)
+        ok = ok and sticky and ordered
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/text_normalization.py
+"""Per-character digit conversion vs translation-table normalisation, and backfill speed.
+
+Converts generated Persian text of each --sizes length (characters) with the
+previous convert_persian_digits (a Python loop growing a string with +=) and
+with the translation tables of main/utils/normalize.py, and times the full
+normalize_text pass on the same input. Then seeds --rows registrations
+written in mixed spellings and times the batched backfill, checking that a
+second run finds nothing left to change.
+
+    python -m benchmarks.text_normalization --sizes 1000 100000 1000000 --rows 20000
+"""
+import argparse
+import random
+import sys
+import time
+from benchmarks.common import percentile
+from database import db, Registration
+from database.backfill import backfill_registrations
+from main.utils.normalize import normalize_digits, normalize_text, normalize_name
+
+PERSIAN_TO_ENGLISH = {
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9'
+}
+WORDS = ['علي', 'رضايی', 'كريمی', 'محمد', 'دانشگاه', 'مهندسی', '۱۴۰۴', '٠٩١٢', 'ساخت‌‌و', 'تولید']
+NAMES = ['علي  رضايي‌فر', 'علی رضایی‌فر', ' علي رضايي‌‌فر ', 'كاظم  كريمي', 'کاظم کریمی']
+
+def legacy_convert_persian_digits(text):
+    converted_text = ''
+    for char in text:
+        if char in PERSIAN_TO_ENGLISH:
+            converted_text += PERSIAN_TO_ENGLISH[char]
+        else:
+            converted_text += char
+    return converted_text
+
+def make_text(size, rng):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 2
+    return ('  '.join(words))[:size]
+
+def measure(func, text, repeat):
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 50)
+
+def seed(rows, rng):
+    db.add_event('رویداد بک‌فیل', 'backfill', '۱۴۰۴/۱۲/۰۱', rows)
+    with db.Session() as session:
+        session.add_all(Registration(
+            user_id=10 ** 7 + i, full_name=rng.choice(NAMES), student_id=rng.choice(['۴۰۰۱۲۳۴۵', '40012345', '٤٠٠١ ٢٣٤٥']),
+            national_id=rng.choice(['۰۰۱۲۳۴۵۶۷۸', '0012345678']), phone_number=rng.choice(['۰۹۱۲۳۴۵۶۷۸۹', '09123456789']),
+            event_name='رویداد بک‌فیل'
+        ) for i in range(rows))
+        session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    ok = True
+    for size in args.sizes:
+        text = make_text(size, rng)
+        same = legacy_convert_persian_digits(text) == normalize_digits(text)
+        ok = ok and same
+        legacy = measure(legacy_convert_persian_digits, text, args.repeat)
+        digits = measure(normalize_digits, text, args.repeat)
+        full = measure(normalize_text, text, args.repeat)
+        print(f"{size:>9} chars  loop {legacy:9.2f}ms  digits table {digits:8.2f}ms (x{legacy / digits:6.1f})  "
+              f"normalize_text {full:8.2f}ms  same digits: {same}")
+
+    seed(args.rows, rng)
+    started = time.perf_counter()
+    scanned, changed = backfill_registrations(db, args.batch_size, pause=0)
+    elapsed = time.perf_counter() - started
+    print(f"backfill: {scanned} rows scanned, {changed} changed in {elapsed:.2f}s "
+          f"({scanned / elapsed:.0f} rows/s, batches of {args.batch_size})")
+    _, left = backfill_registrations(db, args.batch_size, pause=0, dry_run=True)
+    names = {row[0] for row in db.Session().execute(Registration.__table__.select().with_only_columns(
+        Registration.full_name).where(Registration.user_id >= 10 ** 7)).all()}
+    print(f"second pass would change {left} rows; distinct names after backfill: {sorted(names)}")
+    ok = ok and left == 0 and names == {normalize_name(name) for name in NAMES}
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
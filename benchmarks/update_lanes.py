@@ -0,0 +1,123 @@
+# benchmarks/update_lanes.py
+"""Sequential vs per-user-lane concurrent update processing, mixed fast and slow handlers.
+
+Runs a real Application against a fake Bot API (--rtt-ms per call). Updates
+from --users users arrive as a Poisson stream at --rate per second. Users in
+the --slow-share fraction have a handler that first waits --slow-ms (a slow
+get_chat_member); everyone else's handler only replies. The same stream is
+replayed with one update at a time and with UserLaneUpdateProcessor at each
+--limits value.
+
+Reports throughput and update-to-reply latency of fast and slow users, and
+checks that no user ever had two handlers running at once and that each
+user's updates were handled in arrival order.
+
+    python -m benchmarks.update_lanes --updates 400 --rate 20 --limits 8 32
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from aiohttp import web
+from benchmarks.common import summarize
+from benchmarks.webhook_latency import FakeBotAPI, TOKEN, free_port
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+from main.tracing import Tracer, TracingUpdateProcessor
+from main.middleware.update_lanes import UserLaneUpdateProcessor
+
+class TimedBotAPI(FakeBotAPI):
+    """Keeps each reply's latency next to its update id."""
+
+    def __init__(self, rtt_ms):
+        super().__init__(rtt_ms)
+        self.reply_latency = {}
+
+    def send_message(self, chat_id, text):
+        result = super().send_message(chat_id, text)
+        self.reply_latency[int(text.split()[-1])] = self.latencies[-1]
+        return result
+
+async def replay(args, processor):
+    api = TimedBotAPI(args.rtt_ms)
+    api.expected = args.updates
+    api_port = free_port()
+    runner = web.AppRunner(api.create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', api_port).start()
+
+    rng = random.Random(7)
+    slow_users = set(rng.sample(range(1, args.users + 1), int(args.users * args.slow_share)))
+    active, handled, violations = set(), {}, []
+
+    async def handler(update, context):
+        user_id = update.effective_user.id
+        if user_id in active:
+            violations.append(f"user {user_id} ran two handlers at once")
+        active.add(user_id)
+        handled.setdefault(user_id, []).append(update.update_id)
+        try:
+            if user_id in slow_users:
+                await asyncio.sleep(args.slow_ms / 1000)
+            await update.message.reply_text(update.message.text)
+        finally:
+            active.discard(user_id)
+
+    application = Application.builder().token(TOKEN)\
+        .base_url(f'http://127.0.0.1:{api_port}/bot')\
+        .concurrent_updates(processor)\
+        .updater(None)\
+        .build()
+    application.add_handler(MessageHandler(filters.TEXT, handler))
+    await application.initialize()
+    await application.start()
+
+    sent = {}
+    started = time.perf_counter()
+    for update_id in range(1, args.updates + 1):
+        user_id = rng.randrange(1, args.users + 1)
+        sent.setdefault(user_id, []).append(update_id)
+        await application.update_queue.put(Update.de_json(api.make_update(update_id, user_id), application.bot))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.wait_for(api.done.wait(), 3600)
+    elapsed = time.perf_counter() - started
+
+    await application.stop()
+    await application.shutdown()
+    await runner.cleanup()
+
+    violations += [f"user {user_id} out of order" for user_id, ids in handled.items() if ids != sent[user_id]]
+    fast, slow = [], []
+    for user_id, update_ids in sent.items():
+        (slow if user_id in slow_users else fast).extend(api.reply_latency[i] for i in update_ids)
+    return args.updates / elapsed, fast, slow, violations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=400)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=20, help='mean updates per second (Poisson)')
+    parser.add_argument('--slow-share', type=float, default=0.1, help='share of users with a slow handler')
+    parser.add_argument('--slow-ms', type=float, default=1500)
+    parser.add_argument('--rtt-ms', type=float, default=40, help='round trip to the Bot API')
+    parser.add_argument('--limits', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--skip-sequential', action='store_true', help='sequential runs take minutes')
+    args = parser.parse_args()
+
+    tracer = Tracer(sample_rate=0, slow_threshold=float('inf'))
+    runs = [] if args.skip_sequential else [('sequential', TracingUpdateProcessor(tracer))]
+    runs += [(f'lanes, limit {limit}', UserLaneUpdateProcessor(tracer, limit)) for limit in args.limits]
+    ok = True
+    for label, processor in runs:
+        throughput, fast, slow, violations = asyncio.run(replay(args, processor))
+        print(f"{label}: {throughput:.1f} updates/s, {len(violations)} ordering violations")
+        summarize("  fast users", fast)
+        summarize("  slow users", slow)
+        for violation in violations[:5]:
+            print(f"  {violation}")
+        ok = ok and not violations
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
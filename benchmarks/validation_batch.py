@@ -0,0 +1,93 @@
+# benchmarks/validation_batch.py
+"""Per-call regex validation vs the validation engine, one row at a time and in batches.
+
+Generates --rows registration rows as a bulk import would see them (Persian
+digits, Arabic letters, +98 prefixes, some invalid values) and validates them
+three ways: the previous validators (regex literals looked up on every call,
+digits converted once to validate and again to store), check_* per row, and
+validate_rows over the whole batch. Reports rows per second and checks that
+the per-row and batch results agree.
+
+    python -m benchmarks.validation_batch --rows 20000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+import benchmarks.common  # noqa: F401
+from main.utils.normalize import normalize_digits, normalize_name, normalize_number, normalize_phone
+from main.utils.validators import FIELD_RULES, check_field, validate_rows
+
+NAMES = ['علي احمدي', 'علی احمدی', 'رضا رضایی‌فر', 'كاظم  كريمي', 'Ali Ahmadi', 'مریم', 'حسن علی']
+STUDENT_IDS = ['۴۰۰۱۲۳۴۵', '40012345678', '٤٠٠١ ٢٣٤٥', '1234']
+NATIONAL_IDS = ['۰۰۱۲۳۴۵۶۷۸', '0012345679', '1111111111', '00123']
+PHONES = ['۰۹۱۲۳۴۵۶۷۸۹', '+989351234567', '00989211234567', '9901234567', '09612345678', '0912']
+
+def legacy_validate(row):
+    # هر فیلد جداگانه بررسی می‌شود، همان‌طور که هندلرهای ثبت‌نام می‌کردند
+    full_name = normalize_name(row['full_name']).strip()
+    name_ok = bool(re.fullmatch(r'[آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی\u200c\s]+', full_name))
+    parts = full_name.split()
+    name_ok = name_ok and len(parts) >= 2 and all(len(part.replace('\u200c', '')) >= 3 and re.fullmatch(
+        r'[آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی]+(?:\u200c[آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی]+)*', part
+    ) for part in parts)
+    student_id = normalize_digits(normalize_number(row['student_id']))
+    national_id = normalize_digits(normalize_number(row['national_id']))
+    phone_number = normalize_digits(normalize_phone(row['phone_number']))
+    return [
+        name_ok,
+        student_id.isdigit() and len(student_id) >= 8,
+        national_id.isdigit() and len(national_id) == 10,
+        bool(re.match(r'^09\d{9}$', phone_number))
+    ]
+
+def engine_validate(row):
+    return {field: check_field(field, row[field]) for field in FIELD_RULES}
+
+def make_rows(count, rng):
+    return [{
+        'full_name': rng.choice(NAMES), 'student_id': rng.choice(STUDENT_IDS),
+        'national_id': rng.choice(NATIONAL_IDS), 'phone_number': rng.choice(PHONES)
+    } for _ in range(count)]
+
+def rate(func, rows, repeat):
+    """Best rows per second over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(rows) / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    rows = make_rows(args.rows, random.Random(7))
+
+    legacy = rate(lambda rows: [legacy_validate(row) for row in rows], rows, args.repeat)
+    per_row = rate(lambda rows: [engine_validate(row) for row in rows], rows, args.repeat)
+    batch = rate(validate_rows, rows, args.repeat)
+    print(f"{args.rows} rows  legacy {legacy:10.0f} rows/s  check_* per row {per_row:10.0f} rows/s "
+          f"(x{per_row / legacy:4.2f})  validate_rows {batch:10.0f} rows/s (x{batch / legacy:4.2f})")
+
+    single = [engine_validate(row) for row in rows]
+    batched = validate_rows(rows)
+    same = all(
+        values == {field: result.value for field, result in checks.items()}
+        and errors == {field: result.error for field, result in checks.items() if result.error}
+        for (values, errors), checks in zip(batched, single)
+    )
+    valid = sum(1 for _, errors in batched if not errors)
+    codes = {}
+    for _, errors in batched:
+        for code in errors.values():
+            codes[code] = codes.get(code, 0) + 1
+    print(f"valid rows: {valid}/{args.rows}  errors: {dict(sorted(codes.items()))}  batch == per row: {same}")
+    sys.exit(0 if same else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/webhook_latency.py
+"""Update-to-reply latency: webhook vs long polling.
+
+Starts a fake Bot API server on localhost and a real Application that echoes
+every message. The same update stream is replayed once through getUpdates long
+polling and once through the aiohttp webhook server; latency is measured from
+the moment an update reaches "Telegram" to the moment the echo's sendMessage
+arrives back. --rtt-ms adds network round-trip time to every hop. Updates are
+handled one at a time, so keep --rate below 1000 / rtt-ms.
+
+    python -m benchmarks.webhook_latency --updates 500 --rate 8 --rtt-ms 80
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import time
+import aiohttp
+from aiohttp import web
+from telegram.ext import Application, MessageHandler, filters
+from benchmarks.common import summarize
+from main.server import WebServer, SECRET_TOKEN_HEADER, serve
+
+TOKEN = '123456:BENCH'
+SECRET = 'bench-secret'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class FakeBotAPI:
+    """Just enough of the Bot API for an echo bot, with simulated network delay."""
+
+    def __init__(self, rtt_ms):
+        self.half_rtt = rtt_ms / 2000
+        self.pending = []
+        self.arrived = asyncio.Event()
+        self.created = {}
+        self.latencies = []
+        self.done = asyncio.Event()
+        self.expected = 0
+        self.message_ids = iter(range(1, 10 ** 9))
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_post(f'/bot{TOKEN}/{{method}}', self.dispatch)
+        return app
+
+    async def dispatch(self, request):
+        await asyncio.sleep(self.half_rtt)  # request on its way to Telegram
+        params = dict(await request.post())
+        method = request.match_info['method']
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'bench', 'username': 'bench_bot'}
+        elif method == 'getUpdates':
+            result = await self.get_updates(int(params.get('offset', 0)), float(params.get('timeout', 0)))
+        elif method == 'sendMessage':
+            result = self.send_message(int(params['chat_id']), params['text'])
+        else:
+            result = True
+        await asyncio.sleep(self.half_rtt)  # response on its way back
+        return web.json_response({'ok': True, 'result': result})
+
+    async def get_updates(self, offset, timeout):
+        self.pending = [u for u in self.pending if u['update_id'] >= offset]
+        if not self.pending:
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(self.pending)
+
+    def send_message(self, chat_id, text):
+        update_id = int(text.split()[-1])
+        self.latencies.append((time.perf_counter() - self.created[update_id]) * 1000)
+        if len(self.latencies) == self.expected:
+            self.done.set()
+        return {'message_id': next(self.message_ids), 'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'}, 'text': text}
+
+    def make_update(self, update_id, user_id):
+        self.created[update_id] = time.perf_counter()
+        return {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id, 'date': int(time.time()), 'text': f'ping {update_id}',
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': user_id, 'is_bot': False, 'first_name': 'user'},
+            },
+        }
+
+async def echo(update, context):
+    await update.message.reply_text(update.message.text)
+
+async def replay(args, mode):
+    api = FakeBotAPI(args.rtt_ms)
+    api.expected = args.updates
+    api_port, bot_port = free_port(), free_port()
+    api_runner = web.AppRunner(api.create_app(), access_log=None)
+    await api_runner.setup()
+    await web.TCPSite(api_runner, '127.0.0.1', api_port).start()
+
+    application = Application.builder().token(TOKEN)\
+        .base_url(f'http://127.0.0.1:{api_port}/bot')\
+        .build()
+    application.add_handler(MessageHandler(filters.TEXT, echo))
+    web_server = WebServer(application, bot_port, host='127.0.0.1',
+                           webhook_path='/telegram', secret_token=SECRET)
+    stop = asyncio.Event()
+    bot_task = asyncio.create_task(serve(
+        application, mode, web_server, stop_event=stop,
+        webhook_url=f'http://127.0.0.1:{bot_port}/telegram'
+    ))
+    while not application.running:
+        await asyncio.sleep(0.01)
+
+    rng = random.Random(1)
+    deliveries = []
+    async with aiohttp.ClientSession() as session:
+        async def deliver(update):
+            await asyncio.sleep(api.half_rtt)
+            async with session.post(f'http://127.0.0.1:{bot_port}/telegram', data=json.dumps(update),
+                                    headers={SECRET_TOKEN_HEADER: SECRET,
+                                             'Content-Type': 'application/json'}) as response:
+                response.raise_for_status()
+
+        for update_id in range(1, args.updates + 1):
+            update = api.make_update(update_id, rng.randrange(1, args.users))
+            if mode == 'webhook':
+                deliveries.append(asyncio.create_task(deliver(update)))
+            else:
+                api.pending.append(update)
+                api.arrived.set()
+            await asyncio.sleep(rng.expovariate(args.rate))
+        await asyncio.gather(*deliveries)
+        await asyncio.wait_for(api.done.wait(), 60)
+
+    stop.set()
+    await bot_task
+    await api_runner.cleanup()
+    return api.latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=400)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=8, help='mean updates per second (Poisson)')
+    parser.add_argument('--rtt-ms', type=float, default=80, help='round trip to the Bot API')
+    args = parser.parse_args()
+
+    for mode in ('polling', 'webhook'):
+        summarize(f"{mode} update-to-reply", asyncio.run(replay(args, mode)))
+
+if __name__ == '__main__':
+    main()
@@ -14,12 +14,59 @@ class Config:
     CHANNEL_ID = int(os.getenv('CHANNEL_ID', '-1002287176548'))
     CHANNEL_URL = os.getenv('CHANNEL_URL', 'https://t.me/UMA_manufacturing402')
     CHANNEL_USERNAME = os.getenv('CHANNEL_USERNAME', '@UMA_manufacturing402')
+    MEMBERSHIP_CACHE_POSITIVE_TTL = int(os.getenv('MEMBERSHIP_CACHE_POSITIVE_TTL', '600'))
+    MEMBERSHIP_CACHE_NEGATIVE_TTL = int(os.getenv('MEMBERSHIP_CACHE_NEGATIVE_TTL', '30'))
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # memory یا sqlite
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+    RATE_LIMIT_IDLE_TTL = int(os.getenv('RATE_LIMIT_IDLE_TTL', '3600'))  # باید از طولانی‌ترین پنجره بیشتر باشد
+    SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', '30'))  # پیام در ثانیه برای کل ربات
+    SEND_GLOBAL_BURST = int(os.getenv('SEND_GLOBAL_BURST', '30'))
+    SEND_PRIVATE_CHAT_RATE = float(os.getenv('SEND_PRIVATE_CHAT_RATE', '1'))  # پیام در ثانیه برای هر گفتگو
+    SEND_GROUP_CHAT_RATE = float(os.getenv('SEND_GROUP_CHAT_RATE', str(20 / 60)))  # گروه‌ها: ۲۰ پیام در دقیقه
+    SEND_CHAT_BURST = int(os.getenv('SEND_CHAT_BURST', '3'))
+    SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', '3'))
+    BROADCAST_BATCH_SIZE = int(os.getenv('BROADCAST_BATCH_SIZE', '100'))
+    BROADCAST_LEASE_SECONDS = int(os.getenv('BROADCAST_LEASE_SECONDS', '300'))
+    PERSISTENCE_UPDATE_INTERVAL = float(os.getenv('PERSISTENCE_UPDATE_INTERVAL', '5'))  # ثانیه
+    PERSISTENCE_FLUSH_DELAY = float(os.getenv('PERSISTENCE_FLUSH_DELAY', '0.5'))
+    PERSISTENCE_MAX_AGE_DAYS = int(os.getenv('PERSISTENCE_MAX_AGE_DAYS', '7'))  # گفتگوهای رهاشده پس از این مدت حذف می‌شوند
     PROXY_URL = os.getenv('PROXY_URL')
     DATABASE_PATH = os.getenv('DATABASE_PATH', 'database/bot_data.db')
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-16000'))  # منفی یعنی کیلوبایت
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '30000'))
+    SQLITE_READ_POOL_SIZE = int(os.getenv('SQLITE_READ_POOL_SIZE', '4'))
+    EVENT_CATALOG_MAX_AGE = int(os.getenv('EVENT_CATALOG_MAX_AGE', '60'))
+    TIMEZONE = os.getenv('TIMEZONE', 'Asia/Tehran')  # منطقه زمانی تاریخ و ساعت رویدادها
+    REGISTRATION_CUTOFF_MINUTES = int(os.getenv('REGISTRATION_CUTOFF_MINUTES', '60'))  # بسته شدن ثبت‌نام پیش از شروع رویداد
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    EVENT_CLOSE_INTERVAL_MINUTES = int(os.getenv('EVENT_CLOSE_INTERVAL_MINUTES', '5'))
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '500'))
+    EXPORT_PDF_FONT_PATH = os.getenv('EXPORT_PDF_FONT_PATH')  # فونت TTF فارسی برای خروجی PDF
+    DB_WORKER_THREADS = int(os.getenv('DB_WORKER_THREADS', '4'))
+    MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', '32'))  # به‌روزرسانی‌های هر کاربر همیشه به ترتیب
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     MAX_MESSAGES_PER_DAY = int(os.getenv('MAX_MESSAGES_PER_DAY', '1'))
     HEALTH_CHECK_ENABLED = os.getenv('HEALTH_CHECK_ENABLED', 'true').lower() == 'true'
     HEALTH_CHECK_PORT = int(os.getenv('HEALTH_CHECK_PORT', '10000'))
+    PORT = int(os.getenv('PORT', str(HEALTH_CHECK_PORT)))  # Render پورت را در PORT می‌دهد
+    BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()  # polling یا webhook (worker فقط برای پردازه‌های کارگر)
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL', os.getenv('RENDER_EXTERNAL_URL', ''))
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+    WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', '1'))  # بیش از ۱: پردازه جلویی + کارگرها
+    WORKER_BASE_PORT = int(os.getenv('WORKER_BASE_PORT', str(PORT + 1)))
+    SHARD_INDEX = int(os.getenv('SHARD_INDEX', '0'))  # توسط پردازه جلویی برای هر کارگر تنظیم می‌شود
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT', '1'))
+    READY_DB_TIMEOUT = float(os.getenv('READY_DB_TIMEOUT', '2'))  # ثانیه
+    READY_MAX_LOOP_LAG = float(os.getenv('READY_MAX_LOOP_LAG', '1'))  # ثانیه
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1'))  # سهم به‌روزرسانی‌های ردگیری‌شده (۰ تا ۱)
+    TRACE_SLOW_MS = int(os.getenv('TRACE_SLOW_MS', '1000'))
+    TRACE_KEEP_SLOWEST = int(os.getenv('TRACE_KEEP_SLOWEST', '50'))
+    TRACE_WINDOW_SECONDS = int(os.getenv('TRACE_WINDOW_SECONDS', '900'))
+    TRACE_DEBUG_TOKEN = os.getenv('TRACE_DEBUG_TOKEN')  # بدون آن /debug/traces غیرفعال است
 
     @classmethod
     def validate(cls):
@@ -44,6 +91,17 @@ class Config:
             raise ValueError("CONTACT_PHONE not found")
         if not cls.CONTACT_EMAIL:
             raise ValueError("CONTACT_EMAIL not found")
+        if cls.BOT_MODE not in ('polling', 'webhook', 'worker'):
+            raise ValueError(f"BOT_MODE must be polling or webhook, not {cls.BOT_MODE}")
+        if cls.BOT_MODE == 'webhook':
+            if not cls.WEBHOOK_URL:
+                raise ValueError("WEBHOOK_URL not found")
+            if not cls.WEBHOOK_SECRET:
+                raise ValueError("WEBHOOK_SECRET not found")
+        if cls.BOT_MODE == 'worker' and not cls.WEBHOOK_SECRET:
+            raise ValueError("WEBHOOK_SECRET not found")
+        if cls.WORKER_PROCESSES < 1:
+            raise ValueError("WORKER_PROCESSES must be at least 1")
 
     @classmethod
     def is_proxy_configured(cls):
@@ -1,20 +1,39 @@
 # database/__init__.py
 from .manager import DatabaseManager
-from .models import Base, Registration, Event, UserMessage
+from .async_manager import AsyncDatabaseManager
+from .models import Base, Registration, Event, UserMessage, Broadcast
+from .rows import (
+    EventRow, EventSummary, RegistrationDetails, RegistrationSummary,
+    AttendeeRow, MessageRow, MessagePreview, InboxPage, BroadcastRow, BroadcastRecipient
+)
 from .sample_data import get_sample_events
 
 # Global database instance
 db = DatabaseManager()
+async_db = AsyncDatabaseManager(db)
 
 # Export public interfaces
 __all__ = [
     'db',
+    'async_db',
     'Base', 
     'Registration', 
     'Event', 
     'UserMessage',
+    'Broadcast',
+    'EventRow',
+    'EventSummary',
+    'RegistrationDetails',
+    'RegistrationSummary',
+    'AttendeeRow',
+    'MessageRow',
+    'MessagePreview',
+    'InboxPage',
+    'BroadcastRow',
+    'BroadcastRecipient',
     'get_sample_events',
-    'DatabaseManager'
+    'DatabaseManager',
+    'AsyncDatabaseManager'
 ]
 
 # Version info
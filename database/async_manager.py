@@ -0,0 +1,58 @@
+# database/async_manager.py
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabaseManager:
+    """Awaitable facade over DatabaseManager.
+
+    Every public method of the wrapped manager is exposed as a coroutine that runs
+    on a bounded thread pool, so SQLite I/O and lock waits never block the bot loop.
+    """
+
+    def __init__(self, manager, max_workers=None):
+        self._manager = manager
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.DB_WORKER_THREADS,
+            thread_name_prefix='db-worker'
+        )
+        self._methods = {}
+
+    @property
+    def manager(self):
+        return self._manager
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self._manager, name)
+        if not callable(attr):
+            return attr
+        method = self._methods.get(name)
+        if method is None:
+            method = self._wrap(attr)
+            self._methods[name] = method
+        return method
+
+    def _wrap(self, func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+        return wrapper
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database worker pool."""
+        loop = asyncio.get_running_loop()
+        # run_in_executor does not propagate contextvars, so carry them over explicitly
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool."""
+        self._executor.shutdown(wait=wait)
+        logger.info("Database worker pool stopped")
@@ -0,0 +1,85 @@
+# database/backfill.py
+"""One-off normalisation of existing registrations.
+
+Rows written before main/utils/normalize.py existed can hold the same name
+or number in several spellings (Arabic ي/ك, Persian digits, stray spaces
+and half-spaces). This walks the registrations table by id in batches and
+rewrites only the rows whose normalised values differ. Each batch is its own
+short transaction, so the bot can keep writing while it runs.
+
+    python -m database.backfill --batch-size 500
+    python -m database.backfill --dry-run
+"""
+import argparse
+import logging
+import time
+from sqlalchemy import text
+from main.utils.normalize import normalize_name, normalize_number, normalize_phone
+
+logger = logging.getLogger(__name__)
+
+SELECT_BATCH = text("""
+    SELECT id, full_name, student_id, national_id, phone_number FROM registrations
+    WHERE id > :after ORDER BY id LIMIT :limit
+""")
+UPDATE_ROW = text("""
+    UPDATE registrations
+    SET full_name = :full_name, student_id = :student_id, national_id = :national_id, phone_number = :phone_number
+    WHERE id = :id
+""")
+
+def normalize_registration(row):
+    """Return the normalised values of a registration row, or None if it is already normal."""
+    values = {
+        'id': row.id,
+        'full_name': normalize_name(row.full_name or ''),
+        'student_id': normalize_number(row.student_id or ''),
+        'national_id': normalize_number(row.national_id or ''),
+        'phone_number': normalize_phone(row.phone_number or ''),
+    }
+    if all(values[key] == (getattr(row, key) or '') for key in values if key != 'id'):
+        return None
+    return values
+
+def backfill_registrations(manager, batch_size=500, pause=0.05, dry_run=False):
+    """Normalise every registration in batches; return (rows scanned, rows changed)."""
+    after = scanned = changed = 0
+    while True:
+        session = manager.Session()
+        try:
+            rows = session.execute(SELECT_BATCH, {'after': after, 'limit': batch_size}).all()
+            updates = [values for values in map(normalize_registration, rows) if values is not None]
+            if updates and not dry_run:
+                session.execute(UPDATE_ROW, updates)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        if not rows:
+            break
+        after = rows[-1].id
+        scanned += len(rows)
+        changed += len(updates)
+        logger.info(f"Backfill at id {after}: {scanned} scanned, {changed} {'to change' if dry_run else 'changed'}")
+        if pause:
+            # فاصله بین دسته‌ها تا نوشتن‌های ربات پشت قفل پایگاه داده نمانند
+            time.sleep(pause)
+    return scanned, changed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--pause', type=float, default=0.05, help='seconds between batches')
+    parser.add_argument('--dry-run', action='store_true', help='count rows that would change')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from .manager import DatabaseManager
+
+    scanned, changed = backfill_registrations(DatabaseManager(), args.batch_size, args.pause, args.dry_run)
+    print(f"{scanned} registrations scanned, {changed} {'would change' if args.dry_run else 'normalised'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# database/catalog.py
+import threading
+import time
+import dataclasses
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EventCatalog:
+    """In-process catalog of active events, grouped by type.
+
+    Every change to the cached data bumps ``version``, so anything derived from
+    the listings (rendered messages, keyboards) can be keyed on it. Writers either
+    invalidate the catalog or patch registered_count in place; ``max_age`` bounds
+    staleness from writes made by other processes. When the loader filters by
+    time, ``period`` returns the bound it uses; the catalog reloads as soon as
+    that value changes.
+    """
+
+    def __init__(self, loader, max_age=60, period=None):
+        self._loader = loader
+        self._max_age = max_age
+        self._period = period
+        self._lock = threading.RLock()
+        self._version = 0
+        self._by_type = None
+        self._loaded_at = 0.0
+        self._loaded_period = None
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self, event_type=None):
+        """Return (version, events) for the given type, or all active events."""
+        period = self._period() if self._period else None
+        with self._lock:
+            if (self._by_type is not None and period == self._loaded_period
+                    and time.monotonic() - self._loaded_at < self._max_age):
+                return self._version, self._by_type.get(event_type, [])
+            expected_version = self._version
+        rows = self._loader()
+        with self._lock:
+            if self._version == expected_version:
+                self._install(rows, period)
+                return self._version, self._by_type.get(event_type, [])
+        # an invalidation raced with the load; serve what was read without caching it
+        return expected_version, [event for type_, event in rows if event_type in (None, type_)]
+
+    def _install(self, rows, period=None):
+        by_type = {None: []}
+        for event_type, event in rows:
+            by_type[None].append(event)
+            by_type.setdefault(event_type, []).append(event)
+        self._by_type = by_type
+        self._loaded_at = time.monotonic()
+        self._loaded_period = period
+        self._version += 1
+
+    def invalidate(self):
+        """Drop cached events; the next read reloads them."""
+        with self._lock:
+            self._by_type = None
+            self._version += 1
+
+    def adjust_registered_count(self, event_name, delta):
+        """Patch registered_count of a cached event after a registration change."""
+        with self._lock:
+            self._version += 1
+            if self._by_type is None:
+                return
+            for events in self._by_type.values():
+                for i, event in enumerate(events):
+                    if event.name == event_name:
+                        events[i] = dataclasses.replace(event, registered_count=event.registered_count + delta)
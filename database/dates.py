@@ -0,0 +1,65 @@
+# database/dates.py
+"""Event start times.
+
+events.starts_at holds naive UTC datetimes, like every other timestamp in the
+database. Admins give dates as Jalali text such as '۱۴۰۴/۱۰/۱۵' (Persian or
+ASCII digits) with an optional local 'HH:MM' time; parse_jalali turns that
+into the stored value. Events count as upcoming from the start of the current
+local day, so an event stays listed until its day is over; registration
+closes earlier, a configured number of minutes before the start.
+"""
+import re
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+import jdatetime
+from config import Config
+
+LOCAL_TIMEZONE = ZoneInfo(Config.TIMEZONE)
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '0123456789' * 2)
+JALALI_DATE_PATTERN = re.compile(r'(\d{4})\s*[/.-]\s*(\d{1,2})\s*[/.-]\s*(\d{1,2})')
+TIME_PATTERN = re.compile(r'(\d{1,2})\s*:\s*(\d{2})')
+
+def to_utc(local):
+    """Naive UTC datetime for a naive datetime in Config.TIMEZONE."""
+    return local.replace(tzinfo=LOCAL_TIMEZONE).astimezone(timezone.utc).replace(tzinfo=None)
+
+def to_local(moment):
+    """Naive Config.TIMEZONE datetime for a naive UTC datetime."""
+    return moment.replace(tzinfo=timezone.utc).astimezone(LOCAL_TIMEZONE).replace(tzinfo=None)
+
+def parse_jalali(date_text, time_text=None):
+    """Return the UTC start for a Jalali date and optional local 'HH:MM' time."""
+    match = JALALI_DATE_PATTERN.fullmatch(str(date_text).translate(DIGITS).strip())
+    if not match:
+        raise ValueError("تاریخ رویداد باید به صورت ۱۴۰۴/۱۰/۱۵ باشد")
+    hour = minute = 0
+    if time_text:
+        # بازه‌هایی مانند 10:00-12:00 با ساعت شروع ذخیره می‌شوند
+        time_match = TIME_PATTERN.match(str(time_text).translate(DIGITS).strip())
+        if not time_match:
+            raise ValueError("زمان رویداد باید به صورت 10:30 باشد")
+        hour, minute = map(int, time_match.groups())
+    try:
+        day = jdatetime.date(*map(int, match.groups())).togregorian()
+        return to_utc(datetime.combine(day, time(hour, minute)))
+    except ValueError:
+        raise ValueError("تاریخ یا زمان رویداد معتبر نیست")
+
+def event_start(date, time_text=None):
+    """starts_at for a datetime (already UTC) or Jalali date text."""
+    if isinstance(date, datetime):
+        return date
+    return parse_jalali(date, time_text)
+
+def local_day_start(days=0, now=None):
+    """UTC instant of local midnight, days after today."""
+    today = to_local(now or datetime.utcnow()).date()
+    return to_utc(datetime.combine(today + timedelta(days=days), time()))
+
+def upcoming_cutoff(now=None):
+    """Events starting at or after this UTC instant are upcoming."""
+    return local_day_start(0, now)
+
+def registration_deadline(cutoff_minutes, now=None):
+    """Events starting at or before this UTC instant no longer take registrations."""
+    return (now or datetime.utcnow()) + timedelta(minutes=cutoff_minutes)
@@ -0,0 +1,56 @@
+# database/engine.py
+from sqlalchemy import create_engine, event
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+def sqlite_pragmas(readonly=False):
+    """Return the PRAGMA statements applied to every new SQLite connection."""
+    pragmas = [
+        ('busy_timeout', Config.SQLITE_BUSY_TIMEOUT_MS),
+        ('synchronous', Config.SQLITE_SYNCHRONOUS),
+        ('cache_size', Config.SQLITE_CACHE_SIZE),
+        ('mmap_size', Config.SQLITE_MMAP_SIZE),
+        ('temp_store', 'MEMORY'),
+    ]
+    if readonly:
+        pragmas.append(('query_only', 'ON'))
+    else:
+        # journal_mode is persistent in the database file, so the writer sets it
+        pragmas.insert(0, ('journal_mode', Config.SQLITE_JOURNAL_MODE))
+    return pragmas
+
+def create_sqlite_engine(db_path, readonly=False):
+    """Create a tuned SQLite engine.
+
+    The writer engine holds a single connection: SQLite allows one writer at a
+    time, so queueing on the pool is cheaper than spinning on the busy handler.
+    Reader engines get a pool of query_only connections that, in WAL mode, never
+    wait for the writer.
+    """
+    pool_size = Config.SQLITE_READ_POOL_SIZE if readonly else 1
+    engine = create_engine(
+        f'sqlite:///{db_path}',
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        connect_args={
+            'timeout': Config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            'check_same_thread': False,
+        }
+    )
+    pragmas = sqlite_pragmas(readonly)
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite {'reader' if readonly else 'writer'} engine ready: "
+                + ", ".join(f"{name}={value}" for name, value in pragmas))
+    return engine
@@ -0,0 +1,92 @@
+# database/instrumentation.py
+"""Query counting for DatabaseManager.
+
+QueryCounter records every SQL statement executed on a set of engines, and
+assert_max_queries turns that into an assertion, so N+1 regressions fail loudly:
+
+    with assert_max_queries(db, 1):
+        db.get_user_registrations(user_id)
+
+``python -m database.instrumentation`` checks the per-method budgets below
+against a user with many registrations.
+"""
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from sqlalchemy import event
+from .dates import local_day_start
+
+class QueryCounter:
+    """Context manager recording (statement, parameters) executed on the given engines."""
+
+    def __init__(self, *engines):
+        self.engines = engines
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+def manager_engines(manager):
+    """Return every engine a DatabaseManager talks to."""
+    return (manager.engine, manager.read_engine)
+
+@contextmanager
+def assert_max_queries(manager, expected):
+    """Fail with AssertionError if the block runs more than expected SQL statements."""
+    with QueryCounter(*manager_engines(manager)) as counter:
+        yield counter
+    if counter.count > expected:
+        executed = "\n".join(f"  {' '.join(statement.split())[:150]}" for statement, _ in counter.statements)
+        raise AssertionError(f"Expected at most {expected} queries, {counter.count} executed:\n{executed}")
+
+# Maximum statements per call, independent of how many rows the user has.
+QUERY_BUDGETS = [
+    ('get_user_registrations', (1,), 1),
+    ('get_registration_by_id', (1, 1), 1),
+    ('get_user_registration_count', (1,), 1),
+    ('get_events', (), 1),
+    ('get_recent_registrations', (), 1),
+    ('get_all_events_admin', (), 1),
+]
+
+def check_query_budgets(manager, registrations=25):
+    """Register user 1 for many events and return (method, budget, executed) for QUERY_BUDGETS."""
+    for i in range(registrations):
+        name = f'رویداد بودجه {i}'
+        manager.add_event(name, 'query budget', local_day_start(30), 10)
+        manager.add_registration(1, 'علی احمدی', '12345678', '0012345678', '09123456789', name)
+    results = []
+    for name, args, budget in QUERY_BUDGETS:
+        with QueryCounter(*manager_engines(manager)) as counter:
+            getattr(manager, name)(*args)
+        results.append((name, budget, counter.count))
+    return results
+
+def main():
+    from .manager import DatabaseManager
+
+    manager = DatabaseManager(db_path=str(Path(tempfile.mkdtemp()) / 'budget.db'))
+    failures = 0
+    for name, budget, executed in check_query_budgets(manager):
+        ok = executed <= budget
+        failures += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<32} {executed} queries (budget {budget})")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
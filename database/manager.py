@@ -1,28 +1,76 @@
 # database/manager.py
-from sqlalchemy import create_engine
+from sqlalchemy import update, func, or_, text
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from pathlib import Path
-from datetime import datetime
-from .models import Base, Registration, Event, UserMessage
+from datetime import datetime, timedelta
+from .models import Registration, Event, UserMessage, Broadcast
+from .migrations import run_migrations
+from .engine import create_sqlite_engine
+from .catalog import EventCatalog
+from .dates import event_start, registration_deadline, upcoming_cutoff
+from .rows import (
+    EventRow, EventSummary, RegistrationDetails, RegistrationSummary,
+    AttendeeRow, MessageRow, MessagePreview, InboxPage, BroadcastRow, BroadcastRecipient
+)
 from .sample_data import get_sample_events
 from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+INBOX_MAX_PAGE_SIZE = 100
+INBOX_PREVIEW_LENGTH = 80
+
+# Columns selected for each row type, in field order
+EVENT_ROW_COLUMNS = (Event.name, Event.description, Event.starts_at, Event.capacity,
+                     Event.registered_count, Event.location)
+EVENT_SUMMARY_COLUMNS = (Event.id, Event.name, Event.starts_at, Event.capacity,
+                         Event.registered_count, Event.type, Event.active)
+REGISTRATION_DETAILS_COLUMNS = (
+    Registration.id, Registration.event_name, Registration.full_name, Registration.student_id,
+    Registration.phone_number, Registration.registration_date,
+    Event.starts_at,
+    func.coalesce(Event.description, "توضیحات موجود نیست"),
+    func.coalesce(Event.location, "")
+)
+REGISTRATION_SUMMARY_COLUMNS = (
+    Registration.id, Registration.user_id, Registration.full_name, Registration.student_id,
+    Registration.phone_number, Registration.event_name, Registration.registration_date,
+    Registration.status
+)
+ATTENDEE_ROW_COLUMNS = (
+    Registration.id, Registration.full_name, Registration.student_id, Registration.national_id,
+    Registration.phone_number, Registration.registration_date, Registration.status
+)
+MESSAGE_ROW_COLUMNS = (
+    UserMessage.id, UserMessage.user_id, UserMessage.user_full_name, UserMessage.message_text,
+    UserMessage.message_date, UserMessage.status, UserMessage.admin_reply, UserMessage.reply_date,
+    UserMessage.replied_by, UserMessage.message_type
+)
+MESSAGE_PREVIEW_COLUMNS = (
+    UserMessage.id, UserMessage.user_id, UserMessage.user_full_name,
+    func.substr(UserMessage.message_text, 1, INBOX_PREVIEW_LENGTH),
+    UserMessage.message_date, UserMessage.status, UserMessage.message_type
+)
+BROADCAST_ROW_COLUMNS = (
+    Broadcast.id, Broadcast.event_name, Broadcast.message_text, Broadcast.status,
+    Broadcast.last_registration_id, Broadcast.total, Broadcast.delivered, Broadcast.failed,
+    Broadcast.blocked, Broadcast.created_by, Broadcast.created_at, Broadcast.finished_at
+)
+
 class DatabaseManager:
     def __init__(self, db_path=None):
         db_path = db_path or Config.DATABASE_PATH
         Path(db_path).parent.mkdir(exist_ok=True)
-        self.engine = create_engine(
-            f'sqlite:///{db_path}',
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            connect_args={'timeout': 30}
-        )
-        Base.metadata.create_all(self.engine)
+        self.engine = create_sqlite_engine(db_path)
+        run_migrations(self.engine)
+        self.read_engine = create_sqlite_engine(db_path, readonly=True)
         self.Session = sessionmaker(bind=self.engine)
+        self.ReadSession = sessionmaker(bind=self.read_engine)
+        self.catalog = EventCatalog(
+            self._load_active_events, max_age=Config.EVENT_CATALOG_MAX_AGE, period=upcoming_cutoff
+        )
         self._initialize_sample_data()
 
     def _initialize_sample_data(self):
@@ -36,6 +84,12 @@ class DatabaseManager:
                 session.rollback()
                 logger.error(f"Error initializing sample data: {e}")
 
+    def ping(self):
+        """Run a trivial query; raises if the database cannot be read."""
+        with self.read_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+
     def _get_record(self, session, model, **kwargs):
         return session.query(model).filter_by(**kwargs).first()
 
@@ -49,44 +103,73 @@ class DatabaseManager:
 
     # Registration Methods
     def add_registration(self, user_id, full_name, student_id, national_id, phone_number, event_name):
+        deadline = registration_deadline(Config.REGISTRATION_CUTOFF_MINUTES)
         with self.Session() as session:
             try:
-                event = self._get_record(session, Event, name=event_name, active=True)
-                if not event:
-                    raise ValueError("رویداد یافت نشد")
-                if event.registered_count >= event.capacity:
+                # رزرو صندلی: بررسی ظرفیت، مهلت ثبت‌نام و افزایش شمارنده در یک دستور شرطی
+                reserved = session.execute(
+                    update(Event)
+                    .where(
+                        Event.name == event_name,
+                        Event.active == True,
+                        Event.registered_count < Event.capacity,
+                        or_(Event.starts_at == None, Event.starts_at > deadline)
+                    )
+                    .values(registered_count=Event.registered_count + 1)
+                ).rowcount
+                if not reserved:
+                    event = self._get_record(session, Event, name=event_name, active=True)
+                    if not event:
+                        raise ValueError("رویداد یافت نشد")
+                    if event.starts_at is not None and event.starts_at <= deadline:
+                        raise ValueError("مهلت ثبت‌نام این رویداد به پایان رسیده است")
+                    if self._get_record(session, Registration, user_id=user_id, event_name=event_name):
+                        raise ValueError("کاربر قبلاً در این رویداد ثبت‌نام کرده است")
                     raise ValueError("ظرفیت رویداد تکمیل است")
-                if session.query(Registration).filter_by(user_id=user_id, event_name=event_name).count() > 0:
-                    raise ValueError("کاربر قبلاً در این رویداد ثبت‌نام کرده است")
                 registration = Registration(
                     user_id=user_id, full_name=full_name, student_id=student_id,
                     national_id=national_id, phone_number=phone_number, event_name=event_name
                 )
                 session.add(registration)
-                event.registered_count += 1
                 session.commit()
+                self.catalog.adjust_registered_count(event_name, 1)
                 logger.info(f"Registration added: ID {registration.id}")
                 return registration.id
+            except IntegrityError:
+                # قید یکتایی (user_id, event_name) رزرو را همراه با تراکنش برمی‌گرداند
+                session.rollback()
+                raise ValueError("کاربر قبلاً در این رویداد ثبت‌نام کرده است")
             except SQLAlchemyError as e:
                 session.rollback()
                 logger.error(f"Database error in add_registration: {e}")
                 raise
 
     def get_events(self, event_type=None):
-        with self.Session() as session:
-            try:
-                query = session.query(Event).filter_by(active=True)
-                if event_type:
-                    query = query.filter_by(type=event_type)
-                events = query.order_by(Event.date).all()
-                # Fix: return time and location instead of type
-                return [(e.name, e.description, e.date, e.capacity, e.registered_count, e.time, e.location) for e in events]
-            except SQLAlchemyError as e:
-                logger.error(f"Database error in get_events: {e}")
-                return []
+        try:
+            return self.catalog.get(event_type)[1]
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_events: {e}")
+            return []
+
+    def get_event_catalog(self, event_type=None):
+        """Return (catalog version, active events) for cache keys derived from listings."""
+        try:
+            return self.catalog.get(event_type)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_event_catalog: {e}")
+            return None, []
+
+    def _load_active_events(self):
+        """Load active upcoming events as (type, EventRow) pairs for the catalog."""
+        with self.ReadSession() as session:
+            rows = session.query(Event.type, *EVENT_ROW_COLUMNS).filter(
+                Event.active == True,
+                Event.starts_at >= upcoming_cutoff()
+            ).order_by(Event.starts_at).all()
+            return [(row[0], EventRow(*row[1:])) for row in rows]
 
     def is_user_registered_for_event(self, user_id, event_name):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
                 return session.query(Registration).filter_by(user_id=user_id, event_name=event_name).count() > 0
             except SQLAlchemyError as e:
@@ -94,14 +177,18 @@ class DatabaseManager:
                 return False
 
     # Event Management Methods
-    def add_event(self, name, description, date, capacity, event_type='event'):
+    def add_event(self, name, description, date, capacity, event_type='event', time=None, location=None):
+        """Add an event; date is a UTC datetime or Jalali text such as '۱۴۰۴/۱۰/۱۵' with an optional local time."""
+        starts_at = event_start(date, time)
         with self.Session() as session:
             try:
                 if self._get_record(session, Event, name=name):
                     raise ValueError("رویداد با این نام قبلاً وجود دارد")
-                event = Event(name=name, description=description, date=date, capacity=capacity, type=event_type)
+                event = Event(name=name, description=description, starts_at=starts_at, capacity=capacity,
+                              type=event_type, location=location)
                 session.add(event)
                 session.commit()
+                self.catalog.invalidate()
                 logger.info(f"Event added: {name}")
                 return event.id
             except SQLAlchemyError as e:
@@ -117,6 +204,7 @@ class DatabaseManager:
                     raise ValueError("رویداد با این شناسه یافت نشد")
                 event.active = not event.active
                 session.commit()
+                self.catalog.invalidate()
                 logger.info(f"Event {event_id} toggled to {'active' if event.active else 'inactive'}")
                 return event.active
             except SQLAlchemyError as e:
@@ -134,6 +222,7 @@ class DatabaseManager:
                     raise ValueError("امکان حذف رویداد با ثبت‌نام‌های فعال وجود ندارد")
                 session.delete(event)
                 session.commit()
+                self.catalog.invalidate()
                 logger.info(f"Event {event_id} deleted")
                 return True
             except SQLAlchemyError as e:
@@ -141,6 +230,28 @@ class DatabaseManager:
                 logger.error(f"Database error in delete_event: {e}")
                 raise
 
+    def close_due_events(self, cutoff_minutes=0, now=None):
+        """Deactivate active events whose registration has closed; return their names.
+
+        Registration closes cutoff_minutes before an event starts, so past
+        events are always included.
+        """
+        deadline = registration_deadline(cutoff_minutes, now)
+        with self.Session() as session:
+            try:
+                due = (Event.active == True, Event.starts_at <= deadline)
+                names = [name for (name,) in session.query(Event.name).filter(*due).all()]
+                if names:
+                    session.execute(update(Event).where(*due, Event.name.in_(names)).values(active=False))
+                    session.commit()
+                    self.catalog.invalidate()
+                    logger.info(f"Closed {len(names)} events past their registration deadline")
+                return names
+            except SQLAlchemyError as e:
+                session.rollback()
+                logger.error(f"Database error in close_due_events: {e}")
+                raise
+
     def update_event(self, event_id, **kwargs):
         with self.Session() as session:
             try:
@@ -155,10 +266,13 @@ class DatabaseManager:
                     if kwargs['capacity'] < event.registered_count:
                         raise ValueError("ظرفیت جدید نمی‌تواند کمتر از تعداد ثبت‌نام‌ها باشد")
                     event.capacity = kwargs['capacity']
-                for field in ['description', 'date', 'type']:
+                if 'date' in kwargs:
+                    event.starts_at = event_start(kwargs['date'], kwargs.get('time'))
+                for field in ['description', 'type', 'location']:
                     if field in kwargs:
                         setattr(event, field, kwargs[field])
                 session.commit()
+                self.catalog.invalidate()
                 logger.info(f"Event {event_id} updated")
                 return True
             except SQLAlchemyError as e:
@@ -193,7 +307,7 @@ class DatabaseManager:
                 raise
 
     def get_user_messages_today(self, user_id):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
                 today = datetime.now().date()
                 return session.query(UserMessage).filter(
@@ -205,24 +319,24 @@ class DatabaseManager:
                 return 0
 
     def get_all_messages(self, status=None, limit=None):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
-                query = session.query(UserMessage)
+                query = session.query(*MESSAGE_PREVIEW_COLUMNS)
                 if status:
-                    query = query.filter_by(status=status)
+                    query = query.filter(UserMessage.status == status)
+                query = query.order_by(UserMessage.message_date.desc())
                 if limit:
                     query = query.limit(limit)
-                messages = query.order_by(UserMessage.message_date.desc()).all()
-                return [self._message_to_tuple(m) for m in messages]
+                return [MessagePreview(*row) for row in query.all()]
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_all_messages: {e}")
                 return []
 
     def get_message_by_id(self, message_id):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
-                message = self._get_record(session, UserMessage, id=message_id)
-                return self._message_to_tuple(message) if message else None
+                row = session.query(*MESSAGE_ROW_COLUMNS).filter(UserMessage.id == message_id).first()
+                return MessageRow(*row) if row else None
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_message_by_id: {e}")
                 return None
@@ -269,52 +383,90 @@ class DatabaseManager:
 
     # Navigation Methods
     def get_next_message_id(self, current_message_id, status=None):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
                 query = session.query(UserMessage.id)
                 if status:
                     query = query.filter_by(status=status)
-                next_message = query.filter(UserMessage.id > current_message_id).first()
+                next_message = query.filter(UserMessage.id > current_message_id).order_by(UserMessage.id).first()
                 return next_message[0] if next_message else None
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_next_message_id: {e}")
                 return None
 
     def get_previous_message_id(self, current_message_id, status=None):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
                 query = session.query(UserMessage.id)
                 if status:
                     query = query.filter_by(status=status)
-                prev_message = query.filter(UserMessage.id < current_message_id).first()
+                prev_message = query.filter(UserMessage.id < current_message_id).order_by(UserMessage.id.desc()).first()
                 return prev_message[0] if prev_message else None
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_previous_message_id: {e}")
                 return None
 
+    def get_inbox_page(self, status=None, cursor=None, direction='older', page_size=20):
+        """Return an InboxPage of message previews ordered newest first.
+
+        Keyset pagination on the message id: each page is one index range scan,
+        so its cost does not grow with the size of the inbox.
+        """
+        page_size = max(1, min(page_size, INBOX_MAX_PAGE_SIZE))
+        with self.ReadSession() as session:
+            try:
+                query = session.query(*MESSAGE_PREVIEW_COLUMNS)
+                if status:
+                    query = query.filter(UserMessage.status == status)
+                if direction == 'newer':
+                    if cursor is not None:
+                        query = query.filter(UserMessage.id > cursor)
+                    rows = query.order_by(UserMessage.id).limit(page_size + 1).all()
+                    has_more = len(rows) > page_size
+                    rows = rows[:page_size][::-1]
+                    has_newer, has_older = has_more, cursor is not None
+                else:
+                    if cursor is not None:
+                        query = query.filter(UserMessage.id < cursor)
+                    rows = query.order_by(UserMessage.id.desc()).limit(page_size + 1).all()
+                    has_more = len(rows) > page_size
+                    rows = rows[:page_size]
+                    has_older, has_newer = has_more, cursor is not None
+                previews = tuple(MessagePreview(*row) for row in rows)
+                return InboxPage(
+                    rows=previews,
+                    older_cursor=previews[-1].id if previews else cursor,
+                    newer_cursor=previews[0].id if previews else cursor,
+                    has_older=has_older,
+                    has_newer=has_newer
+                )
+            except SQLAlchemyError as e:
+                logger.error(f"Database error in get_inbox_page: {e}")
+                return InboxPage(rows=(), older_cursor=None, newer_cursor=None, has_older=False, has_newer=False)
+
     # Admin Methods
     def get_recent_registrations(self, limit=10):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
-                registrations = session.query(Registration).order_by(
+                rows = session.query(*REGISTRATION_SUMMARY_COLUMNS).order_by(
                     Registration.registration_date.desc()
                 ).limit(limit).all()
-                return [self._registration_to_tuple(r) for r in registrations]
+                return [RegistrationSummary(*row) for row in rows]
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_recent_registrations: {e}")
                 return []
 
     def get_all_events_admin(self):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
-                events = session.query(Event).order_by(Event.date).all()
-                return [self._event_to_tuple(e) for e in events]
+                rows = session.query(*EVENT_SUMMARY_COLUMNS).order_by(Event.starts_at).all()
+                return [EventSummary(*row) for row in rows]
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_all_events_admin: {e}")
                 return []
 
     def get_unread_messages_count(self):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
                 return session.query(UserMessage).filter_by(status='unread').count()
             except SQLAlchemyError as e:
@@ -322,50 +474,52 @@ class DatabaseManager:
                 return 0
 
     # Helper Methods
-    def _message_to_tuple(self, message):
-        return (message.id, message.user_id, message.user_full_name, message.message_text,
-                message.message_date, message.status, message.admin_reply, message.reply_date,
-                message.replied_by, message.message_type)
-
-    def _registration_to_tuple(self, registration):
-        return (registration.id, registration.user_id, registration.full_name, 
-                registration.student_id, registration.national_id, registration.phone_number,
-                registration.event_name, registration.registration_date, registration.status,
-                registration.notified_admin, 'event')
-
-    def _event_to_tuple(self, event):
-        return (event.id, event.name, event.description, event.date, event.capacity,
-                event.registered_count, event.type, event.active)
+    def _registrations_with_event(self, session):
+        """Registrations joined with their event's details in a single query."""
+        return session.query(*REGISTRATION_DETAILS_COLUMNS).outerjoin(
+            Event, Event.name == Registration.event_name
+        )
+
     # User Profile Methods
     def get_user_registrations(self, user_id):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
-                registrations = session.query(Registration).filter_by(user_id=user_id).order_by(
-                    Registration.registration_date.desc()
-                ).all()
-                result = []
-                for reg in registrations:
-                    reg_tuple = self._registration_to_tuple(reg)
-                    event = self._get_record(session, Event, name=reg.event_name)
-                    event_date = event.date if event else "نامشخص"
-                    event_description = event.description if event else "توضیحات موجود نیست"
-                    event_time = event.time if event else ""
-                    event_location = event.location if event else ""
-                    reg_tuple = reg_tuple + (event_date, event_description, event_time, event_location)
-                    result.append(reg_tuple)
-                return result
+                rows = self._registrations_with_event(session).filter(
+                    Registration.user_id == user_id
+                ).order_by(Registration.registration_date.desc()).all()
+                return [RegistrationDetails(*row) for row in rows]
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_user_registrations: {e}")
                 return []
 
     def get_user_registration_count(self, user_id):
-        with self.Session() as session:
+        with self.ReadSession() as session:
             try:
                 return session.query(Registration).filter_by(user_id=user_id).count()
             except SQLAlchemyError as e:
                 logger.error(f"Database error in get_user_registration_count: {e}")
                 return 0
 
+    def iter_event_registrations(self, event_name, chunk_size=500):
+        """Yield lists of AttendeeRow for an event, at most chunk_size rows at a time.
+
+        Each chunk is a separate keyset query in its own short read transaction,
+        so exports hold neither the whole table in memory nor a long-lived snapshot.
+        """
+        last_id = 0
+        while True:
+            with self.ReadSession() as session:
+                rows = session.query(*ATTENDEE_ROW_COLUMNS).filter(
+                    Registration.event_name == event_name,
+                    Registration.id > last_id
+                ).order_by(Registration.id).limit(chunk_size).all()
+            if not rows:
+                return
+            yield [AttendeeRow(*row) for row in rows]
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
     # Cancel Registration Methods
     def delete_registration(self, registration_id, user_id):
         with self.Session() as session:
@@ -373,11 +527,19 @@ class DatabaseManager:
                 registration = self._get_record(session, Registration, id=registration_id, user_id=user_id)
                 if not registration:
                     raise ValueError("ثبت‌نام یافت نشد یا شما مجوز حذف آن را ندارید.")
-                event = self._get_record(session, Event, name=registration.event_name)
-                if event:
-                    event.registered_count -= 1
-                session.delete(registration)
+                event_name = registration.event_name
+                deleted = session.query(Registration).filter_by(
+                    id=registration_id, user_id=user_id
+                ).delete(synchronize_session=False)
+                if not deleted:
+                    raise ValueError("ثبت‌نام یافت نشد یا شما مجوز حذف آن را ندارید.")
+                session.execute(
+                    update(Event)
+                    .where(Event.name == event_name, Event.registered_count > 0)
+                    .values(registered_count=Event.registered_count - 1)
+                )
                 session.commit()
+                self.catalog.adjust_registered_count(event_name, -1)
                 logger.info(f"Registration deleted: ID {registration_id} by user {user_id}")
                 return True
             except SQLAlchemyError as e:
@@ -385,29 +547,153 @@ class DatabaseManager:
                 logger.error(f"Database error in delete_registration: {e}")
                 raise
     def get_registration_by_id(self, registration_id, user_id):
+        with self.ReadSession() as session:
+            try:
+                row = self._registrations_with_event(session).filter(
+                    Registration.id == registration_id,
+                    Registration.user_id == user_id
+                ).first()
+                return RegistrationDetails(*row) if row else None
+            except SQLAlchemyError as e:
+                logger.error(f"Database error in get_registration_by_id: {e}")
+                return None
 
+    # Broadcast Methods
+    def create_broadcast(self, event_name, message_text, created_by=None):
+        """Create a running broadcast to everyone registered for event_name; return its id."""
         with self.Session() as session:
             try:
-                registration = self._get_record(session, Registration, id=registration_id, user_id=user_id)
-                if not registration:
-                    return None
-                
-                # دریافت اطلاعات کامل رویداد
-                event = self._get_record(session, Event, name=registration.event_name)
-                
-                # ایجاد تاپل با اطلاعات کامل
-                reg_tuple = self._registration_to_tuple(registration)
-                
-                # اضافه کردن اطلاعات رویداد
-                event_date = event.date if event else "نامشخص"
-                event_description = event.description if event else "توضیحات موجود نیست"
-                event_time = event.time if event else ""
-                event_location = event.location if event else ""
-                
-                # برگرداندن تاپل کامل (15 عنصر)
-                return reg_tuple + (event_date, event_description, event_time, event_location)
-                
+                total = session.query(Registration).filter_by(event_name=event_name).count()
+                if not total:
+                    raise ValueError("برای این رویداد ثبت‌نامی یافت نشد")
+                broadcast = Broadcast(
+                    event_name=event_name, message_text=message_text,
+                    total=total, created_by=created_by
+                )
+                session.add(broadcast)
+                session.commit()
+                logger.info(f"Broadcast {broadcast.id} created for {event_name} ({total} recipients)")
+                return broadcast.id
             except SQLAlchemyError as e:
-                logger.error(f"Database error in get_registration_by_id: {e}")
+                session.rollback()
+                logger.error(f"Database error in create_broadcast: {e}")
+                raise
+
+    def get_broadcast(self, broadcast_id):
+        with self.ReadSession() as session:
+            try:
+                row = session.query(*BROADCAST_ROW_COLUMNS).filter(Broadcast.id == broadcast_id).first()
+                return BroadcastRow(*row) if row else None
+            except SQLAlchemyError as e:
+                logger.error(f"Database error in get_broadcast: {e}")
                 return None
 
+    def get_recent_broadcasts(self, limit=5):
+        with self.ReadSession() as session:
+            try:
+                rows = session.query(*BROADCAST_ROW_COLUMNS).order_by(
+                    Broadcast.id.desc()
+                ).limit(limit).all()
+                return [BroadcastRow(*row) for row in rows]
+            except SQLAlchemyError as e:
+                logger.error(f"Database error in get_recent_broadcasts: {e}")
+                return []
+
+    def get_broadcast_recipients(self, event_name, after_registration_id=0, limit=100):
+        """Next batch of recipients after the checkpoint, in registration id order."""
+        with self.ReadSession() as session:
+            try:
+                rows = session.query(Registration.id, Registration.user_id).filter(
+                    Registration.event_name == event_name,
+                    Registration.id > after_registration_id
+                ).order_by(Registration.id).limit(limit).all()
+                return [BroadcastRecipient(*row) for row in rows]
+            except SQLAlchemyError as e:
+                logger.error(f"Database error in get_broadcast_recipients: {e}")
+                raise
+
+    def checkpoint_broadcast(self, broadcast_id, last_registration_id, delivered=0, failed=0, blocked=0):
+        """Record a sent batch; return False if the broadcast is no longer running."""
+        with self.Session() as session:
+            try:
+                updated = session.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id == broadcast_id, Broadcast.status == 'running')
+                    .values(
+                        last_registration_id=last_registration_id,
+                        delivered=Broadcast.delivered + delivered,
+                        failed=Broadcast.failed + failed,
+                        blocked=Broadcast.blocked + blocked,
+                        heartbeat_at=datetime.utcnow()
+                    )
+                ).rowcount
+                session.commit()
+                return bool(updated)
+            except SQLAlchemyError as e:
+                session.rollback()
+                logger.error(f"Database error in checkpoint_broadcast: {e}")
+                raise
+
+    def finish_broadcast(self, broadcast_id, status='completed'):
+        """Move a running broadcast to completed or cancelled; return False if it was not running."""
+        with self.Session() as session:
+            try:
+                updated = session.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id == broadcast_id, Broadcast.status == 'running')
+                    .values(status=status, finished_at=datetime.utcnow())
+                ).rowcount
+                session.commit()
+                return bool(updated)
+            except SQLAlchemyError as e:
+                session.rollback()
+                logger.error(f"Database error in finish_broadcast: {e}")
+                raise
+
+    def claim_stale_broadcasts(self, lease_seconds):
+        """Take over running broadcasts whose sender stopped checkpointing.
+
+        A broadcast is stale once its heartbeat is older than lease_seconds, or
+        was cleared by release_broadcasts on a clean shutdown. The heartbeat is
+        bumped in the same conditional update, so only one process claims each
+        broadcast.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+        with self.Session() as session:
+            try:
+                stale = [row[0] for row in session.query(Broadcast.id).filter(
+                    Broadcast.status == 'running',
+                    or_(Broadcast.heartbeat_at.is_(None), Broadcast.heartbeat_at < cutoff)
+                ).all()]
+                claimed = []
+                for broadcast_id in stale:
+                    if session.execute(
+                        update(Broadcast)
+                        .where(
+                            Broadcast.id == broadcast_id,
+                            Broadcast.status == 'running',
+                            or_(Broadcast.heartbeat_at.is_(None), Broadcast.heartbeat_at < cutoff)
+                        )
+                        .values(heartbeat_at=datetime.utcnow())
+                    ).rowcount:
+                        claimed.append(broadcast_id)
+                session.commit()
+                return claimed
+            except SQLAlchemyError as e:
+                session.rollback()
+                logger.error(f"Database error in claim_stale_broadcasts: {e}")
+                return []
+
+    def release_broadcasts(self, broadcast_ids):
+        """Clear the heartbeat of running broadcasts so the next process resumes them at once."""
+        with self.Session() as session:
+            try:
+                session.execute(
+                    update(Broadcast)
+                    .where(Broadcast.id.in_(broadcast_ids), Broadcast.status == 'running')
+                    .values(heartbeat_at=None)
+                )
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                logger.error(f"Database error in release_broadcasts: {e}")
@@ -0,0 +1,137 @@
+# database/migrations.py
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import jdatetime
+from sqlalchemy import inspect, text, select, func, insert
+from sqlalchemy.exc import IntegrityError
+from .models import Base, SchemaMigration
+import logging
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'description', 'upgrade'])
+
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register a schema upgrade step applied in place to existing databases.
+
+    Steps are frozen once released: never edit one, add a new version instead.
+    They must not rely on the current models, since those keep changing.
+    """
+    def decorator(upgrade):
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        return upgrade
+    return decorator
+
+def has_column(connection, table, column):
+    """Return True if table already has column."""
+    return any(c['name'] == column for c in inspect(connection).get_columns(table))
+
+def get_schema_version(connection):
+    """Return the highest applied migration version (0 for an unversioned database)."""
+    return connection.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+
+def _record(connection, step):
+    connection.execute(insert(SchemaMigration).values(
+        version=step.version, description=step.description, applied_at=datetime.utcnow()
+    ))
+
+def run_migrations(engine):
+    """Bring the database schema up to date.
+
+    A brand-new database is created from the models and stamped with the latest
+    version; an existing one gets every pending migration, each in its own
+    transaction.
+    """
+    fresh = not inspect(engine).has_table('events')
+    Base.metadata.create_all(engine)
+    steps = sorted(MIGRATIONS, key=lambda step: step.version)
+
+    with engine.begin() as connection:
+        current = get_schema_version(connection)
+        if fresh:
+            for step in steps:
+                _record(connection, step)
+            logger.info(f"New database created at schema version {steps[-1].version if steps else 0}")
+            return
+
+    for step in steps:
+        if step.version <= current:
+            continue
+        try:
+            with engine.begin() as connection:
+                step.upgrade(connection)
+                _record(connection, step)
+        except IntegrityError:
+            # another process applied the same step first
+            logger.info(f"Migration {step.version} already applied by another process")
+            continue
+        logger.info(f"Applied migration {step.version}: {step.description}")
+
+@migration(1, 'unique (user_id, event_name) on registrations')
+def _unique_registration_per_event(connection):
+    # ثبت‌نام‌های تکراری مسیر قدیمی حذف و شمارنده‌ها از نو محاسبه می‌شوند
+    connection.execute(text(
+        "DELETE FROM registrations WHERE id NOT IN "
+        "(SELECT MIN(id) FROM registrations GROUP BY user_id, event_name)"
+    ))
+    connection.execute(text(
+        "UPDATE events SET registered_count = "
+        "(SELECT COUNT(*) FROM registrations WHERE registrations.event_name = events.name)"
+    ))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_registrations_user_event "
+        "ON registrations (user_id, event_name)"
+    ))
+
+@migration(2, 'indexes for registration, event and inbox queries')
+def _hot_path_indexes(connection):
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_registrations_user_date ON registrations (user_id, registration_date)",
+        "CREATE INDEX IF NOT EXISTS ix_registrations_event_name ON registrations (event_name)",
+        "CREATE INDEX IF NOT EXISTS ix_registrations_date ON registrations (registration_date)",
+        "CREATE INDEX IF NOT EXISTS ix_events_active_type_date ON events (active, type, date)",
+        "CREATE INDEX IF NOT EXISTS ix_events_date ON events (date)",
+        "CREATE INDEX IF NOT EXISTS ix_user_messages_user_date ON user_messages (user_id, message_date)",
+        "CREATE INDEX IF NOT EXISTS ix_user_messages_status_date ON user_messages (status, message_date)",
+        "CREATE INDEX IF NOT EXISTS ix_user_messages_date ON user_messages (message_date)",
+    ):
+        connection.execute(text(statement))
+
+@migration(3, 'keyset index for the admin inbox')
+def _inbox_keyset_index(connection):
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_messages_status_id ON user_messages (status, id)"
+    ))
+
+@migration(4, 'events.starts_at timestamp replacing the Jalali date and time text')
+def _event_start_times(connection):
+    if not has_column(connection, 'events', 'starts_at'):
+        connection.execute(text("ALTER TABLE events ADD COLUMN starts_at DATETIME"))
+    # متن‌های قبلی به وقت ایران وارد شده‌اند؛ ستون‌های date و time برای بازگشت دست نمی‌خورند
+    tehran = ZoneInfo('Asia/Tehran')
+    digits = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '0123456789' * 2)
+    rows = connection.execute(text("SELECT id, date, time FROM events WHERE starts_at IS NULL")).all()
+    for event_id, date_text, time_text in rows:
+        date_match = re.fullmatch(r'(\d{4})\s*[/.-]\s*(\d{1,2})\s*[/.-]\s*(\d{1,2})', (date_text or '').translate(digits).strip())
+        time_match = re.match(r'(\d{1,2})\s*:\s*(\d{2})', (time_text or '').translate(digits).strip())
+        try:
+            day = jdatetime.date(*map(int, date_match.groups())).togregorian()
+            hour, minute = map(int, time_match.groups()) if time_match else (0, 0)
+            local = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tehran)
+        except (AttributeError, ValueError):
+            logger.warning(f"Event {event_id} has an unreadable date {date_text!r} {time_text!r}; starts_at left empty")
+            continue
+        starts_at = local.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')
+        connection.execute(text("UPDATE events SET starts_at = :starts_at WHERE id = :id"),
+                           {'starts_at': starts_at, 'id': event_id})
+    for statement in (
+        "DROP INDEX IF EXISTS ix_events_active_type_date",
+        "DROP INDEX IF EXISTS ix_events_date",
+        "CREATE INDEX IF NOT EXISTS ix_events_active_starts_at ON events (active, starts_at)",
+        "CREATE INDEX IF NOT EXISTS ix_events_starts_at ON events (starts_at)",
+    ):
+        connection.execute(text(statement))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -6,6 +6,13 @@ Base = declarative_base()
 
 class Registration(Base):
     __tablename__ = 'registrations'
+    __table_args__ = (
+        # هر کاربر فقط یک بار در هر رویداد
+        Index('uq_registrations_user_event', 'user_id', 'event_name', unique=True),
+        Index('ix_registrations_user_date', 'user_id', 'registration_date'),
+        Index('ix_registrations_event_name', 'event_name'),
+        Index('ix_registrations_date', 'registration_date'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
@@ -20,12 +27,16 @@ class Registration(Base):
 
 class Event(Base):
     __tablename__ = 'events'
+    __table_args__ = (
+        # رویدادهای پیش‌رو با یک جست‌وجوی بازه‌ای روی این نمایه خوانده می‌شوند
+        Index('ix_events_active_starts_at', 'active', 'starts_at'),
+        Index('ix_events_starts_at', 'starts_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False, unique=True)
     description = Column(Text)
-    date = Column(String(10))
-    time = Column(String(10))  # زمان برگزاری
+    starts_at = Column(DateTime)  # زمان برگزاری به UTC؛ تاریخ شمسی فقط هنگام نمایش ساخته می‌شود
     location = Column(String(100))  # محل برگزاری
     capacity = Column(Integer)
     type = Column(String(20), default='event')
@@ -34,6 +45,12 @@ class Event(Base):
 
 class UserMessage(Base):
     __tablename__ = 'user_messages'
+    __table_args__ = (
+        Index('ix_user_messages_user_date', 'user_id', 'message_date'),
+        Index('ix_user_messages_status_date', 'status', 'message_date'),
+        Index('ix_user_messages_date', 'message_date'),
+        Index('ix_user_messages_status_id', 'status', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
@@ -45,3 +62,64 @@ class UserMessage(Base):
     reply_date = Column(DateTime)
     replied_by = Column(Integer)
     message_type = Column(String(20), default='contact')
+
+class SchemaMigration(Base):
+    __tablename__ = 'schema_migrations'
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String(200))
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+class RateLimitCounter(Base):
+    __tablename__ = 'rate_limits'
+    __table_args__ = (
+        Index('ix_rate_limits_updated_at', 'updated_at'),
+    )
+
+    key = Column(String(100), primary_key=True)  # action:user_id
+    window_index = Column(Integer, nullable=False)
+    current_count = Column(Integer, nullable=False, default=0)
+    previous_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(Float, nullable=False)  # epoch seconds
+
+class Broadcast(Base):
+    __tablename__ = 'broadcasts'
+    __table_args__ = (
+        Index('ix_broadcasts_status_heartbeat', 'status', 'heartbeat_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_name = Column(String(100), nullable=False)
+    message_text = Column(Text, nullable=False)
+    status = Column(String(20), default='running')  # running / completed / cancelled
+    last_registration_id = Column(Integer, nullable=False, default=0)  # آخرین ثبت‌نام ارسال‌شده
+    total = Column(Integer, nullable=False, default=0)
+    delivered = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    blocked = Column(Integer, nullable=False, default=0)
+    created_by = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+class ConversationState(Base):
+    __tablename__ = 'conversation_states'
+    __table_args__ = (
+        Index('ix_conversation_states_updated_at', 'updated_at'),
+    )
+
+    name = Column(String(50), primary_key=True)  # نام ConversationHandler
+    key = Column(String(100), primary_key=True)  # کلید گفتگو به صورت JSON
+    state = Column(Text, nullable=False)  # وضعیت به صورت JSON
+    updated_at = Column(Float, nullable=False)  # epoch seconds
+
+class UserDataEntry(Base):
+    __tablename__ = 'user_data'
+    __table_args__ = (
+        Index('ix_user_data_updated_at', 'updated_at'),
+    )
+
+    user_id = Column(Integer, primary_key=True)
+    key = Column(String(100), primary_key=True)  # یک کلید از context.user_data
+    value = Column(LargeBinary, nullable=False)  # مقدار pickle‌شده
+    updated_at = Column(Float, nullable=False)  # epoch seconds
@@ -0,0 +1,133 @@
+# database/query_plans.py
+"""EXPLAIN QUERY PLAN check for DatabaseManager.
+
+Runs every query method of DatabaseManager against a scratch database, captures
+the SQL it actually sends to SQLite and asks SQLite how it would execute each
+statement. Any full table scan that is not explicitly allowed is reported.
+
+    python -m database.query_plans
+"""
+import inspect
+import sys
+import tempfile
+from pathlib import Path
+from .instrumentation import QueryCounter, manager_engines
+
+# Calls made against the scratch database; keep in sync with DatabaseManager.
+PLANNED_CALLS = [
+    ('add_registration', (1, 'علی احمدی', '12345678', '0012345678', '09123456789', 'کارگاه تست ۱')),
+    ('get_events', ()),
+    ('get_events', ('workshop',)),
+    ('is_user_registered_for_event', (1, 'کارگاه تست ۱')),
+    ('add_event', ('رویداد بررسی', 'plan check', '۱۴۰۴/۱۲/۰۱', 5)),
+    ('update_event', (1, ), {'description': 'updated', 'capacity': 20}),
+    ('toggle_event', (2,)),
+    ('toggle_event', (2,)),
+    ('close_due_events', (60,)),
+    ('add_user_message', (1, 'علی احمدی', 'پیام آزمایشی')),
+    ('get_user_messages_today', (1,)),
+    ('get_all_messages', ()),
+    ('get_all_messages', ('unread', 10)),
+    ('get_message_by_id', (1,)),
+    ('mark_message_as_read', (1, 99)),
+    ('add_admin_reply', (1, 99, 'پاسخ')),
+    ('get_next_message_id', (1,)),
+    ('get_previous_message_id', (1, 'replied')),
+    ('get_inbox_page', ()),
+    ('get_inbox_page', ('unread', 5, 'older', 10)),
+    ('get_inbox_page', ('unread', 5, 'newer', 10)),
+    ('get_inbox_page', (None, 5, 'newer')),
+    ('get_recent_registrations', ()),
+    ('get_all_events_admin', ()),
+    ('get_unread_messages_count', ()),
+    ('get_user_registrations', (1,)),
+    ('get_user_registration_count', (1,)),
+    ('get_registration_by_id', (1, 1)),
+    ('iter_event_registrations', ('کارگاه تست ۱',)),
+    ('create_broadcast', ('کارگاه تست ۱', 'اطلاعیه', 99)),
+    ('get_broadcast', (1,)),
+    ('get_recent_broadcasts', ()),
+    ('get_broadcast_recipients', ('کارگاه تست ۱', 0, 100)),
+    ('checkpoint_broadcast', (1, 1, 1, 0, 0)),
+    ('release_broadcasts', ([1],)),
+    ('claim_stale_broadcasts', (300,)),
+    ('finish_broadcast', (1,)),
+    ('delete_registration', (1, 1)),
+    ('delete_message', (1,)),
+    ('delete_event', (4,)),
+]
+
+# Statements allowed to scan a whole table, matched by substring of the
+# whitespace-normalised SQL.
+ALLOWED_SCANS = [
+    # startup check for sample data, runs once per process
+    'SELECT count(*) AS count_1 FROM (SELECT events.',
+    # newest-first inbox page: walks the rowid b-tree backwards and stops at LIMIT
+    'FROM user_messages ORDER BY user_messages.id DESC LIMIT',
+    'FROM broadcasts ORDER BY broadcasts.id DESC LIMIT',
+    # schema bookkeeping
+    'schema_migrations',
+]
+
+def capture_statements(manager):
+    """Run PLANNED_CALLS on manager and return the distinct (sql, params) it executed."""
+    with QueryCounter(*manager_engines(manager)) as counter:
+        for call in PLANNED_CALLS:
+            name, args = call[0], call[1]
+            kwargs = call[2] if len(call) > 2 else {}
+            try:
+                result = getattr(manager, name)(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    list(result)
+            except ValueError:
+                pass
+    statements = {}
+    for statement, parameters in counter.statements:
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.setdefault(statement, parameters)
+    return list(statements.items())
+
+def explain(engine, statement, parameters):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+def uses_index(plan):
+    """True unless the plan scans a table without an index."""
+    for detail in plan:
+        if detail.startswith('SCAN') and 'USING' not in detail and 'CONSTANT ROW' not in detail:
+            return False
+    return True
+
+def check_query_plans(manager):
+    """Return (statement, plan, ok) for every statement DatabaseManager issues."""
+    results = []
+    for statement, parameters in capture_statements(manager):
+        plan = explain(manager.read_engine, statement, parameters)
+        normalised = ' '.join(statement.split())
+        allowed = any(marker in normalised for marker in ALLOWED_SCANS)
+        results.append((statement, plan, allowed or uses_index(plan)))
+    return results
+
+def main():
+    from .manager import DatabaseManager
+
+    manager = DatabaseManager(db_path=str(Path(tempfile.mkdtemp()) / 'plans.db'))
+    results = check_query_plans(manager)
+    failures = 0
+    for statement, plan, ok in results:
+        if not ok:
+            failures += 1
+        print(f"{'OK  ' if ok else 'SCAN'} {' '.join(statement.split())[:110]}")
+        for detail in plan:
+            print(f"       {detail}")
+    print(f"\n{len(results)} statements checked, {failures} without an index")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
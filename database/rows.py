@@ -0,0 +1,126 @@
+# database/rows.py
+"""Immutable, slotted row types returned by DatabaseManager.
+
+Each type carries only the columns its screen needs and is built straight from
+a column query, without hydrating ORM objects.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+@dataclass(frozen=True, slots=True)
+class EventRow:
+    """Upcoming event as shown in listings and the registration keyboard."""
+    name: str
+    description: Optional[str]
+    starts_at: Optional[datetime]
+    capacity: Optional[int]
+    registered_count: int
+    location: Optional[str]
+
+@dataclass(frozen=True, slots=True)
+class EventSummary:
+    """Admin event list row (description deferred)."""
+    id: int
+    name: str
+    starts_at: Optional[datetime]
+    capacity: Optional[int]
+    registered_count: int
+    type: str
+    active: bool
+
+@dataclass(frozen=True, slots=True)
+class RegistrationDetails:
+    """A user's registration with the event details the profile screens show."""
+    id: int
+    event_name: str
+    full_name: str
+    student_id: str
+    phone_number: str
+    registration_date: Optional[datetime]
+    event_starts_at: Optional[datetime]
+    event_description: str
+    event_location: str
+
+@dataclass(frozen=True, slots=True)
+class RegistrationSummary:
+    """Admin list row for recent registrations."""
+    id: int
+    user_id: int
+    full_name: str
+    student_id: str
+    phone_number: str
+    event_name: str
+    registration_date: Optional[datetime]
+    status: str
+
+@dataclass(frozen=True, slots=True)
+class AttendeeRow:
+    """Attendee sheet row for registration exports."""
+    id: int
+    full_name: str
+    student_id: str
+    national_id: str
+    phone_number: str
+    registration_date: Optional[datetime]
+    status: str
+
+@dataclass(frozen=True, slots=True)
+class MessageRow:
+    """A single user message with the admin reply."""
+    id: int
+    user_id: int
+    user_full_name: Optional[str]
+    message_text: str
+    message_date: Optional[datetime]
+    status: str
+    admin_reply: Optional[str]
+    reply_date: Optional[datetime]
+    replied_by: Optional[int]
+    message_type: str
+
+@dataclass(frozen=True, slots=True)
+class MessagePreview:
+    """Inbox list row: everything but the full message text and reply."""
+    id: int
+    user_id: int
+    user_full_name: Optional[str]
+    preview: str
+    message_date: Optional[datetime]
+    status: str
+    message_type: str
+
+@dataclass(frozen=True, slots=True)
+class InboxPage:
+    """One page of the admin inbox, newest first.
+
+    Pass ``older_cursor`` back as ``cursor`` with direction 'older' for the next
+    page, or ``newer_cursor`` with direction 'newer' to go back.
+    """
+    rows: tuple
+    older_cursor: Optional[int]
+    newer_cursor: Optional[int]
+    has_older: bool
+    has_newer: bool
+
+@dataclass(frozen=True, slots=True)
+class BroadcastRow:
+    """A broadcast with its resume point and delivery counters."""
+    id: int
+    event_name: str
+    message_text: str
+    status: str
+    last_registration_id: int
+    total: int
+    delivered: int
+    failed: int
+    blocked: int
+    created_by: Optional[int]
+    created_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+@dataclass(frozen=True, slots=True)
+class BroadcastRecipient:
+    """One broadcast recipient, keyed by registration id for resuming."""
+    registration_id: int
+    user_id: int
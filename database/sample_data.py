@@ -1,5 +1,11 @@
 # database/sample_data.py
+from datetime import timedelta
 from .models import Event
+from .dates import local_day_start
+
+def _days_ahead(days, hour, minute=0):
+    """UTC start of a sample event held days from today at hour:minute local time."""
+    return local_day_start(days) + timedelta(hours=hour, minutes=minute)
 
 def get_sample_events():
     """Return sample events data for database initialization"""
@@ -7,8 +13,7 @@ def get_sample_events():
         Event(
             name='کارگاه تست ۱',
             description='آموزش عملی دستگاه CNC',
-            date='۱۴۰۴/۱۰/۱۵',
-            time='10:00',  # Ensure correct time
+            starts_at=_days_ahead(30, 10),
             location='سالن شماره ۲',  # Ensure correct location
             capacity=10,
             type='workshop'
@@ -16,8 +21,7 @@ def get_sample_events():
         Event(
             name='رویداد تست ۱',
             description='بررسی آخرین تکنولوژی‌های صنعتی',
-            date='۱۴۰۴/۱۰/۲۰',
-            time='09:30',  # Ensure correct time
+            starts_at=_days_ahead(35, 9, 30),
             location='سالن اجتماعات',  # Ensure correct location
             capacity=12,
             type='event'
@@ -25,8 +29,7 @@ def get_sample_events():
         Event(
             name='رویداد تست ۲',
             description='بازدید از خط تولید یک کارخانه',
-            date='۱۴۰۴/۱۰/۲۵',
-            time='08:00',  # Ensure correct time
+            starts_at=_days_ahead(40, 8),
             location='کارخانه صنعتی البرز',  # Ensure correct location
             capacity=10,
             type='event'
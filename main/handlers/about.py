@@ -1,27 +1,26 @@
 from telegram import Update
-from main.utils.markdown import escape_markdown
+from main.utils.templates import compile_template
 from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+ABOUT_MESSAGE = compile_template(
+    "📖 *درباره {society}*\n\n"
+    "انجمن علمی مهندسی ساخت و تولید با هدف ارتقای سطح علمی و مهارتی دانشجویان فعالیت می‌کند.\n\n"
+    "🎯 *اهداف:*\n"
+    "• برگزاری کارگاه‌های آموزشی\n"
+    "• سازماندهی سمینارها و همایش‌ها\n"
+    "• ارتباط با صنعت\n"
+    "• پشتیبانی از پروژه‌های دانشجویی\n\n"
+    "🏛 {university}\n\n"
+    "📢 *کانال ما:* {channel}",
+    society=Config.SOCIETY_NAME, university=Config.UNIVERSITY, channel=Config.CHANNEL_USERNAME
+)
+
 def create_about_message():
     """Create the about message with escaped values."""
-    society_name_escaped = escape_markdown(Config.SOCIETY_NAME)
-    university_escaped = escape_markdown(Config.UNIVERSITY)
-    channel_username_escaped = escape_markdown(Config.CHANNEL_USERNAME)
-
-    return (
-        f"📖 *درباره {society_name_escaped}*\n\n"
-        f"انجمن علمی مهندسی ساخت و تولید با هدف ارتقای سطح علمی و مهارتی دانشجویان فعالیت می‌کند\\.\n\n"
-        f"🎯 *اهداف:*\n"
-        f"• برگزاری کارگاه‌های آموزشی\ن"
-        f"• سازماندهی سمینارها و همایش‌ها\ن"
-        f"• ارتباط با صنعت\ن"
-        f"• پشتیبانی از پروژه‌های دانشجویی\ن\n"
-        f"🏛 {university_escaped}\n\n"
-        f"📢 *کانال ما:* {channel_username_escaped}"
-    )
+    return ABOUT_MESSAGE.render()
 
 async def about_command(update: Update, context):
     """Handle about command."""
@@ -0,0 +1,78 @@
+from telegram import Update
+from telegram.ext import CommandHandler
+from main.utils.broadcast import broadcast_engine, format_broadcast_summary
+from database import async_db
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_USAGE = (
+    "⚠️ استفاده:\n"
+    "/broadcast نام رویداد\n"
+    "متن پیام (از خط دوم به بعد)"
+)
+
+async def broadcast_command(update: Update, context):
+    """Message everyone registered for an event: first line names the event, the rest is the text."""
+    if update.effective_user.id not in Config.ADMIN_CHAT_IDS:
+        return
+
+    first_line, _, message_text = update.message.text.partition('\n')
+    event_name = first_line.partition(' ')[2].strip()
+    message_text = message_text.strip()
+    if not event_name or not message_text:
+        await update.message.reply_text(BROADCAST_USAGE)
+        return
+
+    try:
+        broadcast_id = await async_db.create_broadcast(event_name, message_text, update.effective_user.id)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    except Exception as e:
+        logger.error(f"Error creating broadcast for {event_name}: {e}")
+        await update.message.reply_text("❌ خطا در ایجاد پیام گروهی. لطفاً بعداً تلاش کنید.")
+        return
+
+    broadcast_engine.start(context.bot, broadcast_id)
+    broadcast = await async_db.get_broadcast(broadcast_id)
+    await update.message.reply_text(
+        f"📣 ارسال پیام به {broadcast.total} ثبت‌نام‌کننده آغاز شد.\n"
+        f"پیگیری: /broadcast_status {broadcast_id}\n"
+        f"لغو: /broadcast_cancel {broadcast_id}"
+    )
+
+async def broadcast_status_command(update: Update, context):
+    """Show progress of one broadcast, or of the most recent ones."""
+    if update.effective_user.id not in Config.ADMIN_CHAT_IDS:
+        return
+
+    if context.args and context.args[0].isdigit():
+        broadcast = await async_db.get_broadcast(int(context.args[0]))
+        broadcasts = [broadcast] if broadcast else []
+    else:
+        broadcasts = await async_db.get_recent_broadcasts()
+    if not broadcasts:
+        await update.message.reply_text("📭 پیام گروهی یافت نشد.")
+        return
+    await update.message.reply_text('\n\n'.join(format_broadcast_summary(b) for b in broadcasts))
+
+async def broadcast_cancel_command(update: Update, context):
+    """Stop a running broadcast after its current batch."""
+    if update.effective_user.id not in Config.ADMIN_CHAT_IDS:
+        return
+
+    if not context.args or not context.args[0].isdigit():
+        await update.message.reply_text("⚠️ استفاده: /broadcast_cancel شناسه")
+        return
+    if await async_db.finish_broadcast(int(context.args[0]), status='cancelled'):
+        await update.message.reply_text("⛔ ارسال پس از دسته جاری متوقف می‌شود.")
+    else:
+        await update.message.reply_text("⚠️ این پیام گروهی در حال ارسال نیست.")
+
+def register_broadcast_handler(app):
+    """Register the organiser broadcast commands."""
+    app.add_handler(CommandHandler("broadcast", broadcast_command))
+    app.add_handler(CommandHandler("broadcast_status", broadcast_status_command))
+    app.add_handler(CommandHandler("broadcast_cancel", broadcast_cancel_command))
@@ -0,0 +1,46 @@
+from telegram import Update
+from telegram.ext import CommandHandler
+from main.utils.export import export_event_registrations
+from database import async_db
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def export_command(update: Update, context):
+    """Send an event's attendee list as CSV or PDF: /export [csv|pdf] <event name>."""
+    if update.effective_user.id not in Config.ADMIN_CHAT_IDS:
+        return
+
+    args = list(context.args)
+    fmt = 'csv'
+    if args and args[0].lower() in ('csv', 'pdf'):
+        fmt = args.pop(0).lower()
+    event_name = ' '.join(args).strip()
+    if not event_name:
+        await update.message.reply_text("⚠️ استفاده: /export [csv|pdf] نام رویداد")
+        return
+
+    try:
+        fileobj, filename, count = await async_db.run(
+            export_event_registrations, async_db.manager, event_name, fmt
+        )
+    except Exception as e:
+        logger.error(f"Error exporting registrations for {event_name}: {e}")
+        await update.message.reply_text("❌ خطا در تهیه خروجی. لطفاً بعداً تلاش کنید.")
+        return
+
+    with fileobj:
+        if not count:
+            await update.message.reply_text("📭 برای این رویداد ثبت‌نامی یافت نشد.")
+            return
+        await context.bot.send_document(
+            chat_id=update.effective_chat.id,
+            document=fileobj,
+            filename=filename,
+            caption=f"📋 {event_name} - {count} ثبت‌نام"
+        )
+
+def register_export_handler(app):
+    """Register the organiser export command."""
+    app.add_handler(CommandHandler("export", export_command))
@@ -1,10 +1,10 @@
 from telegram.ext import ConversationHandler, MessageHandler, filters, CallbackQueryHandler, CommandHandler
 from telegram import Update, ReplyKeyboardRemove
-from main.utils.validators import validate_message_text
-from main.utils.markdown import escape_markdown
+from main.utils.validators import check_message_text
+from main.utils.templates import compile_template
 from main.utils.keyboards import create_main_keyboard
-from main.middleware.channel_verify import membership_middleware
-from database import db
+from main.middleware.channel_verify import membership_middleware, check_channel_membership
+from database import async_db
 from config import Config
 import logging
 import traceback
@@ -14,28 +14,55 @@ logger = logging.getLogger(__name__)
 # Conversation states
 ENTERING_MESSAGE = 0
 
+# Message templates
+DAILY_LIMIT_MESSAGE = compile_template(
+    "⚠️ *شما امروز پیام خود را ارسال کرده‌اید.*\n"
+    "لطفاً فردا مجدداً تلاش کنید.\n\n"
+    "با تشکر از صبر و شکیبایی شما 🙏"
+).render()
+CONTACT_PROMPT_MESSAGE = compile_template(
+    "💬 *تماس با مدیر*\n\n"
+    "لطفاً پیام خود را برای مدیران انجمن ارسال کنید.\n"
+    "⚠️ توجه: هر کاربر تنها می‌تواند ۱ پیام در روز ارسال کند.\n\n"
+    "پیام شما در اسرع وقت بررسی و پاسخ داده خواهد شد.\n\n"
+    "برای لغو دستور /cancel را وارد کنید."
+).render()
+MESSAGE_SENT_MESSAGE = compile_template(
+    "✅ *پیام شما با موفقیت ارسال شد!*\n\n"
+    "📋 کد پیگیری: #{message_id}\n"
+    "📝 پیام شما: {message_text}\n\n"
+    "با تشکر از ارتباط شما 🙏"
+)
+MEMBERSHIP_CONFIRMED_MESSAGE = compile_template(
+    "🎉 *تبریک! عضویت شما تایید شد!*\n\n"
+    "اکنون می‌توانید از تمام امکانات ربات استفاده کنید.\n\n"
+    "لطفاً از منوی زیر انتخاب کنید:"
+).render()
+NOT_A_MEMBER_MESSAGE = compile_template(
+    "❌ *متأسفانه هنوز در کانال عضو نیستید.*\n\n"
+    "لطفاً مراحل زیر را انجام دهید:\n"
+    "1. روی دکمه '✨ عضویت در کانال' کلیک کنید\n"
+    "2. در کانال عضو شوید\n"
+    "3. سپس روی '✅ تایید عضویت' کلیک کنید\n\n"
+    "پس از عضویت، امکانات ویژه ربات برای شما فعال خواهد شد."
+).render()
+
 async def start_contact(update: Update, context):
     """Start the contact process with daily message limit and channel membership check."""
     async def handler(update, context):
         user_id = update.effective_user.id
         try:
-            messages_today = db.get_user_messages_today(user_id)
+            messages_today = await async_db.get_user_messages_today(user_id)
             if messages_today >= Config.MAX_MESSAGES_PER_DAY:  # مقدار از تنظیمات خوانده شود
                 await update.message.reply_text(
-                    f"⚠️ *شما امروز پیام خود را ارسال کرده‌اید\\.*\n"
-                    f"لطفاً فردا مجدداً تلاش کنید\\.\n\n"
-                    f"با تشکر از صبر و شکیبایی شما 🙏",
+                    DAILY_LIMIT_MESSAGE,
                     reply_markup=create_main_keyboard(),
                     parse_mode='MarkdownV2'
                 )
                 return ConversationHandler.END
 
             await update.message.reply_text(
-                "💬 *تماس با مدیر*\n\n"
-                f"لطفاً پیام خود را برای مدیران انجمن ارسال کنید\\.\n"
-                f"⚠️ توجه: هر کاربر تنها می‌تواند ۱ پیام در روز ارسال کند\\.\n\n"
-                f"پیام شما در اسرع وقت بررسی و پاسخ داده خواهد شد\\.\n\n"
-                f"برای لغو دستور /cancel را وارد کنید\\.",
+                CONTACT_PROMPT_MESSAGE,
                 reply_markup=ReplyKeyboardRemove(),
                 parse_mode='MarkdownV2'
             )
@@ -53,8 +80,9 @@ async def start_contact(update: Update, context):
 async def handle_user_message(update: Update, context):
     """Handle and store user message."""
     try:
-        message_text = update.message.text
-        if not validate_message_text(message_text):
+        # ارقام پیام همان‌طور که کاربر نوشته می‌مانند
+        message_text, error = check_message_text(update.message.text)
+        if error:
             await update.message.reply_text(
                 "⚠️ پیام باید حداقل 5 حرف باشد. لطفاً پیام معتبرتری ارسال کنید:",
                 reply_markup=ReplyKeyboardRemove()
@@ -62,7 +90,7 @@ async def handle_user_message(update: Update, context):
             return ENTERING_MESSAGE
 
         user_id = update.effective_user.id
-        messages_today = db.get_user_messages_today(user_id)
+        messages_today = await async_db.get_user_messages_today(user_id)
         if messages_today >= Config.MAX_MESSAGES_PER_DAY:
             await update.message.reply_text(
                 f"⚠️ شما امروز پیام خود را ارسال کرده‌اید.\n"
@@ -73,7 +101,7 @@ async def handle_user_message(update: Update, context):
 
         user = update.effective_user
         try:
-            message_id = db.add_user_message(
+            message_id = await async_db.add_user_message(
                 user_id=user.id,
                 user_full_name=user.full_name,
                 message_text=message_text
@@ -87,12 +115,8 @@ async def handle_user_message(update: Update, context):
             )
             return ConversationHandler.END
 
-        message_text_escaped = escape_markdown(message_text)
         await update.message.reply_text(
-            f"✅ *پیام شما با موفقیت ارسال شد\\!*\n\n"
-            f"📋 کد پیگیری: \\#{message_id}\n"
-            f"📝 پیام شما: {message_text_escaped}\n\n"
-            f"با تشکر از ارتباط شما 🙏",
+            MESSAGE_SENT_MESSAGE.render(message_id=message_id, message_text=message_text),
             reply_markup=create_main_keyboard(),
             parse_mode='MarkdownV2'
         )
@@ -120,27 +144,19 @@ async def check_membership_callback(update: Update, context):
     await query.answer()
 
     user_id = query.from_user.id
-    is_member = await context.bot.get_chat_member(chat_id=Config.CHANNEL_ID, user_id=user_id)
-    is_member = is_member.status in ['member', 'administrator', 'creator']
+    is_member = await check_channel_membership(user_id, context.bot, refresh=True)
 
     if is_member:
         # Remove the inline keyboard completely for the success message
         await query.edit_message_text(
-            "🎉 *تبریک\\! عضویت شما تایید شد\\!*\n\n"
-            "اکنون می‌توانید از تمام امکانات ربات استفاده کنید\\.\n\n"
-            "لطفاً از منوی زیر انتخاب کنید:",
+            MEMBERSHIP_CONFIRMED_MESSAGE,
             reply_markup=None,
             parse_mode='MarkdownV2'
         )
     else:
         from main.middleware.channel_verify import create_membership_keyboard
         await query.edit_message_text(
-            "❌ *متأسفانه هنوز در کانال عضو نیستید\\.*\n\n"
-            "لطفاً مراحل زیر را انجام دهید:\n"
-            "1\\. روی دکمه '✨ عضویت در کانال' کلیک کنید\n"
-            "2\\. در کانال عضو شوید\n"
-            "3\\. سپس روی '✅ تایید عضویت' کلیک کنید\n\n"
-            "پس از عضویت، امکانات ویژه ربات برای شما فعال خواهد شد\\.",
+            NOT_A_MEMBER_MESSAGE,
             reply_markup=create_membership_keyboard(),
             parse_mode='MarkdownV2'
         )
@@ -148,6 +164,8 @@ async def check_membership_callback(update: Update, context):
 def register_messaging_handler(app):
     """Register messaging conversation handler."""
     contact_conv = ConversationHandler(
+        name='contact',
+        persistent=True,
         entry_points=[MessageHandler(filters.Regex("^💬 تماس با مدیر$"), start_contact)],
         states={
             ENTERING_MESSAGE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_message)],
@@ -9,8 +9,9 @@ from main.utils.keyboards import (
     create_standalone_cancel_keyboard
 )
 from main.middleware.channel_verify import membership_middleware
-from database import db
-from main.utils.markdown import escape_markdown, convert_gregorian_to_jalali
+from database import async_db
+from main.utils.jalali import convert_gregorian_to_jalali, format_event_date, format_event_time
+from main.utils.templates import compile_template, join_markdown
 import logging
 import telegram
 
@@ -19,6 +20,50 @@ logger = logging.getLogger(__name__)
 # حالت‌های گفتگو برای انصراف
 VIEWING_PROFILE, SELECTING_CANCELLATION, CONFIRMING_CANCELLATION = range(3)
 
+# قالب پیام‌ها
+PROFILE_MESSAGE = compile_template(
+    "👤 *پروفایل کاربر*\n\n"
+    "🆔 *شناسه یکتا:* `{user_id:code}`\n"
+    "📛 *نام:* {first_name} {last_name}\n"
+    "🔖 *نام کاربری:* {username}\n"
+    "📅 *تعداد رویدادهای ثبت‌نام شده:* {total_count}\n\n"
+)
+PROFILE_REGISTRATIONS_HEADER = compile_template("🎯 *رویدادهای ثبت‌نام شده:*\n").render()
+PROFILE_REGISTRATION_ITEM = compile_template("{index}. {event} (📅 {date})\n")
+PROFILE_REGISTRATIONS_FOOTER = compile_template(
+    "\n⚠️ *توجه:* برای انصراف از ثبت‌نام، از دکمه زیر استفاده کنید.\n"
+).render()
+PROFILE_NO_REGISTRATIONS = compile_template("📝 *شما هنوز در هیچ رویدادی ثبت‌نام نکرده‌اید*\n\n").render()
+NO_ACTIVE_REGISTRATIONS_MESSAGE = compile_template("❌ شما هیچ ثبت‌نام فعالی ندارید.").render()
+CANCELLATION_LIST_HEADER = compile_template("📋 *لیست ثبت‌نام‌های فعال:*\n\n").render()
+CANCELLATION_ITEM = compile_template(
+    "{index}. *{event}*\n"
+    "   📅 *تاریخ برگزاری:* {event_date}\n"
+    "   📝 *توضیحات:* {description}\n"
+    "   🗓️ *تاریخ ثبت‌نام:* {registration_date}\n"
+    "   👤 *نام:* {full_name}\n"
+    "   🎫 *شماره دانشجویی:* {student_id}\n"
+    "   📞 *شماره تماس ثبت‌شده:* {phone_number}\n\n"
+)
+CANCELLATION_LIST_FOOTER = compile_template("❌ برای انصراف از هر رویداد، روی دکمه مربوطه کلیک کنید.").render()
+REGISTRATION_NOT_FOUND_MESSAGE = compile_template("❌ ثبت‌نام مورد نظر یافت نشد.").render()
+CONFIRM_CANCELLATION_MESSAGE = compile_template(
+    "⚠️ *آیا از انصراف از ثبت‌نام زیر مطمئن هستید؟*\n\n"
+    "🎯 *رویداد:* {event}\n"
+    "📝 *توضیحات:* {description}\n"
+    "⏰ *زمان برگزاری:* {event_time}\n"
+    "📍 *محل برگزاری:* {event_location}\n"
+    "📅 *تاریخ ثبت‌نام:* {registration_date}\n"
+    "👤 *نام:* {full_name}\n"
+    "🎫 *شماره دانشجویی:* {student_id}\n\n"
+    "❌ *این عمل قابل بازگشت نیست!*"
+)
+CANCELLATION_SUCCESS_MESSAGE = compile_template(
+    "✅ *انصراف از ثبت‌نام با موفقیت انجام شد!*\n\n"
+    "🏠 به منوی اصلی بازگشتید:"
+).render()
+CANCELLATION_ERROR_MESSAGE = compile_template("❌ خطا در انصراف از ثبت‌نام: {error}")
+
 async def show_user_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """نمایش پروفایل کاربر با بررسی عضویت در کانال"""
     async def handler(update, context):
@@ -26,7 +71,7 @@ async def show_user_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = user.id
         
         # دریافت اطلاعات کاربر و ثبت‌نام‌ها
-        user_registrations = db.get_user_registrations(user_id)
+        user_registrations = await async_db.get_user_registrations(user_id)
         total_registrations = len(user_registrations)
         
         # ایجاد پیام پروفایل
@@ -46,58 +91,27 @@ async def show_user_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return await membership_middleware(update, context, handler, "مشاهده پروفایل")
 
-def safe_unpack_registration(reg_data):
-    """Safely unpack registration data with default values."""
-    defaults = {
-        'reg_id': 0, 'user_id': 0, 'full_name': 'نامشخص', 
-        'student_id': 'نامشخص', 'national_id': 'نامشخص',
-        'phone_number': 'نامشخص', 'event_name': 'رویداد نامشخص',
-        'reg_date': None, 'status': 'active', 
-        'notified_admin': False, 'event_type': 'general',
-        'event_date': None,
-        'event_description': 'توضیحات موجود نیست',
-        'event_time': '',
-        'event_location': ''
-    }
-    
-    # اگر داده ثبت‌نام شامل همه فیلدها باشد (طول 15)
-    if len(reg_data) == 15:
-        return dict(zip(list(defaults.keys()), reg_data))
-    else:
-        result = defaults.copy()
-        for i, key in enumerate(defaults.keys()):
-            if i < len(reg_data):
-                result[key] = reg_data[i]
-        return result
-
 def create_profile_message(user, registrations, total_count):
     """ایجاد پیام پروفایل با فرمت مارکداون"""
-    # فرار کردن کاراکترهای خاص مارکداون
-    first_name = escape_markdown(user.first_name or '')
-    last_name = escape_markdown(user.last_name or '')
-    username = f"@{escape_markdown(user.username)}" if user.username else "❌ تنظیم نشده"
-    
-    profile_text = (
-        f"👤 *پروفایل کاربر*\n\n"
-        f"🆔 *شناسه یکتا:* `{user.id}`\n"
-        f"📛 *نام:* {first_name} {last_name}\n"
-        f"🔖 *نام کاربری:* {username}\n"
-        f"📅 *تعداد رویدادهای ثبت‌نام شده:* {total_count}\n\n"
-    )
+    parts = [PROFILE_MESSAGE.render(
+        user_id=user.id,
+        first_name=user.first_name or '',
+        last_name=user.last_name or '',
+        username=f"@{user.username}" if user.username else "❌ تنظیم نشده",
+        total_count=total_count
+    )]
     
     if total_count > 0:
-        profile_text += "🎯 *رویدادهای ثبت‌نام شده:*\n"
-        for i, reg_data in enumerate(registrations, 1):
-            reg = safe_unpack_registration(reg_data)
-            event_name_escaped = escape_markdown(reg['event_name'])
+        parts.append(PROFILE_REGISTRATIONS_HEADER)
+        for i, reg in enumerate(registrations, 1):
             # نمایش تاریخ برگزاری رویداد به جای تاریخ ثبت‌نام
-            event_date = reg.get('event_date') or "نامشخص"
-            date_escaped = escape_markdown(event_date)
-            profile_text += f"{i}\\. {event_name_escaped} \\(📅 {date_escaped}\\)\n"
-        profile_text += "\n⚠️ *توجه:* برای انصراف از ثبت‌نام، از دکمه زیر استفاده کنید\\.\n"
+            parts.append(PROFILE_REGISTRATION_ITEM.render(
+                index=i, event=reg.event_name, date=format_event_date(reg.event_starts_at)
+            ))
+        parts.append(PROFILE_REGISTRATIONS_FOOTER)
     else:
-        profile_text += "📝 *شما هنوز در هیچ رویدادی ثبت‌نام نکرده‌اید*\n\n"
-    return profile_text
+        parts.append(PROFILE_NO_REGISTRATIONS)
+    return join_markdown(parts)
 
 async def start_cancellation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """شروع فرآیند انصراف از ثبت‌نام"""
@@ -106,43 +120,33 @@ async def start_cancellation(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     if not registrations:
         await update.message.reply_text(
-            "❌ شما هیچ ثبت‌نام فعالی ندارید\\.",
+            NO_ACTIVE_REGISTRATIONS_MESSAGE,
             reply_markup=create_back_to_menu_keyboard(),
             parse_mode='MarkdownV2'
         )
         return VIEWING_PROFILE
     
-    cancellation_message = "📋 *لیست ثبت‌نام‌های فعال:*\n\n"
+    parts = [CANCELLATION_LIST_HEADER]
     
-    for i, reg_data in enumerate(registrations, 1):
-        reg = safe_unpack_registration(reg_data)
-        # تاریخ برگزاری
-        event_date = reg.get('event_date') or "نامشخص"
-        event_date_escaped = escape_markdown(event_date)
-        # توضیحات رویداد
-        event_description = escape_markdown(reg.get('event_description', ''))
+    for i, reg in enumerate(registrations, 1):
         # تاریخ ثبت‌نام
-        if reg['reg_date']:
-            jalali_reg_date = convert_gregorian_to_jalali(reg['reg_date'])
-            reg_date_str = escape_markdown(jalali_reg_date)
+        if reg.registration_date:
+            reg_date_str = convert_gregorian_to_jalali(reg.registration_date)
         else:
             reg_date_str = "نامشخص"
-        # شماره تماس
-        phone_number_escaped = escape_markdown(reg['phone_number'])
-        event_escaped = escape_markdown(reg['event_name'])
-        full_name_escaped = escape_markdown(reg['full_name'])
-        student_id_escaped = escape_markdown(reg['student_id'])
-        cancellation_message += (
-            f"{i}\\. *{event_escaped}*\n"
-            f"   📅 *تاریخ برگزاری:* {event_date_escaped}\n"
-            f"   📝 *توضیحات:* {event_description}\n"
-            f"   🗓️ *تاریخ ثبت‌نام:* {reg_date_str}\n"
-            f"   👤 *نام:* {full_name_escaped}\n"
-            f"   🎫 *شماره دانشجویی:* {student_id_escaped}\n"
-            f"   📞 *شماره تماس ثبت‌شده:* {phone_number_escaped}\n\n"
-        )
+        parts.append(CANCELLATION_ITEM.render(
+            index=i,
+            event=reg.event_name,
+            event_date=format_event_date(reg.event_starts_at),
+            description=reg.event_description,
+            registration_date=reg_date_str,
+            full_name=reg.full_name,
+            student_id=reg.student_id,
+            phone_number=reg.phone_number
+        ))
     
-    cancellation_message += "❌ برای انصراف از هر رویداد، روی دکمه مربوطه کلیک کنید\\."
+    parts.append(CANCELLATION_LIST_FOOTER)
+    cancellation_message = join_markdown(parts)
     
     await update.message.reply_text(
         cancellation_message,
@@ -166,7 +170,7 @@ async def handle_cancellation_selection(update: Update, context: ContextTypes.DE
         # بازگشت به پروفایل
         user = update.effective_user
         user_id = user.id
-        user_registrations = db.get_user_registrations(user_id)
+        user_registrations = await async_db.get_user_registrations(user_id)
         total_registrations = len(user_registrations)
         
         profile_message = create_profile_message(user, user_registrations, total_registrations)
@@ -188,44 +192,36 @@ async def handle_cancellation_selection(update: Update, context: ContextTypes.DE
     elif query.data.startswith("cancel_reg_"):
         # انتخاب ثبت‌نام برای انصراف
         registration_id = int(query.data.replace("cancel_reg_", ""))
-        registration_data = db.get_registration_by_id(registration_id, context.user_data['user_id'])
+        reg = await async_db.get_registration_by_id(registration_id, context.user_data['user_id'])
         
-        if not registration_data:
+        if not reg:
             await query.edit_message_text(
-                "❌ ثبت‌نام مورد نظر یافت نشد\\.",
+                REGISTRATION_NOT_FOUND_MESSAGE,
                 reply_markup=None,
                 parse_mode='MarkdownV2'
             )
             return VIEWING_PROFILE
         
         # ذخیره اطلاعات ثبت‌نام انتخابی
-        context.user_data['selected_registration'] = registration_data
+        context.user_data['selected_registration'] = reg
         context.user_data['selected_registration_id'] = registration_id
         
-        reg = safe_unpack_registration(registration_data)
-        
-        # استفاده از اطلاعات کامل رویداد
-        event_description = escape_markdown(reg.get('event_description', 'توضیحات موجود نیست'))
-        event_time = escape_markdown(reg.get('event_time', 'زمان نامشخص'))
-        event_location = escape_markdown(reg.get('event_location', 'مکان نامشخص'))
-        
         # تاریخ ثبت‌نام
-        if reg['reg_date']:
-            jalali_date = convert_gregorian_to_jalali(reg['reg_date'])
+        if reg.registration_date:
+            jalali_date = convert_gregorian_to_jalali(reg.registration_date)
             date_str = jalali_date
         else:
             date_str = "نامشخص"
 
-        confirmation_message = (
-            f"⚠️ *آیا از انصراف از ثبت‌نام زیر مطمئن هستید؟*\n\n"
-            f"🎯 *رویداد:* {escape_markdown(reg['event_name'])}\n"
-            f"📝 *توضیحات:* {event_description}\n"
-            f"⏰ *زمان برگزاری:* {event_time}\n"
-            f"📍 *محل برگزاری:* {event_location}\n"
-            f"📅 *تاریخ ثبت‌نام:* {escape_markdown(date_str)}\n"
-            f"👤 *نام:* {escape_markdown(reg['full_name'])}\n"
-            f"🎫 *شماره دانشجویی:* {escape_markdown(reg['student_id'])}\n\n"
-            f"❌ *این عمل قابل بازگشت نیست\\!*"
+        # استفاده از اطلاعات کامل رویداد
+        confirmation_message = CONFIRM_CANCELLATION_MESSAGE.render(
+            event=reg.event_name,
+            description=reg.event_description,
+            event_time=format_event_time(reg.event_starts_at) or 'زمان نامشخص',
+            event_location=reg.event_location or 'مکان نامشخص',
+            registration_date=date_str,
+            full_name=reg.full_name,
+            student_id=reg.student_id
         )
         
         await query.edit_message_text(
@@ -275,10 +271,9 @@ async def handle_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE
         registration_id = int(query.data.replace("confirm_cancel_", ""))
         user_id = context.user_data.get('user_id')
         try:
-            db.delete_registration(registration_id, user_id)
+            await async_db.delete_registration(registration_id, user_id)
             await query.edit_message_text(
-                "✅ *انصراف از ثبت‌نام با موفقیت انجام شد\\!*\n\n"
-                "🏠 به منوی اصلی بازگشتید:",
+                CANCELLATION_SUCCESS_MESSAGE,
                 reply_markup=None,
                 parse_mode='MarkdownV2'
             )
@@ -300,7 +295,7 @@ async def handle_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE
             context.user_data.pop('selected_registration_id', None)
             return ConversationHandler.END
         except Exception as e:
-            error_message = f"❌ خطا در انصراف از ثبت‌نام: {escape_markdown(str(e))}"
+            error_message = CANCELLATION_ERROR_MESSAGE.render(error=e)
             await query.edit_message_text(
                 text=error_message,
                 reply_markup=None,
@@ -337,6 +332,8 @@ async def back_to_menu_standalone(update: Update, context: ContextTypes.DEFAULT_
 def register_profile_handler(app):
     """ثبت هندلر پروفایل و انصراف"""
     profile_conv = ConversationHandler(
+        name='profile',
+        persistent=True,
         entry_points=[MessageHandler(filters.Regex("^👤 مشاهده پروفایل$"), show_user_profile)],
         states={
             VIEWING_PROFILE: [
@@ -1,10 +1,10 @@
 from telegram.ext import ConversationHandler, MessageHandler, CallbackQueryHandler, CommandHandler, filters
 from telegram import Update, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup
 from main.utils.keyboards import create_cancel_keyboard, create_event_selection_keyboard, create_main_keyboard
-from main.utils.validators import validate_full_name, validate_student_id, validate_national_id, validate_phone_number, convert_persian_digits
-from main.utils.markdown import escape_markdown
+from main.utils.validators import check_full_name, check_student_id, check_national_id, check_phone_number
+from main.utils.templates import compile_template
 from main.middleware.channel_verify import membership_middleware
-from database import db
+from database import async_db
 import logging
 import traceback
 
@@ -13,10 +13,57 @@ logger = logging.getLogger(__name__)
 # Conversation states
 SELECTING_EVENT, ENTERING_NAME, ENTERING_STUDENT_ID, ENTERING_NATIONAL_ID, ENTERING_PHONE, CONFIRMING_REGISTRATION = range(6)
 
+# Message templates
+REGISTRATION_START_MESSAGE = compile_template(
+    "📝 *ثبت‌نام در رویداد*\n\n"
+    "⚠️ توجه: هر کاربر تنها یک بار می‌تواند در هر رویداد ثبت‌نام کند.\n\n"
+    "لطفاً یکی از رویدادهای زیر را انتخاب کنید:"
+).render()
+ALREADY_REGISTERED_MESSAGE = compile_template(
+    "⚠️ شما قبلاً در رویداد '{event}' ثبت‌نام کرده‌اید.\n\n"
+    "هر کاربر می‌تواند تنها یک بار در هر رویداد ثبت‌نام کند."
+)
+EVENT_SELECTED_MESSAGE = compile_template("✅ *رویداد انتخاب شده: {event}*")
+SUMMARY_MESSAGE = compile_template(
+    "📋 *خلاصه اطلاعات ثبت‌نام*\n\n"
+    "👤 *نام:* {full_name}\n"
+    "🎫 *شماره دانشجویی:* {student_id}\n"
+    "🆔 *شماره ملی:* {national_id}\n"
+    "📞 *شماره تماس:* {phone_number}\n"
+    "🎯 *رویداد:* {event}\n\n"
+    "⚠️ *آیا اطلاعات فوق صحیح است؟*"
+)
+SUCCESS_MESSAGE = compile_template(
+    "🎉 *ثبت‌نام با موفقیت انجام شد!*\n\n"
+    "📋 *جزئیات ثبت‌نام:*\n"
+    "• 👤 نام: {full_name}\n"
+    "• 🎫 شماره دانشجویی: {student_id}\n"
+    "• 🆔 شماره ملی: {national_id}\n"
+    "• 📞 شماره تماس: {phone_number}\n"
+    "• 🎯 رویداد: {event}\n\n"
+    "🔢 کد پیگیری: #{registration_id}\n\n"
+    "با تشکر از ثبت‌نام شما 💫"
+)
+ERROR_MESSAGE = compile_template("❌ خطا: {error}")
+FAILED_MESSAGE = compile_template("❌ خطا در ثبت‌نام. لطفاً بعداً تلاش کنید.").render()
+
+# پیام هر کد خطای main/utils/validators.py
+VALIDATION_MESSAGES = {
+    'required': "⚠️ این مقدار نمی‌تواند خالی باشد. لطفاً دوباره وارد کنید:",
+    'name_characters': "⚠️ نام و نام خانوادگی باید فقط شامل حروف فارسی باشد.\nمثال: علی احمدی",
+    'name_parts': "⚠️ لطفاً نام و نام خانوادگی را با هم وارد کنید.\nمثال: علی احمدی",
+    'name_short': "⚠️ هر بخش نام باید حداقل 3 حرف باشد.\nمثال: علی احمدی",
+    'student_id_format': "⚠️ شماره دانشجویی باید بین 8 تا 20 رقم باشد. لطفاً دوباره وارد کنید:",
+    'national_id_format': "⚠️ شماره ملی باید 10 رقم باشد. لطفاً دوباره وارد کنید:",
+    'national_id_checksum': "⚠️ شماره ملی وارد شده معتبر نیست. لطفاً آن را بررسی و دوباره وارد کنید:",
+    'phone_format': "⚠️ شماره تماس معتبر نیست. لطفاً شماره را به فرمت 09123456789 وارد کنید:",
+    'phone_carrier': "⚠️ پیش‌شماره تلفن همراه شناخته نشد. لطفاً شماره همراه خود را وارد کنید:",
+}
+
 async def start_registration(update: Update, context):
     """Start the registration process."""
     async def handler(update, context):
-        events = db.get_events()
+        events = await async_db.get_events()
         if not events:
             await update.message.reply_text(
                 "⚠️ در حال حاضر هیچ رویداد یا کارگاهی برای ثبت‌نام موجود نیست.",
@@ -25,9 +72,7 @@ async def start_registration(update: Update, context):
             return ConversationHandler.END
 
         await update.message.reply_text(
-            "📝 *ثبت‌نام در رویداد*\n\n"
-            "⚠️ توجه: هر کاربر تنها یک بار می‌تواند در هر رویداد ثبت‌نام کند\\.\n\n"
-            "لطفاً یکی از رویدادهای زیر را انتخاب کنید:",
+            REGISTRATION_START_MESSAGE,
             reply_markup=create_event_selection_keyboard(events),
             parse_mode='MarkdownV2'
         )
@@ -47,22 +92,19 @@ async def handle_event_selection(update: Update, context):
     event_name = query.data.replace("event_", "")
     user_id = query.from_user.id
 
-    if db.is_user_registered_for_event(user_id, event_name):
-        event_name_escaped = escape_markdown(event_name)
+    if await async_db.is_user_registered_for_event(user_id, event_name):
         await query.edit_message_text(
-            f"⚠️ شما قبلاً در رویداد '{event_name_escaped}' ثبت‌نام کرده‌اید\\.\n\n"
-            f"هر کاربر می‌تواند تنها یک بار در هر رویداد ثبت‌نام کند\\.",
+            ALREADY_REGISTERED_MESSAGE.render(event=event_name),
             reply_markup=None,
             parse_mode='MarkdownV2'
         )
         return ConversationHandler.END
 
     context.user_data['registration'] = {'event': event_name}
-    event_name_escaped = escape_markdown(event_name)
 
     # 1. Edit the inline keyboard message (no reply_markup, just text)
     await query.edit_message_text(
-        f"✅ *رویداد انتخاب شده: {event_name_escaped}*",
+        EVENT_SELECTED_MESSAGE.render(event=event_name),
         parse_mode='MarkdownV2'
     )
     # 2. Send the prompt as a new message with reply keyboard
@@ -75,16 +117,14 @@ async def handle_event_selection(update: Update, context):
 
 async def handle_full_name(update: Update, context):
     """Handle full name input."""
-    full_name = update.message.text.strip()
-    if full_name == "❌ لغو ثبت‌نام":
+    if update.message.text.strip() == "❌ لغو ثبت‌نام":
         await cancel_registration(update, context)
         return ConversationHandler.END
 
-    if not validate_full_name(full_name):
-        await update.message.reply_text(
-            "⚠️ نام و نام خانوادگی باید فقط شامل حروف فارسی باشد.\nمثال: علی احمدی",
-            reply_markup=create_cancel_keyboard()
-        )
+    # یکسان‌سازی و بررسی در یک گذر؛ مقدار یکسان‌شده ذخیره می‌شود
+    full_name, error = check_full_name(update.message.text)
+    if error:
+        await update.message.reply_text(VALIDATION_MESSAGES[error], reply_markup=create_cancel_keyboard())
         return ENTERING_NAME
 
     context.user_data['registration']['full_name'] = full_name
@@ -97,23 +137,16 @@ async def handle_full_name(update: Update, context):
 
 async def handle_student_id(update: Update, context):
     """Handle student ID input."""
-    student_id = update.message.text.strip()
-    if student_id == "❌ لغو ثبت‌نام":
+    if update.message.text.strip() == "❌ لغو ثبت‌نام":
         await cancel_registration(update, context)
         return ConversationHandler.END
 
-    # Convert Persian digits to English
-    student_id_english = convert_persian_digits(student_id)
-    
-    if not validate_student_id(student_id):
-        await update.message.reply_text(
-            "⚠️ شماره دانشجویی باید حداقل 8 رقم باشد. لطفاً دوباره وارد کنید:",
-            reply_markup=create_cancel_keyboard()
-        )
+    student_id, error = check_student_id(update.message.text)
+    if error:
+        await update.message.reply_text(VALIDATION_MESSAGES[error], reply_markup=create_cancel_keyboard())
         return ENTERING_STUDENT_ID
 
-    # Store the English version in database
-    context.user_data['registration']['student_id'] = student_id_english
+    context.user_data['registration']['student_id'] = student_id
     await update.message.reply_text(
         "لطفاً شماره ملی خود را وارد کنید:",
         reply_markup=create_cancel_keyboard()
@@ -122,23 +155,16 @@ async def handle_student_id(update: Update, context):
 
 async def handle_national_id(update: Update, context):
     """Handle national ID input."""
-    national_id = update.message.text.strip()
-    if national_id == "❌ لغو ثبت‌نام":
+    if update.message.text.strip() == "❌ لغو ثبت‌نام":
         await cancel_registration(update, context)
         return ConversationHandler.END
 
-    # Convert Persian digits to English
-    national_id_english = convert_persian_digits(national_id)
-    
-    if not validate_national_id(national_id):
-        await update.message.reply_text(
-            "⚠️ شماره ملی باید 10 رقم باشد. لطفاً دوباره وارد کنید:",
-            reply_markup=create_cancel_keyboard()
-        )
+    national_id, error = check_national_id(update.message.text)
+    if error:
+        await update.message.reply_text(VALIDATION_MESSAGES[error], reply_markup=create_cancel_keyboard())
         return ENTERING_NATIONAL_ID
 
-    # Store the English version in database
-    context.user_data['registration']['national_id'] = national_id_english
+    context.user_data['registration']['national_id'] = national_id
     await update.message.reply_text(
         "لطفاً شماره تماس خود را وارد کنید :",
         reply_markup=create_cancel_keyboard()
@@ -147,32 +173,19 @@ async def handle_national_id(update: Update, context):
 
 async def handle_phone_number(update: Update, context):
     """Handle phone number input and show registration summary for confirmation."""
-    phone_number = update.message.text.strip()
-    if phone_number == "❌ لغو ثبت‌نام":
+    if update.message.text.strip() == "❌ لغو ثبت‌نام":
         await cancel_registration(update, context)
         return ConversationHandler.END
 
-    phone_number_english = convert_persian_digits(phone_number)
-    
-    if not validate_phone_number(phone_number):
-        await update.message.reply_text(
-            "⚠️ شماره تماس معتبر نیست. لطفاً شماره را به فرمت 09123456789 وارد کنید:",
-            reply_markup=create_cancel_keyboard()
-        )
+    phone_number, error = check_phone_number(update.message.text)
+    if error:
+        await update.message.reply_text(VALIDATION_MESSAGES[error], reply_markup=create_cancel_keyboard())
         return ENTERING_PHONE
 
-    context.user_data['registration']['phone_number'] = phone_number_english
+    context.user_data['registration']['phone_number'] = phone_number
     # نمایش خلاصه اطلاعات برای تأیید نهایی
     registration_data = context.user_data['registration']
-    summary_message = (
-        f"📋 *خلاصه اطلاعات ثبت‌نام*\n\n"
-        f"👤 *نام:* {escape_markdown(registration_data['full_name'])}\n"
-        f"🎫 *شماره دانشجویی:* {escape_markdown(registration_data['student_id'])}\n"
-        f"🆔 *شماره ملی:* {escape_markdown(registration_data['national_id'])}\n"
-        f"📞 *شماره تماس:* {escape_markdown(registration_data['phone_number'])}\n"
-        f"🎯 *رویداد:* {escape_markdown(registration_data['event'])}\n\n"
-        f"⚠️ *آیا اطلاعات فوق صحیح است؟*"
-    )
+    summary_message = SUMMARY_MESSAGE.render(**registration_data)
     keyboard = [
         [InlineKeyboardButton("✅ تأیید و ثبت نهایی", callback_data="confirm_registration")],
         [InlineKeyboardButton("✏️ ویرایش اطلاعات", callback_data="edit_registration")],
@@ -207,7 +220,7 @@ async def handle_registration_confirmation(update: Update, context):
         registration_data = context.user_data['registration']
         user_id = update.effective_user.id
         try:
-            registration_id = db.add_registration(
+            registration_id = await async_db.add_registration(
                 user_id=user_id,
                 full_name=registration_data['full_name'],
                 student_id=registration_data['student_id'],
@@ -215,22 +228,7 @@ async def handle_registration_confirmation(update: Update, context):
                 phone_number=registration_data['phone_number'],
                 event_name=registration_data['event']
             )
-            full_name_escaped = escape_markdown(registration_data['full_name'])
-            student_id_escaped = escape_markdown(registration_data['student_id'])
-            national_id_escaped = escape_markdown(registration_data['national_id'])
-            phone_escaped = escape_markdown(registration_data['phone_number'])
-            event_name_escaped = escape_markdown(registration_data['event'])
-            success_message = (
-                f"🎉 *ثبت‌نام با موفقیت انجام شد\\!*\n\n"
-                f"📋 *جزئیات ثبت‌نام:*\n"
-                f"• 👤 نام: {full_name_escaped}\n"
-                f"• 🎫 شماره دانشجویی: {student_id_escaped}\n"
-                f"• 🆔 شماره ملی: {national_id_escaped}\n"
-                f"• 📞 شماره تماس: {phone_escaped}\n"
-                f"• 🎯 رویداد: {event_name_escaped}\n\n"
-                f"🔢 کد پیگیری: \\#{registration_id}\n\n"
-                f"با تشکر از ثبت‌نام شما 💫"
-            )
+            success_message = SUCCESS_MESSAGE.render(registration_id=registration_id, **registration_data)
             # Only edit the message text, do NOT send reply_markup here
             await query.edit_message_text(
                 success_message,
@@ -243,9 +241,8 @@ async def handle_registration_confirmation(update: Update, context):
                 reply_markup=create_main_keyboard()
             )
         except ValueError as e:
-            error_msg = escape_markdown(str(e))
             await query.edit_message_text(
-                f"❌ خطا: {error_msg}",
+                ERROR_MESSAGE.render(error=e),
                 parse_mode='MarkdownV2'
             )
             await context.bot.send_message(
@@ -257,7 +254,7 @@ async def handle_registration_confirmation(update: Update, context):
             logger.error(f"Registration error: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             await query.edit_message_text(
-                "❌ خطا در ثبت‌نام. لطفاً بعداً تلاش کنید.",
+                FAILED_MESSAGE,
                 parse_mode='MarkdownV2'
             )
             await context.bot.send_message(
@@ -293,6 +290,8 @@ async def cancel_registration(update: Update, context):
 def register_registration_handler(app):
     """Register registration conversation handler."""
     registration_conv = ConversationHandler(
+        name='registration',
+        persistent=True,
         entry_points=[MessageHandler(filters.Regex("^📝 ثبت‌نام در کارگاه‌ها و رویدادها$"), start_registration)],
         states={
             SELECTING_EVENT: [
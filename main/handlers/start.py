@@ -1,37 +1,35 @@
 from telegram.ext import CommandHandler
 from telegram import Update
 from main.utils.keyboards import create_main_keyboard
-from main.utils.markdown import escape_markdown
+from main.utils.templates import compile_template
+from main.middleware.channel_verify import check_channel_membership
 from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+WELCOME_MESSAGE = compile_template(
+    "👋 *به ربات {society} خوش آمدید!*\n\n"
+    "🏛 {university}\n\n"
+    "💫 *امکانات ربات:*\n"
+    "• 📅 مشاهده رویدادها و کارگاه‌ها\n"
+    "• 📝 ثبت‌نام در رویدادها\n"
+    "• 💬 ارتباط با مدیران\n"
+    "• 📞 اطلاعات تماس انجمن\n\n",
+    society=Config.SOCIETY_NAME, university=Config.UNIVERSITY
+).render()
+JOIN_CHANNEL_MESSAGE = compile_template(
+    "🌟 *برای دسترسی به تمام امکانات، در کانال ما عضو شوید:*\n"
+    "{channel_url}",
+    channel_url=Config.CHANNEL_URL
+).render()
+
 async def start_command(update: Update, context):
     """Handle /start command."""
     user_id = update.effective_user.id
-    is_member = await context.bot.get_chat_member(chat_id=Config.CHANNEL_ID, user_id=user_id)
-    is_member = is_member.status in ['member', 'administrator', 'creator']
-
-    society_name_escaped = escape_markdown(Config.SOCIETY_NAME)
-    university_escaped = escape_markdown(Config.UNIVERSITY)
-    channel_url_escaped = escape_markdown(Config.CHANNEL_URL)
-
-    welcome_text = (
-        f"👋 *به ربات {society_name_escaped} خوش آمدید\\!*\n\n"
-        f"🏛 {university_escaped}\n\n"
-        "💫 *امکانات ربات:*\n"
-        "• 📅 مشاهده رویدادها و کارگاه‌ها\n"
-        "• 📝 ثبت‌نام در رویدادها\n"
-        "• 💬 ارتباط با مدیران\n"
-        "• 📞 اطلاعات تماس انجمن\n\n"
-    )
+    is_member = await check_channel_membership(user_id, context.bot)
 
-    if not is_member:
-        welcome_text += (
-            f"🌟 *برای دسترسی به تمام امکانات، در کانال ما عضو شوید:*\n"
-            f"{channel_url_escaped}"
-        )
+    welcome_text = WELCOME_MESSAGE if is_member else WELCOME_MESSAGE + JOIN_CHANNEL_MESSAGE
 
     await update.message.reply_text(
         welcome_text,
@@ -1,22 +1,32 @@
 # main/main.py
 import logging
-import os
 import asyncio
-import threading
 from telegram.ext import Application, MessageHandler, filters, CommandHandler
 from main.handlers.start import register_start_handler
 from main.handlers.registration import register_registration_handler
 from main.handlers.messaging import register_messaging_handler
 from main.handlers.profile import register_profile_handler, register_back_handler
+from main.handlers.export import register_export_handler
+from main.handlers.broadcast import register_broadcast_handler
 from main.handlers.about import about_command
 from main.handlers.events import events_command
 from main.handlers.workshops import workshops_command
 from main.handlers.contact import contact_command
 from main.utils.keyboards import create_main_keyboard
+from main.middleware.flood_control import create_flood_limiter
+from main.utils.broadcast import broadcast_engine
+from main.scheduler import maintenance_scheduler
+from main.server import create_web_server, serve
+from main.sharding import run_front
+from main.metrics import instrument_application
+from main.tracing import tracer
+from main.middleware.update_lanes import create_update_processor
+from main.persistence import create_persistence
+from main.middleware.channel_verify import membership_cache
+from database import async_db
 from config import Config
 import socks
 import socket
-from http.server import HTTPServer, BaseHTTPRequestHandler
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -24,6 +34,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+ALLOWED_UPDATES = ["message", "callback_query"]
+
 async def handle_text_messages(update, context):
     """Handle text messages for main menu buttons."""
     text = update.message.text
@@ -52,37 +64,34 @@ async def post_init(application):
         logger.info("✅ Bot commands menu set successfully!")
     except Exception as e:
         logger.error(f"❌ Error setting bot commands: {e}")
+    broadcast_engine.start_watching(application.bot)
+    if maintenance_scheduler is not None:
+        maintenance_scheduler.start()
 
-class HealthHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/plain')
-        self.end_headers()
-        self.wfile.write(b'OK')
-    
-    def log_message(self, format, *args):
-        return
+async def post_stop(application):
+    """Stop background work that still needs the bot."""
+    if maintenance_scheduler is not None:
+        maintenance_scheduler.stop()
+    await broadcast_engine.stop()
 
-def run_health_server():
-    """Run a simple health check server using http.server"""
-    port = int(os.getenv('PORT', 10000))
-    server = HTTPServer(('0.0.0.0', port), HealthHandler)
-    logger.info(f"🚀 Simple health check server running on port {port}")
-    server.serve_forever()
+async def post_shutdown(application):
+    """Release resources held outside the application."""
+    async_db.shutdown()
 
-def start_health_server():
-    """Start health server in a separate thread"""
-    health_thread = threading.Thread(target=run_health_server, daemon=True)
-    health_thread.start()
-    logger.info("🩺 Health check server started in background thread")
-    return health_thread
+async def run(application):
+    """Serve the bot and its web endpoints on one event loop until stopped."""
+    web_server = None
+    if Config.BOT_MODE in ('webhook', 'worker') or Config.HEALTH_CHECK_ENABLED:
+        web_server = create_web_server(application, Config.BOT_MODE)
+    await serve(
+        application, Config.BOT_MODE, web_server,
+        allowed_updates=ALLOWED_UPDATES,
+        drop_pending_updates=True
+    )
 
 def main():
     """Main function - simplified for Render"""
     try:
-        # Start health server
-        start_health_server()
-        
         # Setup application
         Config.validate()
 
@@ -95,10 +104,23 @@ def main():
             socket.socket = socks.socksocket
             logger.info(f"🔗 Proxy set: {host}:{port}")
 
+        if Config.WORKER_PROCESSES > 1 and Config.BOT_MODE != 'worker':
+            logger.info(f"🤖 Starting front process with {Config.WORKER_PROCESSES} workers...")
+            asyncio.run(run_front(
+                Config.BOT_MODE, Config.WORKER_PROCESSES,
+                allowed_updates=ALLOWED_UPDATES
+            ))
+            return
+
         # Initialize application
         application = Application.builder()\
             .token(Config.MAIN_BOT_TOKEN)\
             .post_init(post_init)\
+            .post_stop(post_stop)\
+            .post_shutdown(post_shutdown)\
+            .persistence(create_persistence())\
+            .rate_limiter(create_flood_limiter())\
+            .concurrent_updates(create_update_processor(tracer))\
             .connection_pool_size(10)\
             .pool_timeout(30)\
             .build()
@@ -109,6 +131,8 @@ def main():
         register_messaging_handler(application)
         register_profile_handler(application)
         register_back_handler(application)
+        register_export_handler(application)
+        register_broadcast_handler(application)
         
         application.add_handler(MessageHandler(
             filters.TEXT & ~filters.COMMAND, 
@@ -120,14 +144,12 @@ def main():
             "❌ عملیات لغو شد.",
             reply_markup=create_main_keyboard()
         )))
+
+        # Metrics and tracing (after all handlers are registered)
+        instrument_application(application, async_db.manager, membership_cache)
         
-        logger.info("🤖 Starting bot in polling mode...")
-        
-        # Use simple polling without asyncio.run
-        application.run_polling(
-            drop_pending_updates=True,
-            allowed_updates=["message", "callback_query"]
-        )
+        logger.info(f"🤖 Starting bot in {Config.BOT_MODE} mode...")
+        asyncio.run(run(application))
         
     except Exception as e:
         logger.error(f"❌ Error starting bot: {e}")
@@ -0,0 +1,370 @@
+# main/metrics.py
+"""Prometheus-style metrics and readiness checks.
+
+Metrics live in a small in-process registry rendered in the Prometheus text
+format by the web server's /metrics route. Recording is thread-safe, since
+database queries run on the DB worker pool.
+"""
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from telegram import Update
+from telegram.ext import ConversationHandler, TypeHandler
+from main.tracing import span, update_type, instrument_engine as trace_engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# گروه جداگانه تا شمارش به‌روزرسانی‌ها روی هندلرهای اصلی اثری نگذارد
+UPDATE_COUNTER_GROUP = -100
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels.get(name, '') for name in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, [('le', '+Inf')])
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class CallbackMetric:
+    """Gauge or counter whose value is read from ``fn`` at scrape time."""
+
+    def __init__(self, name, help_text, fn, kind='gauge'):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.kind = kind
+
+    def samples(self):
+        return [f"{self.name} {_format_value(self.fn())}"]
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, fn, kind='gauge'):
+        return self._add(CallbackMetric(name, help_text, fn, kind))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+UPDATES = registry.counter('bot_updates_total', 'Updates received, by update type.', ('type',))
+HANDLER_LATENCY = registry.histogram(
+    'bot_handler_duration_seconds', 'Handler callback run time.', ('handler',)
+)
+HANDLER_ERRORS = registry.counter('bot_handler_errors_total', 'Handler callbacks that raised.', ('handler',))
+DB_QUERY_LATENCY = registry.histogram(
+    'db_query_duration_seconds', 'SQL statement execution time.', ('engine', 'operation'), DB_BUCKETS
+)
+DB_QUERY_ERRORS = registry.counter('db_query_errors_total', 'SQL statements that failed.', ('engine',))
+TELEGRAM_API_LATENCY = registry.histogram(
+    'telegram_api_duration_seconds', 'Bot API request time, excluding send-queue wait.', ('endpoint',)
+)
+TELEGRAM_API_ERRORS = registry.counter(
+    'telegram_api_errors_total', 'Bot API requests that failed.', ('endpoint', 'error')
+)
+
+async def count_update(update, context):
+    UPDATES.inc(type=update_type(update))
+
+def handler_name(callback):
+    """Short, stable label for a handler callback, e.g. 'registration.start_registration'."""
+    module = getattr(callback, '__module__', '') or ''
+    qualname = getattr(callback, '__qualname__', type(callback).__name__)
+    return f"{module.rsplit('.', 1)[-1]}.{qualname}" if module else qualname
+
+def timed_callback(callback, name=None, state=None):
+    """Wrap a handler callback so its run time and failures are recorded.
+
+    The call is also traced as a 'handler' span; ``state`` names the
+    conversation state the handler belongs to, if any.
+    """
+    if getattr(callback, '_metrics_wrapped', False):
+        return callback
+    name = name or handler_name(callback)
+    attrs = {} if state is None else {'state': state}
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        with span('handler', name, **attrs) as handler_span:
+            try:
+                result = await callback(update, context)
+            except Exception:
+                HANDLER_ERRORS.inc(handler=name)
+                raise
+            finally:
+                HANDLER_LATENCY.observe(time.perf_counter() - started, handler=name)
+            if handler_span is not None and state is not None and result is not None:
+                handler_span.attrs['next_state'] = result
+            return result
+
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+def conversation_label(conversation):
+    """The conversation's name, or the module of its first entry point."""
+    if conversation.name:
+        return conversation.name
+    for handler in conversation.entry_points:
+        module = getattr(handler.callback, '__module__', None)
+        if module:
+            return module.rsplit('.', 1)[-1]
+    return 'conversation'
+
+def iter_handlers(handlers, state=None):
+    """Yield (handler, state) for every handler, descending into ConversationHandlers.
+
+    ``state`` is None for top-level handlers, else '<conversation>:<state>'
+    with 'entry' and 'fallback' for entry points and fallbacks.
+    """
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            label = conversation_label(handler)
+            yield from iter_handlers(handler.entry_points, f"{label}:entry")
+            for key, state_handlers in handler.states.items():
+                yield from iter_handlers(state_handlers, f"{label}:{key}")
+            yield from iter_handlers(handler.fallbacks, f"{label}:fallback")
+        else:
+            yield handler, state
+
+def instrument_handlers(application):
+    """Time every registered handler callback; call after all handlers are added."""
+    for handlers in application.handlers.values():
+        for handler, state in iter_handlers(handlers):
+            handler.callback = timed_callback(handler.callback, state=state)
+
+def instrument_engine(engine, name):
+    """Record duration and errors of every statement run on engine."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['metrics_started'].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        DB_QUERY_LATENCY.observe(time.perf_counter() - started, engine=name, operation=operation)
+
+    @event.listens_for(engine, 'handle_error')
+    def _error(context):
+        started = context.connection.info.get('metrics_started') if context.connection is not None else None
+        if started:
+            started.pop()
+        DB_QUERY_ERRORS.inc(engine=name)
+
+def instrument_application(application, manager, membership_cache):
+    """Attach update, handler, database, send-queue, concurrency and membership-cache metrics.
+
+    Handlers and database engines are traced as well.
+    """
+    instrument_handlers(application)
+    application.add_handler(TypeHandler(Update, count_update), group=UPDATE_COUNTER_GROUP)
+    for engine, name in ((manager.engine, 'writer'), (manager.read_engine, 'reader')):
+        instrument_engine(engine, name)
+        trace_engine(engine, name)
+
+    limiter = application.bot.rate_limiter
+    if limiter is not None and hasattr(limiter, 'queue_depth'):
+        registry.callback('telegram_send_queue_depth', 'Sends waiting for a chat slot or global token.',
+                          lambda: limiter.queue_depth)
+        registry.callback('telegram_send_retry_after_total', 'RetryAfter responses from Telegram.',
+                          lambda: limiter.retry_after_hits, kind='counter')
+
+    processor = application.update_processor
+    registry.callback('bot_updates_in_flight', 'Updates being processed right now.',
+                      lambda: processor.current_concurrent_updates)
+    if hasattr(processor, 'waiting'):
+        registry.callback('bot_updates_waiting_for_lane', "Updates waiting for the same user's previous update.",
+                          lambda: processor.waiting)
+
+    registry.callback('membership_cache_hits_total', 'Membership checks served from cache.',
+                      lambda: membership_cache.hits, kind='counter')
+    registry.callback('membership_cache_misses_total', 'Membership checks that called Telegram.',
+                      lambda: membership_cache.misses, kind='counter')
+    registry.callback('membership_cache_hit_ratio', 'Share of membership checks served from cache.',
+                      lambda: membership_cache.stats()['hit_ratio'])
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep.
+
+    A blocked loop shows up as lag here and in the readiness check; the worst
+    lag over the last ``window`` ticks is reported.
+    """
+
+    def __init__(self, interval=0.5, window=20):
+        self.interval = interval
+        self.lag = 0.0
+        self.last_tick = None
+        self._recent = deque(maxlen=window)
+        self._task = None
+
+    @property
+    def worst_lag(self):
+        return max(self._recent, default=0.0)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            registry.callback('event_loop_lag_seconds', 'Worst event loop lag over the recent window.',
+                              lambda: self.worst_lag)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.last_tick = time.monotonic()
+            self.lag = max(0.0, self.last_tick - started - self.interval)
+            self._recent.append(self.lag)
+
+class ReadinessCheck:
+    """Probes the database and event loop; ready only if both are healthy."""
+
+    def __init__(self, database, lag_monitor, db_timeout=2.0, max_loop_lag=1.0):
+        self.database = database
+        self.lag_monitor = lag_monitor
+        self.db_timeout = db_timeout
+        self.max_loop_lag = max_loop_lag
+        self._probe = None
+
+    async def start(self):
+        self.lag_monitor.start()
+
+    async def stop(self):
+        await self.lag_monitor.stop()
+
+    async def __call__(self):
+        """Return (ready, {check: {'ok': bool, 'detail': str}})."""
+        checks = {'database': await self._check_database(), 'event_loop': self._check_loop()}
+        return all(check['ok'] for check in checks.values()), checks
+
+    async def _check_database(self):
+        # a probe stuck in a DB worker thread is not stacked with new ones
+        if self._probe is not None and not self._probe.done():
+            return {'ok': False, 'detail': 'previous probe still running'}
+        self._probe = asyncio.ensure_future(self.database.ping())
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._probe), self.db_timeout)
+        except asyncio.TimeoutError:
+            return {'ok': False, 'detail': f'no answer within {self.db_timeout}s'}
+        except Exception as e:
+            return {'ok': False, 'detail': f'{type(e).__name__}: {e}'}
+        return {'ok': True, 'detail': f'{(time.perf_counter() - started) * 1000:.1f}ms'}
+
+    def _check_loop(self):
+        monitor = self.lag_monitor
+        if monitor.last_tick is None:
+            return {'ok': True, 'detail': 'starting'}
+        stalled = time.monotonic() - monitor.last_tick - monitor.interval
+        lag = max(monitor.worst_lag, stalled)
+        return {'ok': lag <= self.max_loop_lag, 'detail': f'lag {lag * 1000:.0f}ms'}
@@ -3,18 +3,45 @@ from telegram.error import BadRequest
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
 from main.utils.keyboards import create_main_keyboard  # Added missing import
 from config import Config
-from collections import defaultdict
-from datetime import datetime, timedelta
-from main.utils.markdown import escape_markdown
+from main.utils.templates import compile_template
+from main.middleware.membership_cache import MembershipCache
+from main.middleware.rate_limit import create_rate_limiter
+from main.tracing import span
 from telegram.ext import CommandHandler
 
 logger = logging.getLogger(__name__)
 
-async def check_channel_membership(user_id, bot):
-    """Check if user is a member of the specified channel."""
+MEMBERSHIP_REQUIRED_MESSAGE = compile_template(
+    "🌟 *دسترسی ویژه* 🌟\n\n"
+    "برای استفاده از {feature}، لطفاً در کانال انجمن عضو شوید.\n\n"
+    "📢 *مزایای عضویت:*\n"
+    "• 🔥 دسترسی به آخرین رویدادها\n"
+    "• 💫 امکان ثبت‌نام در کارگاه‌ها\n"
+    "• ✨ ارتباط مستقیم با مدیران\n"
+    "• 🎯 اطلاع‌رسانی فوری\n\n"
+    "پس از عضویت، روی *✅ تایید عضویت* کلیک کنید."
+)
+
+membership_cache = MembershipCache(
+    positive_ttl=Config.MEMBERSHIP_CACHE_POSITIVE_TTL,
+    negative_ttl=Config.MEMBERSHIP_CACHE_NEGATIVE_TTL
+)
+
+async def fetch_channel_membership(user_id, bot):
+    """Ask Telegram whether user is a member of the channel (uncached)."""
+    member = await bot.get_chat_member(chat_id=Config.CHANNEL_ID, user_id=user_id)
+    return member.status in ['member', 'administrator', 'creator']
+
+async def check_channel_membership(user_id, bot, refresh=False):
+    """Check if user is a member of the specified channel.
+
+    Served from membership_cache; refresh=True drops the cached answer first,
+    e.g. when the user says they just joined.
+    """
+    if refresh:
+        membership_cache.invalidate(user_id)
     try:
-        member = await bot.get_chat_member(chat_id=Config.CHANNEL_ID, user_id=user_id)
-        return member.status in ['member', 'administrator', 'creator']
+        return await membership_cache.get(user_id, lambda: fetch_channel_membership(user_id, bot))
     except BadRequest as e:
         logger.error(f"Error checking channel membership: {e}")
         return False
@@ -33,20 +60,8 @@ def create_membership_keyboard():
 
 async def send_membership_required_message(update, context, feature_name):
     """Send a message requiring channel membership with a glass-like keyboard."""
-    escaped_feature = escape_markdown(feature_name.replace('_', ' '))
-    # Do NOT escape the entire message, only variables
-    beautiful_message = (
-        f"🌟 *دسترسی ویژه* 🌟\n\n"
-        f"برای استفاده از {escaped_feature}، لطفاً در کانال انجمن عضو شوید.\n\n"
-        f"📢 *مزایای عضویت:*\n"
-        f"• 🔥 دسترسی به آخرین رویدادها\n"
-        f"• 💫 امکان ثبت‌نام در کارگاه‌ها\n"
-        f"• ✨ ارتباط مستقیم با مدیران\n"
-        f"• 🎯 اطلاع‌رسانی فوری\n\n"
-        f"پس از عضویت، روی *✅ تایید عضویت* کلیک کنید."
-    )
-
-    beautiful_message = escape_markdown(beautiful_message)
+    # فقط نام قابلیت escape می‌شود؛ نشانه‌های پررنگ قالب دست‌نخورده می‌مانند
+    beautiful_message = MEMBERSHIP_REQUIRED_MESSAGE.render(feature=feature_name.replace('_', ' '))
 
     if hasattr(update, 'message') and update.message:
         await update.message.reply_text(
@@ -63,42 +78,26 @@ async def send_membership_required_message(update, context, feature_name):
             parse_mode='MarkdownV2'
         )
 
-class RateLimiter:
-    def __init__(self):
-        self.user_attempts = defaultdict(list)
-    def is_rate_limited(self, user_id, action, max_attempts=5, window_minutes=10):
-        now = datetime.now()
-        window_start = now - timedelta(minutes=window_minutes)
-        self.user_attempts[user_id] = [
-            attempt_time for attempt_time in self.user_attempts[user_id]
-            if attempt_time > window_start
-        ]
-        if len(self.user_attempts[user_id]) >= max_attempts:
-            return True
-        self.user_attempts[user_id].append(now)
-        return False
-
-rate_limiter = RateLimiter()
+rate_limiter = create_rate_limiter()
 
 async def membership_middleware(update, context, handler, feature_name):
     """Middleware to enforce channel membership before executing handler."""
     user_id = update.effective_user.id
     # اضافه کردن rate limiting
-    if rate_limiter.is_rate_limited(user_id, "channel_check", max_attempts=5, window_minutes=10):
+    if await rate_limiter.is_rate_limited(user_id, "channel_check", max_attempts=5, window_minutes=10):
         if hasattr(update, 'message') and update.message:
             await update.message.reply_text(
-                "⏳ لطفاً بعداً تلاش کنید. محدودیت بررسی عضویت فعال شده است.",
-                parse_mode='MarkdownV2'
+                "⏳ لطفاً بعداً تلاش کنید. محدودیت بررسی عضویت فعال شده است."
             )
         elif hasattr(update, 'callback_query') and update.callback_query:
             query = update.callback_query
             await query.answer()
             await query.edit_message_text(
-                "⏳ لطفاً بعداً تلاش کنید. محدودیت بررسی عضویت فعال شده است.",
-                parse_mode='MarkdownV2'
+                "⏳ لطفاً بعداً تلاش کنید. محدودیت بررسی عضویت فعال شده است."
             )
         return None
-    is_member = await check_channel_membership(user_id, context.bot)
+    with span('middleware', 'membership_check'):
+        is_member = await check_channel_membership(user_id, context.bot)
     if not is_member:
         await send_membership_required_message(update, context, feature_name)
         return None
@@ -0,0 +1,284 @@
+# main/middleware/flood_control.py
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from main.metrics import TELEGRAM_API_LATENCY, TELEGRAM_API_ERRORS
+from main.tracing import span
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+# برای ارسال‌های انبوه: bot.send_message(..., rate_limit_args=BULK)
+BULK = {'priority': PRIORITY_BULK}
+
+# فقط متدهایی که پیام می‌فرستند یا ویرایش می‌کنند مشمول محدودیت تلگرام هستند
+PACED_ENDPOINT_PREFIXES = ('send', 'edit', 'copy', 'forward')
+
+def is_group_chat(chat_id):
+    """Groups, supergroups and channels have negative ids or @usernames."""
+    return isinstance(chat_id, str) or chat_id < 0
+
+def retry_after_seconds(error):
+    """Seconds to wait from a RetryAfter, whichever form the library gives it in."""
+    retry_after = error.retry_after
+    if hasattr(retry_after, 'total_seconds'):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+class PriorityTokenBucket:
+    """Async token bucket that serves waiters by priority, then by arrival.
+
+    While callers are queued a single timer hands out tokens as they refill, so
+    a waiting interactive send always goes before waiting bulk sends.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.waiting = 0
+        self.max_waiting = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer = None
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """Wait for one token."""
+        now = time.monotonic()
+        self._refill(now)
+        if not self._waiters and now >= self._paused_until and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule(now)
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # توکن درست پیش از لغو تحویل شده بود؛ آن را برگردان
+                self._tokens += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next ``seconds`` seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _schedule(self, now):
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self):
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        if now >= self._paused_until:
+            while self._waiters and self._tokens >= 1:
+                future = heapq.heappop(self._waiters)[2]
+                if future.done():
+                    continue
+                self._tokens -= 1
+                future.set_result(None)
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        self._schedule(now)
+
+class ChatPacer:
+    """Per-chat token buckets that hand out send slots without blocking.
+
+    ``reserve`` books the next free slot for a chat and returns how long the
+    caller must wait for it. Chats are kept in least-recently-used order and
+    dropped once their bucket is full again or beyond ``max_chats``.
+    """
+
+    def __init__(self, private_rate, group_rate, burst, max_chats=10000):
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.burst = burst
+        self.max_chats = max_chats
+        self._chats = OrderedDict()
+
+    def _take(self, chat_id, now):
+        rate = self.group_rate if is_group_chat(chat_id) else self.private_rate
+        tokens, updated = self._chats.pop(chat_id, (self.burst, now))
+        return rate, min(self.burst, tokens + (now - updated) * rate)
+
+    def reserve(self, chat_id, now=None):
+        """Book one send for chat_id; return the delay in seconds before it may go."""
+        now = time.monotonic() if now is None else now
+        rate, tokens = self._take(chat_id, now)
+        tokens -= 1
+        self._chats[chat_id] = (tokens, now)
+        self._evict(now)
+        return max(0.0, -tokens / rate)
+
+    def pause(self, chat_id, seconds, now=None):
+        """Push the chat's next free slot at least ``seconds`` into the future."""
+        now = time.monotonic() if now is None else now
+        rate, tokens = self._take(chat_id, now)
+        self._chats[chat_id] = (min(tokens, 1 - seconds * rate), now)
+
+    def _evict(self, now):
+        while self._chats:
+            chat_id, (tokens, updated) = next(iter(self._chats.items()))
+            rate = self.group_rate if is_group_chat(chat_id) else self.private_rate
+            refilled = tokens + (now - updated) * rate >= self.burst
+            if not refilled and len(self._chats) <= self.max_chats:
+                break
+            del self._chats[chat_id]
+
+    def __len__(self):
+        return len(self._chats)
+
+class FloodControlLimiter(BaseRateLimiter):
+    """Outbound send scheduler applied to every Bot API call of the application.
+
+    Sends are paced per chat, then draw from a global token bucket where
+    interactive replies go ahead of bulk traffic (``rate_limit_args=BULK``).
+    A RetryAfter pauses both the chat and the global bucket for the time
+    Telegram asks, then the send is retried.
+    """
+
+    def __init__(self, global_rate=30, global_burst=30, private_chat_rate=1.0,
+                 group_chat_rate=20 / 60, chat_burst=3, max_retries=3, latency_samples=2048):
+        self.bucket = PriorityTokenBucket(global_rate, global_burst)
+        self.pacer = ChatPacer(private_chat_rate, group_chat_rate, chat_burst)
+        self.max_retries = max_retries
+        self.pacing = 0
+        self.max_pacing_depth = 0
+        self.sent = 0
+        self.failed = 0
+        self.retry_after_hits = 0
+        self.latency_total = 0.0
+        self._latencies = deque(maxlen=latency_samples)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @property
+    def queue_depth(self):
+        """Sends currently waiting for a chat slot or a global token."""
+        return self.pacing + self.bucket.waiting
+
+    @property
+    def max_queue_depth(self):
+        return max(self.max_pacing_depth, self.bucket.max_waiting)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if not endpoint.startswith(PACED_ENDPOINT_PREFIXES):
+            return await self._call(callback, args, kwargs, endpoint)
+
+        options = rate_limit_args or {}
+        priority = options.get('priority', PRIORITY_INTERACTIVE)
+        max_retries = options.get('max_retries', self.max_retries)
+        chat_id = data.get('chat_id')
+        if isinstance(chat_id, str) and chat_id.lstrip('-').isdigit():
+            chat_id = int(chat_id)
+        started = time.monotonic()
+
+        for attempt in range(max_retries + 1):
+            with span('queue', endpoint):
+                await self._wait_turn(chat_id, priority)
+            try:
+                result = await self._call(callback, args, kwargs, endpoint)
+            except RetryAfter as e:
+                seconds = retry_after_seconds(e)
+                self.retry_after_hits += 1
+                self.bucket.pause(seconds)
+                if chat_id is not None:
+                    self.pacer.pause(chat_id, seconds)
+                if attempt == max_retries:
+                    self.failed += 1
+                    logger.error(f"{endpoint} to {chat_id} still flood limited after {max_retries} retries")
+                    raise
+                logger.warning(f"{endpoint} to {chat_id} flood limited, retrying in {seconds:.1f}s")
+                continue
+            except Exception:
+                self.failed += 1
+                raise
+            self._record(time.monotonic() - started)
+            return result
+
+    async def _call(self, callback, args, kwargs, endpoint):
+        started = time.perf_counter()
+        with span('api', endpoint):
+            try:
+                return await callback(*args, **kwargs)
+            except Exception as e:
+                TELEGRAM_API_ERRORS.inc(endpoint=endpoint, error=type(e).__name__)
+                raise
+            finally:
+                TELEGRAM_API_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+
+    async def _wait_turn(self, chat_id, priority):
+        if chat_id is not None:
+            delay = self.pacer.reserve(chat_id)
+            if delay > 0:
+                self.pacing += 1
+                self.max_pacing_depth = max(self.max_pacing_depth, self.queue_depth)
+                try:
+                    await asyncio.sleep(delay)
+                finally:
+                    self.pacing -= 1
+        await self.bucket.acquire(priority)
+
+    def _record(self, seconds):
+        self.sent += 1
+        self.latency_total += seconds
+        self._latencies.append(seconds)
+
+    def stats(self):
+        """Queue depth and send latency (ms, over recent sends) for monitoring."""
+        recent = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(fraction * len(recent)))] * 1000
+
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retry_after': self.retry_after_hits,
+            'avg_latency_ms': self.latency_total / self.sent * 1000 if self.sent else 0.0,
+            'p50_latency_ms': percentile(0.50),
+            'p95_latency_ms': percentile(0.95),
+            'max_latency_ms': recent[-1] * 1000 if recent else 0.0,
+        }
+
+def create_flood_limiter():
+    """Build the send scheduler from Config."""
+    return FloodControlLimiter(
+        global_rate=Config.SEND_GLOBAL_RATE,
+        global_burst=Config.SEND_GLOBAL_BURST,
+        private_chat_rate=Config.SEND_PRIVATE_CHAT_RATE,
+        group_chat_rate=Config.SEND_GROUP_CHAT_RATE,
+        chat_burst=Config.SEND_CHAT_BURST,
+        max_retries=Config.SEND_MAX_RETRIES
+    )
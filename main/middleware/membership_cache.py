@@ -0,0 +1,89 @@
+# main/middleware/membership_cache.py
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MembershipCache:
+    """TTL cache for channel membership lookups.
+
+    Members are cached for ``positive_ttl`` seconds and non-members for the shorter
+    ``negative_ttl``, so someone who just joined is not locked out for long.
+    Concurrent lookups for the same user share one in-flight API call. Failed
+    lookups are never cached.
+    """
+
+    def __init__(self, positive_ttl, negative_ttl, max_entries=50000):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.api_calls = 0
+        self.api_seconds = 0.0
+
+    async def get(self, user_id, fetch):
+        """Return cached membership for user_id, calling ``await fetch()`` on a miss."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            del self._entries[user_id]
+
+        inflight = self._inflight.get(user_id)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._fetch(user_id, fetch))
+        # retrieve the exception even if every waiter was cancelled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[user_id] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, user_id, fetch):
+        started = time.monotonic()
+        try:
+            is_member = await fetch()
+        finally:
+            self.api_calls += 1
+            self.api_seconds += time.monotonic() - started
+            self._inflight.pop(user_id, None)
+        ttl = self.positive_ttl if is_member else self.negative_ttl
+        self._store(user_id, is_member, time.monotonic() + ttl)
+        return is_member
+
+    def _store(self, user_id, is_member, expires_at):
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            for key in [key for key, (_, expiry) in self._entries.items() if expiry <= now]:
+                del self._entries[key]
+            while len(self._entries) >= self.max_entries:
+                # dicts keep insertion order: drop the oldest entry
+                del self._entries[next(iter(self._entries))]
+        self._entries[user_id] = (is_member, expires_at)
+
+    def invalidate(self, user_id):
+        """Forget the cached result for user_id."""
+        self._entries.pop(user_id, None)
+
+    def stats(self):
+        """Hit ratio and estimated Telegram round-trip time saved."""
+        lookups = self.hits + self.misses + self.coalesced
+        avg_api_seconds = self.api_seconds / self.api_calls if self.api_calls else 0.0
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_ratio': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            'api_calls': self.api_calls,
+            'avg_api_latency_ms': avg_api_seconds * 1000,
+            'saved_latency_ms': (self.hits + self.coalesced) * avg_api_seconds * 1000,
+        }
@@ -0,0 +1,175 @@
+# main/middleware/rate_limit.py
+import time
+import logging
+from collections import OrderedDict
+from sqlalchemy import text
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def rate_limit_key(user_id, action):
+    """Build the counter key for one (user, action) pair."""
+    return f"{action}:{user_id}"
+
+def sliding_window_estimate(current, previous, window, now):
+    """Weighted request count over the last ``window`` seconds.
+
+    Two fixed windows are kept per key; the previous one is weighted by how much
+    of it still overlaps the sliding window.
+    """
+    elapsed = now % window
+    return previous * (1 - elapsed / window) + current
+
+class MemoryRateLimitStore:
+    """In-process sliding-window counters with idle-key eviction.
+
+    Each key holds two counters, so a check is O(1) whatever the limit. Keys are
+    kept in least-recently-used order: those idle for ``idle_ttl`` seconds, or
+    beyond ``max_keys``, are dropped from the front.
+    """
+
+    def __init__(self, max_keys=100000, idle_ttl=3600):
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self._counters = OrderedDict()
+        self.evicted = 0
+
+    def hit(self, key, max_attempts, window, now=None):
+        """Count one attempt for key; return True if it is over the limit."""
+        now = time.time() if now is None else now
+        index = int(now // window)
+        entry = self._counters.pop(key, None)
+        current = previous = 0
+        if entry is not None:
+            if entry[0] == index:
+                current, previous = entry[1], entry[2]
+            elif entry[0] == index - 1:
+                previous = entry[1]
+
+        limited = sliding_window_estimate(current, previous, window, now) >= max_attempts
+        if not limited:
+            current += 1
+        self._counters[key] = (index, current, previous, now)
+        self._evict(now)
+        return limited
+
+    def _evict(self, now):
+        cutoff = now - self.idle_ttl
+        while self._counters:
+            key, entry = next(iter(self._counters.items()))
+            if entry[3] >= cutoff and len(self._counters) <= self.max_keys:
+                break
+            del self._counters[key]
+            self.evicted += 1
+
+    def __len__(self):
+        return len(self._counters)
+
+class SQLiteRateLimitStore:
+    """Sliding-window counters in the ``rate_limits`` table.
+
+    Shared by every process using the same database file and kept across
+    restarts. The window roll and increment are a single upsert, which takes the
+    SQLite write lock, so concurrent processes cannot both slip under the limit;
+    a rejected attempt is taken back in the same transaction.
+    """
+
+    UPSERT = text("""
+        INSERT INTO rate_limits (key, window_index, current_count, previous_count, updated_at)
+        VALUES (:key, :window_index, 1, 0, :now)
+        ON CONFLICT(key) DO UPDATE SET
+            previous_count = CASE
+                WHEN rate_limits.window_index = :window_index THEN rate_limits.previous_count
+                WHEN rate_limits.window_index = :window_index - 1 THEN rate_limits.current_count
+                ELSE 0 END,
+            current_count = CASE
+                WHEN rate_limits.window_index = :window_index THEN rate_limits.current_count + 1
+                ELSE 1 END,
+            window_index = :window_index,
+            updated_at = :now
+        RETURNING current_count, previous_count
+    """)
+    UNDO = text("UPDATE rate_limits SET current_count = current_count - 1 WHERE key = :key")
+    PRUNE = text("DELETE FROM rate_limits WHERE updated_at < :cutoff")
+
+    def __init__(self, manager, idle_ttl=3600, prune_every=1000):
+        self.manager = manager
+        self.idle_ttl = idle_ttl
+        self.prune_every = prune_every
+        self._hits_since_prune = 0
+
+    def hit(self, key, max_attempts, window, now=None):
+        """Count one attempt for key; return True if it is over the limit."""
+        now = time.time() if now is None else now
+        params = {'key': key, 'window_index': int(now // window), 'now': now}
+        session = self.manager.Session()
+        try:
+            current, previous = session.execute(self.UPSERT, params).one()
+            limited = sliding_window_estimate(current, previous, window, now) > max_attempts
+            if limited:
+                session.execute(self.UNDO, {'key': key})
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        self._hits_since_prune += 1
+        if self._hits_since_prune >= self.prune_every:
+            self._hits_since_prune = 0
+            self.prune(now)
+        return limited
+
+    def prune(self, now=None):
+        """Delete counters idle for longer than idle_ttl; return how many went."""
+        now = time.time() if now is None else now
+        session = self.manager.Session()
+        try:
+            removed = session.execute(self.PRUNE, {'cutoff': now - self.idle_ttl}).rowcount
+            session.commit()
+            return removed
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error pruning rate limit counters: {e}")
+            return 0
+        finally:
+            session.close()
+
+class RateLimiter:
+    """Per (user, action) rate limiter over a pluggable counter store.
+
+    Blocking stores (SQLite) are called through ``run_blocking`` so the event
+    loop is never held up by the database.
+    """
+
+    def __init__(self, store, run_blocking=None):
+        self.store = store
+        self.run_blocking = run_blocking
+
+    async def is_rate_limited(self, user_id, action, max_attempts=5, window_minutes=10):
+        """Record an attempt and return True if user_id exceeded the limit for action."""
+        key = rate_limit_key(user_id, action)
+        window = window_minutes * 60
+        if self.run_blocking is None:
+            return self.store.hit(key, max_attempts, window)
+        try:
+            return await self.run_blocking(self.store.hit, key, max_attempts, window)
+        except Exception as e:
+            # محدودیت نباید ربات را از کار بیندازد
+            logger.error(f"Rate limit store error for {key}: {e}")
+            return False
+
+def create_rate_limiter(backend=None):
+    """Build the rate limiter selected by Config.RATE_LIMIT_BACKEND."""
+    backend = (backend or Config.RATE_LIMIT_BACKEND).lower()
+    if backend == 'sqlite':
+        from database import async_db
+        store = SQLiteRateLimitStore(async_db.manager, idle_ttl=Config.RATE_LIMIT_IDLE_TTL)
+        return RateLimiter(store, run_blocking=async_db.run)
+    if backend != 'memory':
+        raise ValueError(f"نوع ذخیره‌ساز محدودیت نامعتبر است: {backend}")
+    return RateLimiter(MemoryRateLimitStore(
+        max_keys=Config.RATE_LIMIT_MAX_KEYS,
+        idle_ttl=Config.RATE_LIMIT_IDLE_TTL
+    ))
@@ -0,0 +1,62 @@
+# main/middleware/update_lanes.py
+import asyncio
+import logging
+from main.tracing import TracingUpdateProcessor
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def lane_key(update):
+    """The user an update belongs to, else its chat; None for updates with neither."""
+    user = getattr(update, 'effective_user', None)
+    if user is not None:
+        return user.id
+    chat = getattr(update, 'effective_chat', None)
+    return chat.id if chat is not None else None
+
+class UserLaneUpdateProcessor(TracingUpdateProcessor):
+    """Runs updates of different users concurrently, each user's strictly in order.
+
+    Every user has a lane: a FIFO lock taken before a slot of the global
+    ``max_concurrent_updates`` limit. The Application starts updates in
+    arrival order, so a user's next update waits until the previous one has
+    finished, and a user with a backlog never holds more than one slot. Lanes
+    exist only while a user has updates in flight.
+    """
+
+    def __init__(self, tracer, max_concurrent_updates=32):
+        super().__init__(tracer, max_concurrent_updates)
+        self._lanes = {}  # key -> [lock, updates using it]
+
+    @property
+    def active_lanes(self):
+        return len(self._lanes)
+
+    @property
+    def waiting(self):
+        """Updates queued behind an earlier update of the same user."""
+        return sum(users - 1 for _, users in self._lanes.values())
+
+    async def process_update(self, update, coroutine):
+        key = lane_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = [asyncio.Lock(), 0]
+        lane[1] += 1
+        try:
+            async with lane[0]:
+                await super().process_update(update, coroutine)
+        finally:
+            lane[1] -= 1
+            if not lane[1]:
+                del self._lanes[key]
+
+def create_update_processor(tracer):
+    """Build the update processor from Config; MAX_CONCURRENT_UPDATES=1 processes updates one by one."""
+    if Config.MAX_CONCURRENT_UPDATES <= 1:
+        return TracingUpdateProcessor(tracer)
+    return UserLaneUpdateProcessor(tracer, Config.MAX_CONCURRENT_UPDATES)
@@ -0,0 +1,286 @@
+# main/persistence.py
+"""Conversation states and user_data kept in SQLite across restarts.
+
+The Application hands every changed user's user_data to the persistence on
+each update_interval. SQLitePersistence compares it key by key with what was
+last written and only queues keys whose pickled value changed. Queued changes
+are written shortly afterwards in a single transaction on the database worker
+pool, so neither handlers nor the persistence run wait on SQLite.
+"""
+import asyncio
+import json
+import logging
+import pickle
+import time
+from sqlalchemy import text
+from telegram.ext import BasePersistence, PersistenceInput
+from database import async_db
+from main.sharding import shard_owner
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class SQLiteConversationStore:
+    """Reads and writes the ``conversation_states`` and ``user_data`` tables."""
+
+    UPSERT_STATE = text("""
+        INSERT INTO conversation_states (name, key, state, updated_at)
+        VALUES (:name, :key, :state, :now)
+        ON CONFLICT(name, key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+    """)
+    DELETE_STATE = text("DELETE FROM conversation_states WHERE name = :name AND key = :key")
+    UPSERT_VALUE = text("""
+        INSERT INTO user_data (user_id, key, value, updated_at)
+        VALUES (:user_id, :key, :value, :now)
+        ON CONFLICT(user_id, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    """)
+    DELETE_VALUE = text("DELETE FROM user_data WHERE user_id = :user_id AND key = :key")
+    DROP_USER = text("DELETE FROM user_data WHERE user_id = :user_id")
+    PRUNE_STATES = text("DELETE FROM conversation_states WHERE updated_at < :cutoff")
+    PRUNE_VALUES = text("DELETE FROM user_data WHERE updated_at < :cutoff")
+    SELECT_STATES = text("SELECT name, key, state FROM conversation_states")
+    SELECT_VALUES = text("SELECT user_id, key, value FROM user_data")
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def load(self, max_age=None):
+        """Drop rows idle for longer than max_age seconds, then return (states, values) rows."""
+        session = self.manager.Session()
+        try:
+            if max_age:
+                cutoff = time.time() - max_age
+                pruned = session.execute(self.PRUNE_STATES, {'cutoff': cutoff}).rowcount
+                pruned += session.execute(self.PRUNE_VALUES, {'cutoff': cutoff}).rowcount
+                if pruned:
+                    logger.info(f"Pruned {pruned} abandoned conversation rows")
+            states = session.execute(self.SELECT_STATES).all()
+            values = session.execute(self.SELECT_VALUES).all()
+            session.commit()
+            return states, values
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def write(self, states, values, dropped_users):
+        """Apply one batch of changes in a single transaction.
+
+        ``states`` maps (name, key) to a JSON state or None to delete, ``values``
+        maps (user_id, key) to a pickled value or None to delete. Users in
+        ``dropped_users`` lose all their rows before the batch's own values
+        are written.
+        """
+        now = time.time()
+        session = self.manager.Session()
+        try:
+            if dropped_users:
+                session.execute(self.DROP_USER, [{'user_id': user_id} for user_id in dropped_users])
+            upserts = [{'user_id': user_id, 'key': key, 'value': value, 'now': now}
+                       for (user_id, key), value in values.items() if value is not None]
+            deletes = [{'user_id': user_id, 'key': key}
+                       for (user_id, key), value in values.items() if value is None]
+            if upserts:
+                session.execute(self.UPSERT_VALUE, upserts)
+            if deletes:
+                session.execute(self.DELETE_VALUE, deletes)
+            upserts = [{'name': name, 'key': key, 'state': state, 'now': now}
+                       for (name, key), state in states.items() if state is not None]
+            deletes = [{'name': name, 'key': key}
+                       for (name, key), state in states.items() if state is None]
+            if upserts:
+                session.execute(self.UPSERT_STATE, upserts)
+            if deletes:
+                session.execute(self.DELETE_STATE, deletes)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+class SQLitePersistence(BasePersistence):
+    """Write-behind persistence of conversation states and user_data.
+
+    Only user_data and conversations are stored; chat_data, bot_data and
+    callback data stay in memory. Values must be picklable and user_data
+    keys strings. A sharded worker passes ``owns`` to restore only the users
+    routed to it.
+    """
+
+    def __init__(self, store, update_interval=5, flush_delay=0.5, max_age=None, owns=None, run_blocking=None):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.store = store
+        self.flush_delay = flush_delay
+        self.max_age = max_age
+        self.owns = owns
+        self.run_blocking = run_blocking or async_db.run
+        self._loaded = None
+        self._snapshots = {}  # user_id -> {key: pickled value last written}
+        self._pending_states = {}
+        self._pending_values = {}
+        self._dropped_users = set()
+        self._flush_task = None
+        self._flush_requested = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self.batches_written = 0
+        self.rows_written = 0
+
+    async def _load(self):
+        if self._loaded is None:
+            started = time.perf_counter()
+            state_rows, value_rows = await self.run_blocking(self.store.load, self.max_age)
+            conversations = {}
+            for name, key, state in state_rows:
+                key = tuple(json.loads(key))
+                if self.owns is None or self.owns(key[-1]):
+                    conversations.setdefault(name, {})[key] = json.loads(state)
+            user_data = {}
+            for user_id, key, value in value_rows:
+                if self.owns is not None and not self.owns(user_id):
+                    continue
+                try:
+                    user_data.setdefault(user_id, {})[key] = pickle.loads(value)
+                except Exception as e:
+                    # مثلاً کلاس ذخیره‌شده در نسخه جدید تغییر کرده است
+                    logger.warning(f"Dropping unreadable user_data {key!r} of user {user_id}: {e}")
+                    self._pending_values[(user_id, key)] = None
+                    continue
+                self._snapshots.setdefault(user_id, {})[key] = value
+            self._loaded = (conversations, user_data)
+            logger.info(
+                f"Restored {sum(map(len, conversations.values()))} conversation states and user_data of "
+                f"{len(user_data)} users in {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+        return self._loaded
+
+    async def get_user_data(self):
+        return (await self._load())[1]
+
+    async def get_conversations(self, name):
+        return (await self._load())[0].get(name, {})
+
+    async def get_chat_data(self):
+        return {}
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_user_data(self, user_id, data):
+        """Queue the keys of data whose pickled value differs from the last write."""
+        previous = self._snapshots.get(user_id, {})
+        current = {key: pickle.dumps(value, pickle.HIGHEST_PROTOCOL) for key, value in data.items()}
+        for key, value in current.items():
+            if previous.get(key) != value:
+                self._pending_values[(user_id, key)] = value
+        for key in previous.keys() - current.keys():
+            self._pending_values[(user_id, key)] = None
+        if current:
+            self._snapshots[user_id] = current
+        else:
+            self._snapshots.pop(user_id, None)
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id):
+        self._snapshots.pop(user_id, None)
+        for key in [key for key in self._pending_values if key[0] == user_id]:
+            del self._pending_values[key]
+        self._dropped_users.add(user_id)
+        self._schedule_flush()
+
+    async def update_conversation(self, name, key, new_state):
+        self._pending_states[(name, json.dumps(list(key)))] = (
+            None if new_state is None else json.dumps(new_state)
+        )
+        self._schedule_flush()
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def refresh_user_data(self, user_id, user_data):
+        # در هر به‌روزرسانی فراخوانی می‌شود؛ داده‌ها فقط هنگام راه‌اندازی خوانده می‌شوند
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    @property
+    def pending(self):
+        return len(self._pending_states) + len(self._pending_values) + len(self._dropped_users)
+
+    def _schedule_flush(self):
+        if self.pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.wait_for(self._flush_requested.wait(), self.flush_delay)
+        except asyncio.TimeoutError:
+            pass
+        if not await self._write():
+            # پایگاه داده در دسترس نیست؛ تغییرات در صف می‌مانند
+            await asyncio.sleep(self.flush_delay)
+        self._flush_task = None
+        self._schedule_flush()
+
+    async def _write(self):
+        """Write everything queued so far; on failure put it back and return False."""
+        async with self._write_lock:
+            if not self.pending:
+                return True
+            states, self._pending_states = self._pending_states, {}
+            values, self._pending_values = self._pending_values, {}
+            dropped, self._dropped_users = self._dropped_users, set()
+            try:
+                await self.run_blocking(self.store.write, states, values, dropped)
+            except Exception as e:
+                logger.error(f"Error writing {len(states) + len(values)} persistence rows: {e}")
+                # تغییرات جدیدتر بر دسته ناموفق اولویت دارند
+                for key, value in states.items():
+                    self._pending_states.setdefault(key, value)
+                for key, value in values.items():
+                    if key[0] not in self._dropped_users:
+                        self._pending_values.setdefault(key, value)
+                self._dropped_users |= dropped
+                return False
+            self.batches_written += 1
+            self.rows_written += len(states) + len(values)
+            return True
+
+    async def flush(self):
+        """Write all queued changes now; called by the Application on shutdown."""
+        task = self._flush_task
+        if task is not None and not task.done():
+            self._flush_requested.set()
+            await asyncio.gather(task, return_exceptions=True)
+            self._flush_requested.clear()
+        await self._write()
+
+def create_persistence():
+    """Build the bot's persistence from Config."""
+    return SQLitePersistence(
+        SQLiteConversationStore(async_db.manager),
+        update_interval=Config.PERSISTENCE_UPDATE_INTERVAL,
+        flush_delay=Config.PERSISTENCE_FLUSH_DELAY,
+        max_age=Config.PERSISTENCE_MAX_AGE_DAYS * 86400,
+        owns=shard_owner(Config.SHARD_INDEX, Config.SHARD_COUNT)
+    )
@@ -0,0 +1,88 @@
+# main/scheduler.py
+"""Scheduled maintenance of the event list, on the bot's event loop.
+
+An APScheduler AsyncIOScheduler runs close_due_events every
+EVENT_CLOSE_INTERVAL_MINUTES: events whose registration deadline
+(REGISTRATION_CUTOFF_MINUTES before the start) has passed are deactivated,
+which also drops past events, and the event catalog is reloaded so listings
+and registration keyboards shrink right away.
+
+Jobs live in the bot's SQLite database (SQLAlchemyJobStore). After downtime
+the stored next run time is in the past and the job fires once on start:
+runs are coalesced and have no misfire limit. APScheduler cannot share a job
+store between schedulers, so with several worker processes only shard 0
+runs it; the other workers' catalogs follow within EVENT_CATALOG_MAX_AGE.
+"""
+import logging
+from datetime import datetime
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from database import async_db
+from database.engine import create_sqlite_engine
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CLOSE_EVENTS_JOB = 'close_due_events'
+
+async def close_due_events():
+    """Deactivate events past their registration deadline and reload the catalog."""
+    closed = await async_db.close_due_events(Config.REGISTRATION_CUTOFF_MINUTES)
+    for name in closed:
+        logger.info(f"Registration closed and event deactivated: {name}")
+    # بارگذاری دوباره کش تا اولین کاربر منتظر خواندن فهرست نماند
+    await async_db.get_events()
+    return closed
+
+class MaintenanceScheduler:
+    """Owns the AsyncIOScheduler and keeps its persisted jobs in line with Config."""
+
+    def __init__(self, db_path, interval_minutes=5, timezone='Asia/Tehran'):
+        self.db_path = db_path
+        self.interval_minutes = interval_minutes
+        self.timezone = timezone
+        self._scheduler = None
+
+    def start(self):
+        """Start the scheduler on the running event loop; missed runs fire now."""
+        if self._scheduler is not None:
+            return
+        # موتور جداگانه با همان تنظیمات SQLite؛ APScheduler هنگام توقف موتور مخزن کارها را می‌بندد
+        engine = create_sqlite_engine(self.db_path)
+        self._scheduler = AsyncIOScheduler(
+            jobstores={'default': SQLAlchemyJobStore(engine=engine, tablename='apscheduler_jobs')},
+            job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': None},
+            timezone=self.timezone
+        )
+        self._scheduler.start()
+        trigger = IntervalTrigger(minutes=self.interval_minutes, timezone=self.timezone)
+        job = self._scheduler.get_job(CLOSE_EVENTS_JOB)
+        if job is None:
+            # اولین اجرا بلافاصله؛ پس از آن زمان اجرای بعدی در پایگاه داده می‌ماند
+            self._scheduler.add_job(
+                f'{__name__}:close_due_events', trigger, id=CLOSE_EVENTS_JOB,
+                name='close events past their registration deadline',
+                next_run_time=datetime.now(trigger.timezone)
+            )
+        elif job.trigger.interval != trigger.interval:
+            self._scheduler.reschedule_job(CLOSE_EVENTS_JOB, trigger=trigger)
+        logger.info(f"Maintenance scheduler started, closing due events every {self.interval_minutes} min")
+
+    def stop(self):
+        """Stop running jobs; the next run time stays stored for the next start."""
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+
+def create_maintenance_scheduler():
+    """Build the maintenance scheduler from Config, or None where this process must not run it."""
+    if not Config.SCHEDULER_ENABLED or Config.SHARD_INDEX != 0:
+        return None
+    return MaintenanceScheduler(
+        Config.DATABASE_PATH,
+        interval_minutes=Config.EVENT_CLOSE_INTERVAL_MINUTES,
+        timezone=Config.TIMEZONE
+    )
+
+maintenance_scheduler = create_maintenance_scheduler()
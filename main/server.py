@@ -0,0 +1,196 @@
+# main/server.py
+import asyncio
+import hmac
+import logging
+import signal
+from aiohttp import web
+from telegram import Update
+from main.metrics import registry, ReadinessCheck, LoopLagMonitor
+from main.tracing import tracer
+from database import async_db
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+class WebServer:
+    """aiohttp server on the bot's event loop.
+
+    Always answers liveness checks on / and /health. Optionally serves
+    ``metrics`` on /metrics, a ``readiness`` check on /ready, the tracer's
+    slowest updates on /debug/traces (only with a ``debug_token``) and, when
+    ``webhook_path`` is set, accepts Telegram updates there and puts them
+    straight onto the application's update queue.
+    """
+
+    def __init__(self, application, port, host='0.0.0.0', webhook_path=None, secret_token=None,
+                 metrics=None, readiness=None, tracer=None, debug_token=None):
+        self.application = application
+        self.port = port
+        self.host = host
+        self.webhook_path = webhook_path
+        self.secret_token = secret_token
+        self.metrics = metrics
+        self.readiness = readiness
+        self.tracer = tracer
+        self.debug_token = debug_token
+        self.updates_received = 0
+        self._runner = None
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_get('/', self.health)
+        app.router.add_get('/health', self.health)
+        if self.metrics is not None:
+            app.router.add_get('/metrics', self.render_metrics)
+        if self.readiness is not None:
+            app.router.add_get('/ready', self.ready)
+        if self.tracer is not None and self.debug_token:
+            app.router.add_get('/debug/traces', self.debug_traces)
+        if self.webhook_path:
+            app.router.add_post(self.webhook_path, self.webhook)
+        return app
+
+    async def start(self):
+        if self.readiness is not None:
+            await self.readiness.start()
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"🚀 Web server listening on port {self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self.readiness is not None:
+            await self.readiness.stop()
+
+    async def health(self, request):
+        return web.Response(text='OK')
+
+    async def render_metrics(self, request):
+        return web.Response(text=self.metrics.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Prometheus-Format': '0.0.4'})
+
+    async def ready(self, request):
+        is_ready, checks = await self.readiness()
+        return web.json_response({'ready': is_ready, 'checks': checks}, status=200 if is_ready else 503)
+
+    async def debug_traces(self, request):
+        token = request.query.get('token', '')
+        if not hmac.compare_digest(token, self.debug_token):
+            return web.Response(status=403)
+        limit = int(request.query['limit']) if request.query.get('limit', '').isdigit() else 20
+        traces = self.tracer.slowest.snapshot()[:limit]
+        return web.json_response({
+            'traced': self.tracer.traced,
+            'slow': self.tracer.slow,
+            'slow_threshold_ms': self.tracer.slow_threshold * 1000,
+            'traces': [trace.to_dict() for trace in traces],
+        })
+
+    def authorized(self, request):
+        token = request.headers.get(SECRET_TOKEN_HEADER, '')
+        if not self.secret_token or not hmac.compare_digest(token, self.secret_token):
+            logger.warning(f"Rejected webhook call from {request.remote}: bad secret token")
+            return False
+        return True
+
+    async def webhook(self, request):
+        """Queue one update, or a list of them (batches relayed by the sharding front)."""
+        if not self.authorized(request):
+            return web.Response(status=403)
+        try:
+            payload = await request.json()
+            payload = payload if isinstance(payload, list) else [payload]
+            updates = [Update.de_json(data, self.application.bot) for data in payload]
+        except Exception as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return web.Response(status=400)
+        self.updates_received += len(updates)
+        for update in updates:
+            await self.application.update_queue.put(update)
+        return web.Response()
+
+def create_web_server(application, mode):
+    """Build the web server for BOT_MODE; the webhook route is only added in webhook and worker mode."""
+    readiness = ReadinessCheck(
+        async_db, LoopLagMonitor(),
+        db_timeout=Config.READY_DB_TIMEOUT,
+        max_loop_lag=Config.READY_MAX_LOOP_LAG
+    )
+    observability = {
+        'metrics': registry,
+        'readiness': readiness,
+        'tracer': tracer,
+        'debug_token': Config.TRACE_DEBUG_TOKEN,
+    }
+    if mode not in ('webhook', 'worker'):
+        return WebServer(application, Config.PORT, **observability)
+    return WebServer(
+        application, Config.PORT,
+        # کارگرها فقط از پردازه جلویی روی همین ماشین به‌روزرسانی می‌گیرند
+        host='127.0.0.1' if mode == 'worker' else '0.0.0.0',
+        webhook_path=Config.WEBHOOK_PATH,
+        secret_token=Config.WEBHOOK_SECRET,
+        **observability
+    )
+
+def stop_on_signals(stop_event):
+    """Set stop_event on SIGINT/SIGTERM (Render sends SIGTERM on redeploy)."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+async def serve(application, mode, web_server=None, stop_event=None, allowed_updates=None,
+                drop_pending_updates=True, webhook_url=None):
+    """Run application in 'polling', 'webhook' or 'worker' mode until stop_event is set.
+
+    Without a stop_event the bot runs until SIGINT/SIGTERM. Follows the same
+    start/stop order as Application.run_polling, including the post_init,
+    post_stop and post_shutdown hooks. The web server stops taking updates
+    before the application stops processing them. A worker neither polls nor
+    sets a webhook; its updates arrive from the sharding front.
+    """
+    if stop_event is None:
+        stop_event = asyncio.Event()
+        stop_on_signals(stop_event)
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        if web_server is not None:
+            await web_server.start()
+        if mode == 'webhook':
+            await application.bot.set_webhook(
+                url=webhook_url or Config.WEBHOOK_URL.rstrip('/') + Config.WEBHOOK_PATH,
+                secret_token=web_server.secret_token,
+                allowed_updates=allowed_updates,
+                drop_pending_updates=drop_pending_updates
+            )
+        elif mode == 'polling':
+            await application.updater.start_polling(
+                allowed_updates=allowed_updates,
+                drop_pending_updates=drop_pending_updates
+            )
+        await application.start()
+        logger.info(f"🤖 Bot running in {mode} mode")
+
+        await stop_event.wait()
+    finally:
+        if web_server is not None:
+            await web_server.stop()
+        if application.updater and application.updater.running:
+            await application.updater.stop()
+        if application.running:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
@@ -0,0 +1,319 @@
+# main/sharding.py
+"""Multi-process mode: one front process, N bot workers sharded by user.
+
+With WORKER_PROCESSES > 1, main() starts a front process instead of the bot.
+The front receives updates from Telegram (webhook or long polling), reads the
+user id out of the raw JSON and relays the update to the worker that owns that
+user on a consistent-hash ring. Each worker is a normal bot process in
+BOT_MODE=worker that takes updates on its local webhook route. A user always
+lands on the same worker, so their ConversationHandler state, user_data and
+in-memory rate-limit counters stay in one process; the database is shared.
+
+Updates for one worker are sent one batch at a time, so they arrive in the
+order Telegram delivered them.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import secrets
+import sys
+import aiohttp
+from aiohttp import web
+from main.server import WebServer, SECRET_TOKEN_HEADER, stop_on_signals
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+WORKER_WEBHOOK_PATH = '/shard'
+
+# فیلدهای به‌روزرسانی که کاربر فرستنده را مشخص می‌کنند
+USER_FIELDS = (
+    'message', 'edited_message', 'callback_query', 'inline_query', 'chosen_inline_result',
+    'my_chat_member', 'chat_member', 'chat_join_request', 'shipping_query',
+    'pre_checkout_query', 'poll_answer', 'channel_post', 'edited_channel_post'
+)
+
+def ring_hash(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+
+class HashRing:
+    """Consistent-hash ring; changing the node count only moves the keys next to the changed points."""
+
+    def __init__(self, nodes, replicas=160):
+        points = sorted((ring_hash(f'{node}:{replica}'), node) for node in nodes for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        index = bisect.bisect(self._hashes, ring_hash(key))
+        return self._nodes[index % len(self._nodes)]
+
+def shard_owner(index, count):
+    """Return a user_id predicate for the users worker ``index`` of ``count`` owns, or None unsharded."""
+    if count <= 1:
+        return None
+    ring = HashRing(range(count))
+    return lambda user_id: ring.node_for(user_id) == index
+
+def routing_key(data):
+    """User id of a raw update, else its chat id, else its update id."""
+    for field in USER_FIELDS:
+        payload = data.get(field)
+        if payload:
+            user = payload.get('from') or payload.get('user')
+            if user:
+                return user['id']
+            chat = payload.get('chat') or (payload.get('message') or {}).get('chat')
+            if chat:
+                return chat['id']
+    return data.get('update_id', 0)
+
+class ShardRouter:
+    """Relays raw updates to worker webhooks, in order per worker and batched."""
+
+    def __init__(self, worker_urls, secret_token, max_batch=100, retry_delay=0.5):
+        self.worker_urls = worker_urls
+        self.secret_token = secret_token
+        self.max_batch = max_batch
+        self.retry_delay = retry_delay
+        self.ring = HashRing(range(len(worker_urls)))
+        self.queues = [asyncio.Queue() for _ in worker_urls]
+        self.forwarded = [0] * len(worker_urls)
+        self.dropped = 0
+        self._session = None
+        self._tasks = []
+
+    @property
+    def backlog(self):
+        return sum(queue.qsize() for queue in self.queues)
+
+    def route(self, data):
+        self.queues[self.ring.node_for(routing_key(data))].put_nowait(data)
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        self._tasks = [asyncio.create_task(self._forward(shard)) for shard in range(len(self.worker_urls))]
+
+    async def _forward(self, shard):
+        queue = self.queues[shard]
+        headers = {SECRET_TOKEN_HEADER: self.secret_token}
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            while True:
+                try:
+                    async with self._session.post(self.worker_urls[shard], json=batch, headers=headers) as response:
+                        if response.status < 500:
+                            if response.status != 200:
+                                # درخواست نامعتبر است و تکرار آن فایده‌ای ندارد
+                                logger.error(f"Worker {shard} rejected {len(batch)} updates: HTTP {response.status}")
+                                self.dropped += len(batch)
+                            else:
+                                self.forwarded[shard] += len(batch)
+                            break
+                        logger.warning(f"Worker {shard} answered HTTP {response.status}; retrying")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # کارگر در حال راه‌اندازی یا راه‌اندازی مجدد است
+                    logger.debug(f"Worker {shard} unreachable ({e!r}); retrying")
+                await asyncio.sleep(self.retry_delay)
+            for _ in batch:
+                queue.task_done()
+
+    async def stop(self, timeout=10):
+        """Deliver what is queued (up to timeout seconds), then stop."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self.queues)), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Stopping router with {self.backlog} undelivered updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+
+class WorkerPool:
+    """Starts the worker processes, restarts any that exit, and stops them with SIGTERM."""
+
+    def __init__(self, count, base_port, secret_token, command=None, env=None, restart_delay=1):
+        self.count = count
+        self.ports = [base_port + index for index in range(count)]
+        self.secret_token = secret_token
+        self.command = command or [sys.executable, '-m', 'main.main']
+        self.env = env or {}
+        self.restart_delay = restart_delay
+        self.processes = [None] * count
+        self.restarts = 0
+        self._stopping = False
+        self._tasks = []
+
+    @property
+    def urls(self):
+        return [f'http://127.0.0.1:{port}{WORKER_WEBHOOK_PATH}' for port in self.ports]
+
+    def worker_env(self, index):
+        """Environment of worker ``index``; Telegram's global send limit is split between workers."""
+        env = dict(
+            os.environ,
+            BOT_MODE='worker',
+            WORKER_PROCESSES='1',
+            PORT=str(self.ports[index]),
+            WEBHOOK_PATH=WORKER_WEBHOOK_PATH,
+            WEBHOOK_SECRET=self.secret_token,
+            SHARD_INDEX=str(index),
+            SHARD_COUNT=str(self.count),
+            SEND_GLOBAL_RATE=str(Config.SEND_GLOBAL_RATE / self.count),
+            SEND_GLOBAL_BURST=str(max(1, Config.SEND_GLOBAL_BURST // self.count)),
+        )
+        env.update(self.env)
+        return env
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._supervise(index)) for index in range(self.count)]
+
+    async def _supervise(self, index):
+        while not self._stopping:
+            process = await asyncio.create_subprocess_exec(*self.command, env=self.worker_env(index))
+            self.processes[index] = process
+            logger.info(f"Worker {index} started (pid {process.pid}, port {self.ports[index]})")
+            code = await process.wait()
+            if self._stopping:
+                return
+            self.restarts += 1
+            logger.error(f"Worker {index} exited with code {code}; restarting")
+            await asyncio.sleep(self.restart_delay)
+
+    async def wait_ready(self, timeout=60):
+        """Wait until every worker answers /health; return False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+            for port in self.ports:
+                while True:
+                    try:
+                        async with session.get(f'http://127.0.0.1:{port}/health') as response:
+                            if response.status == 200:
+                                break
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        pass
+                    if loop.time() > deadline:
+                        return False
+                    await asyncio.sleep(0.2)
+        return True
+
+    async def stop(self, timeout=30):
+        """SIGTERM every worker (they finish their queue and flush persistence), kill stragglers."""
+        self._stopping = True
+        running = [process for process in self.processes if process and process.returncode is None]
+        for process in running:
+            process.terminate()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(process.wait() for process in running)), timeout)
+        except asyncio.TimeoutError:
+            for process in running:
+                if process.returncode is None:
+                    logger.error(f"Worker pid {process.pid} did not stop; killing it")
+                    process.kill()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+class FrontServer(WebServer):
+    """Public web server of the front process; relays webhook updates to the router undecoded."""
+
+    def __init__(self, router, port, **kwargs):
+        super().__init__(None, port, **kwargs)
+        self.router = router
+
+    async def webhook(self, request):
+        if not self.authorized(request):
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+        except ValueError as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return web.Response(status=400)
+        self.updates_received += 1
+        self.router.route(data)
+        return web.Response()
+
+async def api_call(session, api_url, method, **params):
+    """Call a Bot API method with form parameters and return its result."""
+    data = {key: json.dumps(value) if isinstance(value, (list, dict, bool)) else str(value)
+            for key, value in params.items() if value is not None}
+    async with session.post(f'{api_url}/{method}', data=data) as response:
+        body = await response.json()
+    if not body.get('ok'):
+        raise RuntimeError(f"{method} failed: {body.get('description')}")
+    return body['result']
+
+async def poll_updates(session, api_url, router, stop_event, allowed_updates=None, timeout=30):
+    """Long-poll getUpdates and route every update until stop_event is set."""
+    offset = 0
+    while not stop_event.is_set():
+        poll = asyncio.create_task(api_call(
+            session, api_url, 'getUpdates', offset=offset, timeout=timeout, allowed_updates=allowed_updates
+        ))
+        stop = asyncio.create_task(stop_event.wait())
+        await asyncio.wait((poll, stop), return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if not poll.done():
+            poll.cancel()
+            break
+        try:
+            updates = poll.result()
+        except Exception as e:
+            logger.error(f"getUpdates failed: {e}")
+            await asyncio.sleep(1)
+            continue
+        for data in updates:
+            router.route(data)
+            offset = data['update_id'] + 1
+    if offset:
+        # تأیید آخرین به‌روزرسانی‌ها تا پس از راه‌اندازی مجدد دوباره تحویل نشوند
+        try:
+            await api_call(session, api_url, 'getUpdates', offset=offset, timeout=0)
+        except Exception as e:
+            logger.error(f"Could not confirm updates up to {offset}: {e}")
+
+async def run_front(mode, worker_count, allowed_updates=None, drop_pending_updates=True):
+    """Run the front process and its workers until SIGINT/SIGTERM."""
+    stop_event = asyncio.Event()
+    stop_on_signals(stop_event)
+    secret = secrets.token_urlsafe(32)
+    pool = WorkerPool(worker_count, Config.WORKER_BASE_PORT, secret)
+    router = ShardRouter(pool.urls, secret)
+    server = FrontServer(
+        router, Config.PORT,
+        webhook_path=Config.WEBHOOK_PATH if mode == 'webhook' else None,
+        secret_token=Config.WEBHOOK_SECRET
+    )
+    api_url = f'https://api.telegram.org/bot{Config.MAIN_BOT_TOKEN}'
+
+    await pool.start()
+    await router.start()
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+            if not await pool.wait_ready():
+                logger.warning("Not every worker is up yet; their updates wait in the router")
+            await server.start()
+            if mode == 'webhook':
+                await api_call(
+                    session, api_url, 'setWebhook',
+                    url=Config.WEBHOOK_URL.rstrip('/') + Config.WEBHOOK_PATH,
+                    secret_token=Config.WEBHOOK_SECRET,
+                    allowed_updates=allowed_updates,
+                    drop_pending_updates=drop_pending_updates
+                )
+                logger.info(f"🤖 Front running in webhook mode with {worker_count} workers")
+                await stop_event.wait()
+            else:
+                await api_call(session, api_url, 'deleteWebhook', drop_pending_updates=drop_pending_updates)
+                logger.info(f"🤖 Front running in polling mode with {worker_count} workers")
+                await poll_updates(session, api_url, router, stop_event, allowed_updates)
+    finally:
+        await server.stop()
+        await router.stop()
+        await pool.stop()
+        logger.info(f"Front stopped; relayed {sum(router.forwarded)} updates {router.forwarded}")
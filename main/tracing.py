@@ -0,0 +1,271 @@
+# main/tracing.py
+"""Per-update span tracing.
+
+Every sampled update gets a trace whose root span covers the whole update.
+Handler callbacks, membership checks, SQL statements and Bot API calls open
+child spans through ``span()``. The current span lives in a context variable,
+so it follows the update into tasks and into DB worker threads (async_db runs
+blocking calls in a copy of the caller's context).
+
+Slow updates are logged, and the slowest recent traces are kept in memory
+for the /debug/traces endpoint.
+"""
+import heapq
+import itertools
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from telegram.ext import BaseUpdateProcessor
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_current_trace = ContextVar('current_trace', default=None)
+_current_span = ContextVar('current_span', default=None)
+
+UPDATE_TYPES = ('message', 'edited_message', 'callback_query', 'inline_query', 'my_chat_member')
+
+def update_type(update):
+    """Name of the populated field of an update, for labelling."""
+    for name in UPDATE_TYPES:
+        if getattr(update, name, None) is not None:
+            return name
+    return 'other'
+
+class Span:
+    """A timed piece of work inside an update, with nested child spans."""
+
+    __slots__ = ('kind', 'name', 'start', 'end', 'attrs', 'children')
+
+    def __init__(self, kind, name, attrs=None, start=None):
+        self.kind = kind
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.end = None
+        self.attrs = attrs or {}
+        self.children = []
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin):
+        data = {
+            'kind': self.kind,
+            'name': self.name,
+            'offset_ms': round((self.start - origin) * 1000, 2),
+            'duration_ms': round(self.duration * 1000, 2),
+        }
+        if self.attrs:
+            data['attrs'] = self.attrs
+        if self.children:
+            data['children'] = [child.to_dict(origin) for child in list(self.children)]
+        return data
+
+class Trace:
+    """Span tree and time totals for one update."""
+
+    __slots__ = ('update_id', 'user_id', 'update_type', 'root', 'finished_at',
+                 'db_time', 'db_queries', 'api_time', 'api_calls', 'handlers', 'states')
+
+    def __init__(self, update, update_type):
+        user = update.effective_user
+        self.update_id = update.update_id
+        self.user_id = user.id if user else None
+        self.update_type = update_type
+        self.root = Span('update', update_type)
+        self.finished_at = None
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.api_time = 0.0
+        self.api_calls = 0
+        self.handlers = []
+        self.states = []
+
+    @property
+    def duration(self):
+        return self.root.duration
+
+    def record(self, span):
+        if span.kind == 'db':
+            self.db_time += span.duration
+            self.db_queries += 1
+        elif span.kind == 'api':
+            self.api_time += span.duration
+            self.api_calls += 1
+        elif span.kind == 'handler':
+            self.handlers.append(span.name)
+            if 'state' in span.attrs:
+                self.states.append(f"{span.attrs['state']}→{span.attrs.get('next_state', '-')}")
+
+    def summary(self):
+        return (
+            f"update {self.update_id} ({self.update_type}, user {self.user_id}): "
+            f"total {self.duration * 1000:.0f}ms, "
+            f"handlers {' > '.join(self.handlers) or '-'}, "
+            f"states {', '.join(self.states) or '-'}, "
+            f"db {self.db_time * 1000:.0f}ms/{self.db_queries} queries, "
+            f"api {self.api_time * 1000:.0f}ms/{self.api_calls} calls"
+        )
+
+    def to_dict(self):
+        return {
+            'update_id': self.update_id,
+            'user_id': self.user_id,
+            'update_type': self.update_type,
+            'finished_at': self.finished_at,
+            'total_ms': round(self.duration * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'db_queries': self.db_queries,
+            'api_ms': round(self.api_time * 1000, 2),
+            'api_calls': self.api_calls,
+            'handlers': self.handlers,
+            'states': self.states,
+            'spans': self.root.to_dict(self.root.start),
+        }
+
+@contextmanager
+def span(kind, name, **attrs):
+    """Time a block as a child of the current span; a no-op outside sampled updates."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(kind, name, attrs)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record(child)
+
+def add_span(kind, name, start, end, **attrs):
+    """Attach an already finished span (e.g. from SQLAlchemy events) to the current span."""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    child = Span(kind, name, attrs, start=start)
+    child.end = end
+    parent.children.append(child)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(child)
+
+class SlowestTraces:
+    """The ``keep`` slowest traces finished within the last ``window`` seconds."""
+
+    def __init__(self, keep=50, window=900):
+        self.keep = keep
+        self.window = window
+        self._heap = []
+        self._seq = itertools.count()
+
+    def add(self, trace):
+        self._expire()
+        entry = (trace.duration, next(self._seq), trace)
+        if len(self._heap) < self.keep:
+            heapq.heappush(self._heap, entry)
+        elif entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def _expire(self):
+        cutoff = time.time() - self.window
+        if any(entry[2].finished_at < cutoff for entry in self._heap):
+            self._heap = [entry for entry in self._heap if entry[2].finished_at >= cutoff]
+            heapq.heapify(self._heap)
+
+    def snapshot(self):
+        """Traces slowest first."""
+        self._expire()
+        return [entry[2] for entry in sorted(self._heap, reverse=True)]
+
+class Tracer:
+    """Samples updates, traces them and reports slow ones."""
+
+    def __init__(self, sample_rate=1.0, slow_threshold=1.0, keep=50, window=900):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.slowest = SlowestTraces(keep, window)
+        self.traced = 0
+        self.slow = 0
+
+    async def run(self, update, coroutine, update_type='update'):
+        """Await the coroutine processing update, traced if sampled."""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            started = time.perf_counter()
+            try:
+                return await coroutine
+            finally:
+                elapsed = time.perf_counter() - started
+                if elapsed >= self.slow_threshold:
+                    self.slow += 1
+                    logger.warning(f"Slow update {update.update_id} (not sampled): {elapsed * 1000:.0f}ms")
+
+        trace = Trace(update, update_type)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace.root)
+        try:
+            return await coroutine
+        finally:
+            trace.root.end = time.perf_counter()
+            trace.finished_at = time.time()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._finish(trace)
+
+    def _finish(self, trace):
+        self.traced += 1
+        self.slowest.add(trace)
+        if trace.duration >= self.slow_threshold:
+            self.slow += 1
+            logger.warning(f"Slow {trace.summary()}")
+
+class TracingUpdateProcessor(BaseUpdateProcessor):
+    """Update processor that runs each update inside a trace."""
+
+    def __init__(self, tracer, max_concurrent_updates=1):
+        super().__init__(max_concurrent_updates)
+        self.tracer = tracer
+
+    async def do_process_update(self, update, coroutine):
+        await self.tracer.run(update, coroutine, update_type(update))
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+def instrument_engine(engine, name):
+    """Add a span for every SQL statement run on engine during a traced update."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_span.get() is not None:
+            conn.info.setdefault('trace_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('trace_started')
+        if started:
+            add_span('db', ' '.join(statement.split())[:80], started.pop(), time.perf_counter(), engine=name)
+
+    @event.listens_for(engine, 'handle_error')
+    def _error(context):
+        started = context.connection.info.get('trace_started') if context.connection is not None else None
+        if started:
+            add_span('db', 'error', started.pop(), time.perf_counter(), engine=name, error=True)
+
+tracer = Tracer(
+    sample_rate=Config.TRACE_SAMPLE_RATE,
+    slow_threshold=Config.TRACE_SLOW_MS / 1000,
+    keep=Config.TRACE_KEEP_SLOWEST,
+    window=Config.TRACE_WINDOW_SECONDS
+)
@@ -1,3 +1,8 @@
 from .keyboards import create_main_keyboard, create_cancel_keyboard, create_event_selection_keyboard, create_standalone_cancel_keyboard
 from .validators import validate_full_name, validate_student_id, validate_national_id, validate_phone_number, validate_message_text
+from .validators import Validation, check_full_name, check_student_id, check_national_id, check_phone_number, check_message_text, validate_rows
 from .markdown import escape_markdown
+from .templates import Markdown, Template, compile_template, join_markdown
+from .normalize import normalize_digits, normalize_text, normalize_name, normalize_number, normalize_phone
+from .normalize import normalize_text_many, normalize_name_many, normalize_number_many, normalize_phone_many
+from .jalali import convert_gregorian_to_jalali, format_event_date, format_event_time
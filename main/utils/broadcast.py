@@ -0,0 +1,140 @@
+# main/utils/broadcast.py
+import asyncio
+import logging
+from telegram.error import Forbidden, TelegramError
+from main.middleware.flood_control import BULK
+from database import async_db
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DELIVERED = 'delivered'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+def format_broadcast_summary(broadcast):
+    """Human-readable progress of a broadcast for organisers."""
+    statuses = {'running': '⏳ در حال ارسال', 'completed': '✅ پایان‌یافته', 'cancelled': '⛔ لغو شده'}
+    return (
+        f"📣 پیام گروهی #{broadcast.id} - {broadcast.event_name}\n"
+        f"وضعیت: {statuses.get(broadcast.status, broadcast.status)}\n"
+        f"👥 کل گیرندگان: {broadcast.total}\n"
+        f"✅ تحویل‌شده: {broadcast.delivered}\n"
+        f"🚫 مسدودکرده: {broadcast.blocked}\n"
+        f"❌ ناموفق: {broadcast.failed}"
+    )
+
+class BroadcastEngine:
+    """Sends broadcasts to event registrants in checkpointed batches.
+
+    Recipients are read in registration id order, one batch at a time, and sent
+    as bulk traffic through the application's send queue. After each batch the
+    resume point and counters are written back, so a crash or redeploy repeats
+    at most one batch. A stopped sender's broadcasts are picked up by whichever
+    process next sees their heartbeat expire.
+    """
+
+    def __init__(self, database, batch_size=100, lease_seconds=300):
+        self.database = database
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self._tasks = {}
+        self._watcher = None
+
+    def start(self, bot, broadcast_id):
+        """Start sending broadcast_id in the background, unless it already runs here."""
+        task = self._tasks.get(broadcast_id)
+        if task is None:
+            task = asyncio.create_task(self._run(bot, broadcast_id))
+            self._tasks[broadcast_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+        return task
+
+    def start_watching(self, bot):
+        """Resume orphaned broadcasts now and keep checking for them."""
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(bot))
+
+    async def stop(self):
+        """Stop sending and hand unfinished broadcasts back for an immediate resume."""
+        released = list(self._tasks)
+        tasks = list(self._tasks.values())
+        if self._watcher is not None:
+            tasks.append(self._watcher)
+            self._watcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if released:
+            await self.database.release_broadcasts(released)
+
+    async def _watch(self, bot):
+        while True:
+            try:
+                for broadcast_id in await self.database.claim_stale_broadcasts(self.lease_seconds):
+                    logger.info(f"Resuming broadcast {broadcast_id}")
+                    self.start(bot, broadcast_id)
+            except Exception as e:
+                logger.error(f"Error resuming broadcasts: {e}")
+            await asyncio.sleep(self.lease_seconds / 2)
+
+    async def _run(self, bot, broadcast_id):
+        try:
+            broadcast = await self.database.get_broadcast(broadcast_id)
+            if broadcast is None or broadcast.status != 'running':
+                return
+            cursor = broadcast.last_registration_id
+            while True:
+                recipients = await self.database.get_broadcast_recipients(
+                    broadcast.event_name, cursor, self.batch_size
+                )
+                if not recipients:
+                    await self.database.finish_broadcast(broadcast_id)
+                    break
+                outcomes = await asyncio.gather(*(
+                    self._deliver(bot, recipient.user_id, broadcast.message_text)
+                    for recipient in recipients
+                ))
+                cursor = recipients[-1].registration_id
+                running = await self.database.checkpoint_broadcast(
+                    broadcast_id, cursor,
+                    delivered=outcomes.count(DELIVERED),
+                    failed=outcomes.count(FAILED),
+                    blocked=outcomes.count(BLOCKED)
+                )
+                if not running:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # heartbeat می‌ماند تا پس از انقضا دوباره از آخرین نقطه ادامه یابد
+            logger.error(f"Broadcast {broadcast_id} interrupted: {e}")
+            return
+
+        result = await self.database.get_broadcast(broadcast_id)
+        logger.info(
+            f"Broadcast {broadcast_id} {result.status}: {result.delivered} delivered, "
+            f"{result.blocked} blocked, {result.failed} failed"
+        )
+        if result.created_by:
+            try:
+                await bot.send_message(chat_id=result.created_by, text=format_broadcast_summary(result))
+            except TelegramError as e:
+                logger.error(f"Error sending broadcast summary: {e}")
+
+    async def _deliver(self, bot, user_id, text):
+        try:
+            await bot.send_message(chat_id=user_id, text=text, rate_limit_args=BULK)
+            return DELIVERED
+        except Forbidden:
+            # کاربر ربات را مسدود یا حساب خود را حذف کرده است
+            return BLOCKED
+        except TelegramError as e:
+            logger.warning(f"Broadcast message to {user_id} failed: {e}")
+            return FAILED
+
+broadcast_engine = BroadcastEngine(
+    async_db,
+    batch_size=Config.BROADCAST_BATCH_SIZE,
+    lease_seconds=Config.BROADCAST_LEASE_SECONDS
+)
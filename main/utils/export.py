@@ -0,0 +1,120 @@
+# main/utils/export.py
+import csv
+import io
+import logging
+import tempfile
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from main.utils.jalali import convert_gregorian_to_jalali
+from config import Config
+
+try:  # optional: proper Persian glyph shaping and right-to-left ordering in PDFs
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+except ImportError:
+    arabic_reshaper = None
+
+logger = logging.getLogger(__name__)
+
+# Exports spill from memory to a temporary file past this size
+SPOOL_MAX_SIZE = 1024 * 1024
+
+CSV_HEADER = ['ردیف', 'نام و نام خانوادگی', 'شماره دانشجویی', 'شماره ملی', 'شماره تماس', 'تاریخ ثبت‌نام', 'وضعیت']
+
+# (header, width in points) from right to left
+PDF_COLUMNS = [
+    ('ردیف', 40), ('نام و نام خانوادگی', 190), ('شماره دانشجویی', 110),
+    ('شماره ملی', 100), ('شماره تماس', 100), ('تاریخ ثبت‌نام', 90), ('امضا', 120),
+]
+PDF_FONT_NAME = 'AttendeeSheetFont'
+PDF_ROW_HEIGHT = 22
+PDF_MARGIN = 36
+
+def write_attendees_csv(chunks, fileobj):
+    """Stream attendee chunks into a binary file object as UTF-8 CSV (Excel-friendly BOM)."""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for chunk in chunks:
+        for row in chunk:
+            count += 1
+            writer.writerow([
+                count, row.full_name, row.student_id, row.national_id, row.phone_number,
+                convert_gregorian_to_jalali(row.registration_date), row.status
+            ])
+    text.detach()
+    return count
+
+def _pdf_font():
+    if Config.EXPORT_PDF_FONT_PATH:
+        if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, Config.EXPORT_PDF_FONT_PATH))
+        return PDF_FONT_NAME
+    logger.warning("EXPORT_PDF_FONT_PATH is not set; Persian text will not render in PDF exports")
+    return 'Helvetica'
+
+def _rtl(text):
+    text = str(text or '')
+    if arabic_reshaper is None:
+        return text
+    return get_display(arabic_reshaper.reshape(text))
+
+def write_attendees_pdf(chunks, fileobj, title):
+    """Stream attendee chunks into a one-table-per-page PDF attendee sheet."""
+    font = _pdf_font()
+    width, height = landscape(A4)
+    pdf = canvas.Canvas(fileobj, pagesize=(width, height), pageCompression=1)
+    pdf.setTitle(title)
+    rows_per_page = int((height - 2 * PDF_MARGIN - 60) // PDF_ROW_HEIGHT)
+
+    def start_page(page_number):
+        pdf.setFont(font, 14)
+        pdf.drawRightString(width - PDF_MARGIN, height - PDF_MARGIN, _rtl(title))
+        pdf.setFont(font, 9)
+        pdf.drawString(PDF_MARGIN, height - PDF_MARGIN, str(page_number))
+        draw_row([_rtl(header) for header, _ in PDF_COLUMNS], height - PDF_MARGIN - 40)
+        return height - PDF_MARGIN - 40 - PDF_ROW_HEIGHT
+
+    def draw_row(cells, y):
+        x = width - PDF_MARGIN
+        for (header, column_width), cell in zip(PDF_COLUMNS, cells):
+            pdf.rect(x - column_width, y - 6, column_width, PDF_ROW_HEIGHT, stroke=1, fill=0)
+            pdf.drawRightString(x - 4, y, cell)
+            x -= column_width
+
+    page = 1
+    y = start_page(page)
+    count = 0
+    for chunk in chunks:
+        for row in chunk:
+            if count and count % rows_per_page == 0:
+                pdf.showPage()
+                page += 1
+                y = start_page(page)
+            count += 1
+            draw_row([
+                str(count), _rtl(row.full_name), row.student_id, row.national_id,
+                row.phone_number, convert_gregorian_to_jalali(row.registration_date), ''
+            ], y)
+            y -= PDF_ROW_HEIGHT
+    pdf.showPage()
+    pdf.save()
+    return count
+
+def export_event_registrations(manager, event_name, fmt='csv'):
+    """Export an event's registrations and return (file object at offset 0, filename, row count).
+
+    Blocking: run it on the database worker pool.
+    """
+    chunks = manager.iter_event_registrations(event_name, chunk_size=Config.EXPORT_CHUNK_SIZE)
+    fileobj = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    if fmt == 'pdf':
+        count = write_attendees_pdf(chunks, fileobj, f"لیست حاضرین - {event_name}")
+    else:
+        count = write_attendees_csv(chunks, fileobj)
+    fileobj.seek(0)
+    safe_name = ''.join(c if c.isalnum() else '_' for c in event_name)
+    return fileobj, f"registrations_{safe_name}.{fmt}", count
@@ -0,0 +1,67 @@
+# main/utils/jalali.py
+"""Jalali rendering of stored timestamps.
+
+The database keeps real UTC datetimes; text like '۱۴۰۴/۱۰/۱۵' is produced
+here, only when a message is rendered. A jdatetime conversion costs far more
+than a dict lookup and listings and profiles show the same few dates over and
+over, so the converters are memoised.
+"""
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import jdatetime
+from config import Config
+
+LOCAL_TIMEZONE = ZoneInfo(Config.TIMEZONE)
+PERSIAN_DIGITS = str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')
+GREGORIAN_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d')
+
+@lru_cache(maxsize=4096)
+def jalali_day(day):
+    """'YYYY/MM/DD' Jalali text for a Gregorian date."""
+    jalali_date = jdatetime.date.fromgregorian(date=day)
+    return f"{jalali_date.year:04d}/{jalali_date.month:02d}/{jalali_date.day:02d}"
+
+def to_local(moment):
+    """Convert a naive UTC datetime to Config.TIMEZONE."""
+    return moment.replace(tzinfo=timezone.utc).astimezone(LOCAL_TIMEZONE)
+
+@lru_cache(maxsize=1024)
+def format_event_date(starts_at):
+    """Local Jalali date of an event start in Persian digits, e.g. '۱۴۰۴/۱۰/۱۵'."""
+    if starts_at is None:
+        return "نامشخص"
+    return jalali_day(to_local(starts_at).date()).translate(PERSIAN_DIGITS)
+
+@lru_cache(maxsize=1024)
+def format_event_time(starts_at):
+    """Local 'HH:MM' of an event start; empty when only the date was given."""
+    if starts_at is None:
+        return ""
+    local = to_local(starts_at)
+    if local.hour == local.minute == 0:
+        return ""
+    return f"{local.hour:02d}:{local.minute:02d}"
+
+def convert_gregorian_to_jalali(gregorian_date):
+    """Convert a Gregorian date, datetime or date string to 'YYYY/MM/DD' Jalali text."""
+    if not gregorian_date:
+        return "نامشخص"
+    if isinstance(gregorian_date, str):
+        if gregorian_date.count('/') == 2:
+            return gregorian_date  # قبلاً شمسی است
+        for date_format in GREGORIAN_FORMATS:
+            try:
+                gregorian_date = datetime.strptime(gregorian_date, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            return "نامشخص"
+    if not isinstance(gregorian_date, date):
+        return "نامشخص"
+    try:
+        # کلید کش فقط روز است تا ساعت‌های مختلف یک روز یک مدخل داشته باشند
+        return jalali_day(date(gregorian_date.year, gregorian_date.month, gregorian_date.day))
+    except ValueError:
+        return "نامشخص"
@@ -1,5 +1,5 @@
 from telegram import ReplyKeyboardMarkup, InlineKeyboardButton, InlineKeyboardMarkup
-from main.utils.markdown import escape_markdown  # Add import for escape_markdown
+from main.utils.jalali import format_event_date
 
 def create_main_keyboard():
     """Create the main reply keyboard for the bot."""
@@ -20,12 +20,8 @@ def create_event_selection_keyboard(events):
     """Create a keyboard for event selection."""
     keyboard = []
     for event in events:
-        if len(event) < 7:  # Ensure there are enough elements in the tuple
-            continue  # Skip this event if data is incomplete
-        name, description, date, capacity, registered, time, location = event  # Correct unpacking
-        escaped_name = escape_markdown(name)  # Escape event name
-        # Fix: Use raw name for callback data without escaping
-        button = InlineKeyboardButton(text=escaped_name, callback_data=f"event_{name}")  # Fix callback_data prefix
+        # متن دکمه‌ها Markdown نیست و نباید escape شود
+        button = InlineKeyboardButton(text=event.name, callback_data=f"event_{event.name}")  # Fix callback_data prefix
         keyboard.append([button])
     
     # Ensure the cancel button is correctly indented
@@ -52,14 +48,8 @@ def create_registration_cancellation_keyboard(registrations):
     """Create inline keyboard for registration cancellation."""
     keyboard = []
     for reg in registrations:
-        # unpack only needed fields, support 12 elements
-        reg_id = reg[0]
-        event_name = reg[6]
-        event_date = reg[11] if len(reg) > 11 else "نامشخص"
-        escaped_event_name = escape_markdown(event_name)  # Escape event name
-        escaped_event_date = escape_markdown(event_date)  # Escape event date
-        button_text = f"❌ انصراف از {escaped_event_name} ({escaped_event_date})"
-        keyboard.append([InlineKeyboardButton(button_text, callback_data=f"cancel_reg_{reg_id}")])
+        button_text = f"❌ انصراف از {reg.event_name} ({format_event_date(reg.event_starts_at)})"
+        keyboard.append([InlineKeyboardButton(button_text, callback_data=f"cancel_reg_{reg.id}")])
     keyboard.append([InlineKeyboardButton("🔙 بازگشت به پروفایل", callback_data="back_to_profile")])
     return InlineKeyboardMarkup(keyboard)
 
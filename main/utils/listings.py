@@ -0,0 +1,75 @@
+# main/utils/listings.py
+import threading
+from main.utils.templates import compile_template, join_markdown
+from main.utils.jalali import format_event_date, format_event_time
+from database import async_db
+
+class ListingCache:
+    """Rendered listing payloads keyed by (event type, catalog version).
+
+    Only the newest version of each listing is kept, so stale renders are
+    dropped as soon as the catalog changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, event_type, version, render):
+        entry = self._entries.get(event_type)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        payload = render()
+        if version is not None:
+            with self._lock:
+                current = self._entries.get(event_type)
+                if current is None or current[0] < version:
+                    self._entries[event_type] = (version, payload)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+        }
+
+listing_cache = ListingCache()
+
+EVENT_ITEM = compile_template(
+    "✨ *{name}*\n"
+    "📅 *تاریخ برگزاری:* {date}\n"
+    "⏰ *زمان:* {time}\n"
+    "📍 *محل:* {location}\n"
+    "👥 *ظرفیت:* {capacity}\n"
+    "✅ *ثبت‌نام‌شده:* {registered}\n"
+    "📝 *توضیحات:* {description}\n\n"
+)
+
+def render_event_listing(header, events):
+    """Render the MarkdownV2 listing for events under a rendered header."""
+    parts = [header]
+    for event in events:
+        parts.append(EVENT_ITEM.render(
+            name=event.name, date=format_event_date(event.starts_at), time=format_event_time(event.starts_at),
+            location=event.location, capacity=event.capacity, registered=event.registered_count, description=event.description
+        ))
+    return join_markdown(parts)
+
+async def get_event_listing(event_type, header):
+    """Return the rendered listing for event_type, or None when there are no events."""
+    version, events = await async_db.get_event_catalog(event_type)
+    if not events:
+        return None
+    return listing_cache.get_or_render(event_type, version, lambda: render_event_listing(header, events))
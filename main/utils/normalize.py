@@ -0,0 +1,131 @@
+# main/utils/normalize.py
+"""Normalisation of Persian text typed by users.
+
+Every incoming text goes through a translation table built at import:
+Persian and Arabic-Indic digits become ASCII, Arabic ي/ى/ك/ة become Persian
+ی/ک/ه, diacritics, tatweel and invisible marks (ZWJ, ZWSP, BOM, direction
+marks) are dropped and exotic spaces become plain spaces. Runs of spaces
+and half-spaces (ZWNJ) are then collapsed. The same name typed on different
+keyboards is thus stored in a single spelling.
+
+A table is a tuple of (character, replacement) pairs applied with str.replace,
+skipping characters the text does not contain. str.translate looks up every
+character of non-ASCII text in a dict, which is 15-50x slower on long input;
+runs are collapsed with str.replace too, as a regex scan of Persian text is
+slower than the whole table pass. The *_many variants normalise a column of
+values with a single pass over their concatenation.
+"""
+ZWNJ = '\u200c'
+PERSIAN_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+
+# حروف عربی که در صفحه‌کلیدهای مختلف جای حروف فارسی تایپ می‌شوند
+LETTERS = {'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه'}
+# اعراب، تطویل و نویسه‌های نامرئی (ZWSP، ZWJ، BOM، نشانه‌های جهت متن)
+REMOVED = [chr(code) for code in range(0x064b, 0x0653)] + [
+    '\u0670', '\u0640', '\u200b', '\u200d', '\u200e', '\u200f', '\ufeff', '\u00ad',
+    '\u202a', '\u202b', '\u202c', '\u202d', '\u202e', '\u2066', '\u2067', '\u2068', '\u2069'
+]
+SPACES = ['\t', '\v', '\f', '\u00a0', '\u1680', '\u202f', '\u205f', '\u3000'] + [
+    chr(code) for code in range(0x2000, 0x200b)
+]
+
+DIGITS = dict(zip(PERSIAN_DIGITS + ARABIC_DIGITS, '0123456789' * 2))
+
+def make_table(*mappings):
+    """Merge mappings into a table of (character, replacement) pairs."""
+    merged = {}
+    for mapping in mappings:
+        merged.update(mapping)
+    return tuple(merged.items())
+
+DIGITS_TABLE = make_table(DIGITS)
+MULTILINE_TABLE = make_table(LETTERS, dict.fromkeys(REMOVED + ['\r'], ''), dict.fromkeys(SPACES, ' '))
+TEXT_TABLE = make_table(LETTERS, dict.fromkeys(REMOVED + ['\r'], ''), dict.fromkeys(SPACES + ['\n'], ' '))
+NUMBER_TABLE = make_table(
+    DIGITS, dict.fromkeys(REMOVED + SPACES + [' ', '\n', '\r', ZWNJ, '-', '_', '(', ')', '.', '/'], '')
+)
+
+# قواعد به ترتیب اعمال می‌شوند: نیم‌فاصله کنار فاصله حذف، سپس فاصله‌ها و نیم‌فاصله‌های پیاپی یکی می‌شوند
+SPACING_RULES = ((' ' + ZWNJ, ' '), (ZWNJ + ' ', ' '), ('  ', ' '), (ZWNJ * 2, ZWNJ))
+MULTILINE_SPACING_RULES = SPACING_RULES + (
+    (ZWNJ + '\n', '\n'), ('\n' + ZWNJ, '\n'), (' \n', '\n'), ('\n ', '\n'), ('\n\n\n', '\n\n')
+)
+# جداکننده مقدارها در حالت دسته‌ای؛ در هیچ جدول و قاعده‌ای نیست
+SEPARATOR = '\x1f'
+
+def translate(text, table):
+    """Apply a table built by make_table."""
+    for char, replacement in table:
+        if char in text:
+            text = text.replace(char, replacement)
+    return text
+
+def squeeze(text, run, replacement):
+    """Replace run with replacement until none is left."""
+    while run in text:
+        text = text.replace(run, replacement)
+    return text
+
+def normalize_digits(text):
+    """Convert Persian and Arabic-Indic digits to ASCII."""
+    return translate(text, DIGITS_TABLE)
+
+def map_joined(values, normalize):
+    """Apply normalize to the concatenation of values and split the result back."""
+    if not values:
+        return []
+    joined = SEPARATOR.join(values)
+    if joined.count(SEPARATOR) != len(values) - 1:
+        # یکی از مقدارها خودش جداکننده را دارد
+        return [normalize(value) for value in values]
+    return normalize(joined).split(SEPARATOR)
+
+def _normalize(text, keep_digits, multiline):
+    text = translate(text, MULTILINE_TABLE if multiline else TEXT_TABLE)
+    if not keep_digits:
+        text = translate(text, DIGITS_TABLE)
+    for run, replacement in MULTILINE_SPACING_RULES if multiline else SPACING_RULES:
+        text = squeeze(text, run, replacement)
+    return text
+
+def normalize_text(text, keep_digits=False, multiline=False):
+    """Normalise letters, invisible marks and spacing; digits too unless keep_digits."""
+    return _normalize(text, keep_digits, multiline).strip(' \n' + ZWNJ if multiline else ' ' + ZWNJ)
+
+def normalize_text_many(values, keep_digits=False):
+    """normalize_text for a list of single-line values."""
+    normalized = map_joined(values, lambda text: _normalize(text, keep_digits, False))
+    return [value.strip(' ' + ZWNJ) for value in normalized]
+
+def normalize_name(text):
+    """Normalise a person's name for validation and storage."""
+    return normalize_text(text)
+
+def normalize_name_many(values):
+    return normalize_text_many(values)
+
+def normalize_number(text):
+    """Digits of an ID typed with Persian digits, spaces or separators."""
+    return translate(text, NUMBER_TABLE)
+
+def normalize_number_many(values):
+    return map_joined(values, lambda text: translate(text, NUMBER_TABLE))
+
+def normalize_phone(text):
+    """Normalise a mobile number to 09xxxxxxxxx, accepting +98, 0098 and 98 prefixes."""
+    return mobile_prefix(normalize_number(text))
+
+def normalize_phone_many(values):
+    return [mobile_prefix(number) for number in normalize_number_many(values)]
+
+def mobile_prefix(number):
+    if number.startswith('+98'):
+        return '0' + number[3:]
+    if number.startswith('0098'):
+        return '0' + number[4:]
+    if number.startswith('98') and len(number) == 12:
+        return '0' + number[2:]
+    if number.startswith('9') and len(number) == 10:
+        return '0' + number
+    return number
@@ -0,0 +1,104 @@
+# main/utils/templates.py
+"""MarkdownV2 message templates compiled once at import.
+
+A template is written the way the message should read. The formatting
+markers * _ ~ and ` are kept; every other character MarkdownV2 reserves
+(. ! - ( ) # ...) is escaped at compile time. A literal marker is written
+with a backslash (\\*). Slots use str.format syntax:
+
+    {name}       text, escaped when rendered
+    {name:code}  inside a `code` span, only ` and \\ are escaped
+
+Values that are already Markdown (a rendered template) are inserted as they
+are, so nested fragments are never escaped twice. bind() fills slots whose
+values are known at startup, such as Config names, into the static text.
+"""
+import re
+from string import Formatter
+from main.utils.markdown import MARKDOWN_SPECIAL_CHARS, escape_markdown
+
+FORMATTING_MARKERS = '*_~`'
+STATIC_TABLE = str.maketrans({
+    char: '\\' + char for char in MARKDOWN_SPECIAL_CHARS if char not in FORMATTING_MARKERS
+})
+CODE_TABLE = str.maketrans({'`': '\\`', '\\': '\\\\'})
+EXPLICIT_ESCAPE = re.compile(r'(\\.)', re.S)
+
+class Markdown(str):
+    """Text that is already valid MarkdownV2 and must not be escaped again."""
+    __slots__ = ()
+
+def escape_text(value):
+    return value if isinstance(value, Markdown) else escape_markdown(value)
+
+def escape_code(value):
+    return str(value).translate(CODE_TABLE)
+
+SLOT_TYPES = {'': escape_text, 'text': escape_text, 'code': escape_code}
+
+def escape_static(text):
+    """Escape the literal text of a template, keeping markers and explicit escapes."""
+    parts = EXPLICIT_ESCAPE.split(text)
+    # بخش‌های فرد، نویسه‌هایی هستند که در قالب صریحاً escape شده‌اند
+    return ''.join(part if index % 2 else part.translate(STATIC_TABLE) for index, part in enumerate(parts))
+
+def join_markdown(parts, separator=''):
+    """Join rendered fragments; the separator is plain text."""
+    return Markdown(escape_markdown(separator).join(parts))
+
+class Template:
+    """A message template split into pre-escaped fragments and slots."""
+    __slots__ = ('source', 'fields', '_head', '_slots', '_format', '_escapes')
+
+    def __init__(self, source):
+        self.source = source
+        fragments, slots = [''], []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            fragments[-1] += escape_static(literal)
+            if field is None:
+                continue
+            if conversion or not field.isidentifier():
+                raise ValueError(f"جای‌خالی نامعتبر {{{field}}} در قالب")
+            if spec not in SLOT_TYPES:
+                raise ValueError(f"نوع ناشناخته {spec!r} برای {{{field}}} در قالب")
+            slots.append((field, SLOT_TYPES[spec]))
+            fragments.append('')
+        static = ''.join(fragments)
+        for marker in '*~`':
+            if (static.count(marker) - static.count('\\' + marker)) % 2:
+                raise ValueError(f"نشانه {marker} در قالب بسته نشده است: {source[:40]!r}")
+        self._set(fragments[0], [(name, escape, fragment) for (name, escape), fragment in zip(slots, fragments[1:])])
+
+    def _set(self, head, slots):
+        self._head = head
+        self._slots = tuple(slots)
+        self.fields = frozenset(name for name, _, _ in slots)
+        # قطعه‌های ثابت در یک رشته str.format کنار هم قرار می‌گیرند
+        self._format = '{}'.join(
+            fragment.replace('{', '{{').replace('}', '}}') for fragment in [head] + [slot[2] for slot in slots]
+        )
+        self._escapes = tuple((name, escape) for name, escape, _ in slots)
+
+    def bind(self, **values):
+        """Return a template with the given slots filled into its static text."""
+        head, slots = self._head, []
+        for name, escape, fragment in self._slots:
+            if name not in values:
+                slots.append((name, escape, fragment))
+            elif slots:
+                slots[-1] = slots[-1][:2] + (slots[-1][2] + escape(values[name]) + fragment,)
+            else:
+                head += escape(values[name]) + fragment
+        bound = Template.__new__(Template)
+        bound.source = self.source
+        bound._set(head, slots)
+        return bound
+
+    def render(self, **values):
+        """Fill every slot; raises KeyError for a missing value."""
+        return Markdown(self._format.format(*[escape(values[name]) for name, escape in self._escapes]))
+
+def compile_template(source, **values):
+    """Compile a template, filling the given slots now."""
+    template = Template(source)
+    return template.bind(**values) if values else template
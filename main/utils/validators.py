@@ -1,88 +1,172 @@
 # validators.py
+"""Validation of registration answers and user messages.
+
+Each check_* function normalises its input (main/utils/normalize.py) and
+validates it in one pass, returning Validation(value, error): the value to
+store and None, or the normalised value and an error code the handler turns
+into a message. Patterns are compiled once at import. validate_rows checks
+a whole batch column by column for bulk imports. The older validate_*
+functions remain as boolean wrappers.
+"""
 import re
+from collections import namedtuple
+from operator import mul
+from main.utils.normalize import (
+    normalize_digits, normalize_name, normalize_name_many, normalize_number, normalize_number_many,
+    normalize_phone, normalize_phone_many, normalize_text, ZWNJ
+)
+
+Validation = namedtuple('Validation', ['value', 'error'])
+FieldRule = namedtuple('FieldRule', ['normalize', 'normalize_many', 'error'])
+
+PERSIAN_LETTERS = 'آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی'
+NAME_PATTERN = re.compile(f'[{PERSIAN_LETTERS}{ZWNJ} ]+')
+NAME_PART_PATTERN = re.compile(f'[{PERSIAN_LETTERS}]+(?:{ZWNJ}[{PERSIAN_LETTERS}]+)*')
+STUDENT_ID_PATTERN = re.compile(r'[0-9]{8,20}')
+NATIONAL_ID_PATTERN = re.compile(r'[0-9]{10}')
+MOBILE_PATTERN = re.compile(r'09[0-9]{9}')
+NATIONAL_ID_WEIGHTS = range(10, 1, -1)
+
+CARRIERS = {
+    '091': 'همراه اول',
+    '099': 'همراه اول',
+    '093': 'ایرانسل',
+    '090': 'ایرانسل',
+    '092': 'رایتل'
+}
 
 def convert_persian_digits(text):
     """Convert Persian/Arabic digits to English digits."""
-    persian_to_english = {
-        '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
-        '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
-        '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
-        '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9'
-    }
-    
-    converted_text = ''
-    for char in text:
-        if char in persian_to_english:
-            converted_text += persian_to_english[char]
-        else:
-            converted_text += char
-    
-    return converted_text
+    return normalize_digits(text)
 
-def validate_full_name(full_name):
+def full_name_error(full_name):
     """
-    Validate full name:
+    Error code for a normalised full name, or None:
     - Only Persian letters and space allowed
     - At least two parts (e.g. 'علی احمدی')
     - Each part at least 3 Persian letters
+    - A half-space (ZWNJ) may join letters inside a part (e.g. 'رضایی‌فر')
     """
-    full_name = full_name.strip()
-    # فقط حروف فارسی و فاصله مجاز است
-    if not re.fullmatch(r'[آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی\s]+', full_name):
-        return False
-    parts = [p for p in full_name.split() if p]
+    if not full_name:
+        return 'required'
+    if not NAME_PATTERN.fullmatch(full_name):
+        return 'name_characters'
+    parts = full_name.split(' ')
     if len(parts) < 2:
-        return False
+        return 'name_parts'
     for part in parts:
         # هر بخش باید حداقل ۳ حرف فارسی باشد
-        if len(part) < 3 or not re.fullmatch(r'[آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی]+', part):
-            return False
-    return True
+        if not NAME_PART_PATTERN.fullmatch(part) or len(part.replace(ZWNJ, '')) < 3:
+            return 'name_short'
+    return None
+
+def student_id_error(student_id):
+    if not student_id:
+        return 'required'
+    return None if STUDENT_ID_PATTERN.fullmatch(student_id) else 'student_id_format'
+
+def national_id_error(national_id):
+    if not national_id:
+        return 'required'
+    if not NATIONAL_ID_PATTERN.fullmatch(national_id):
+        return 'national_id_format'
+    return None if validate_iranian_national_id(national_id) else 'national_id_checksum'
+
+def phone_number_error(phone_number):
+    if not phone_number:
+        return 'required'
+    if not MOBILE_PATTERN.fullmatch(phone_number):
+        return 'phone_format'
+    return None if phone_number[:3] in CARRIERS else 'phone_carrier'
+
+FIELD_RULES = {
+    'full_name': FieldRule(normalize_name, normalize_name_many, full_name_error),
+    'student_id': FieldRule(normalize_number, normalize_number_many, student_id_error),
+    'national_id': FieldRule(normalize_number, normalize_number_many, national_id_error),
+    'phone_number': FieldRule(normalize_phone, normalize_phone_many, phone_number_error),
+}
+
+def check_field(field, text):
+    """Normalise and validate one answer of a registration field."""
+    rule = FIELD_RULES[field]
+    value = rule.normalize(text)
+    return Validation(value, rule.error(value))
+
+def check_full_name(full_name):
+    return check_field('full_name', full_name)
+
+def check_student_id(student_id):
+    return check_field('student_id', student_id)
+
+def check_national_id(national_id):
+    return check_field('national_id', national_id)
+
+def check_phone_number(phone_number):
+    return check_field('phone_number', phone_number)
+
+def check_message_text(message_text):
+    """Normalise a message to the admins (digits kept) and require at least 5 characters."""
+    value = normalize_text(message_text, keep_digits=True, multiline=True)
+    return Validation(value, None if len(value) >= 5 else 'message_short')
+
+def validate_rows(rows, fields=tuple(FIELD_RULES)):
+    """Validate many rows (dicts) at once, e.g. for a bulk import.
+
+    Each field is normalised for the whole batch in one pass over the joined
+    column. Returns one (values, errors) pair per row: the normalised values
+    of the given fields and a {field: error code} dict, empty for valid rows.
+    """
+    values = [{} for _ in rows]
+    errors = [{} for _ in rows]
+    for field in fields:
+        rule = FIELD_RULES[field]
+        column = rule.normalize_many([str(row.get(field) or '') for row in rows])
+        error = rule.error
+        for row_values, row_errors, value in zip(values, errors, column):
+            row_values[field] = value
+            code = error(value)
+            if code is not None:
+                row_errors[field] = code
+    return list(zip(values, errors))
+
+def validate_full_name(full_name):
+    """Validate full name (see full_name_error)."""
+    return check_full_name(full_name).error is None
 
 def validate_student_id(student_id):
-    """Validate student ID (minimum 8 digits)."""
-    # Convert Persian digits to English first
-    student_id_english = convert_persian_digits(student_id)
-    return student_id_english.isdigit() and len(student_id_english) >= 8
+    """Validate student ID (8 to 20 digits)."""
+    return check_student_id(student_id).error is None
 
 def validate_national_id(national_id):
-    """Validate national ID (exactly 10 digits)."""
-    # Convert Persian digits to English first
-    national_id_english = convert_persian_digits(national_id)
-    return national_id_english.isdigit() and len(national_id_english) == 10
+    """Validate national ID (10 digits with a valid checksum)."""
+    return check_national_id(national_id).error is None
 
 def validate_phone_number(phone_number):
-    """Validate phone number (Iranian mobile format: 09xxxxxxxxx)."""
-    # Convert Persian digits to English first
-    phone_number_english = convert_persian_digits(phone_number)
-    return bool(re.match(r'^09\d{9}$', phone_number_english))
+    """Validate phone number (Iranian mobile format: 09xxxxxxxxx, known carrier)."""
+    return check_phone_number(phone_number).error is None
 
 def validate_message_text(message_text):
     """Validate message text (minimum 5 characters)."""
-    return len(message_text.strip()) >= 5
+    return check_message_text(message_text).error is None
 
 def validate_iranian_national_id(national_id):
     """Validate Iranian national ID using checksum."""
     if not national_id.isdigit() or len(national_id) != 10:
         return False
+    # شماره‌هایی مانند ۱۱۱۱۱۱۱۱۱۱ رقم کنترل درستی دارند ولی صادر نمی‌شوند
+    if national_id == national_id[0] * 10:
+        return False
     check = int(national_id[9])
-    s = sum(int(national_id[i]) * (10 - i) for i in range(9)) % 11
+    s = sum(map(mul, map(int, national_id[:9]), NATIONAL_ID_WEIGHTS)) % 11
     return (s < 2 and check == s) or (s >= 2 and check + s == 11)
 
 def validate_student_id_format(student_id):
     """Validate specific university student ID format."""
-    return len(student_id) >= 8 and student_id.isdigit()
+    return student_id_error(student_id) is None
 
 def validate_phone_number_carrier(phone_number):
     """Validate phone number and identify carrier."""
-    carriers = {
-        '091': 'همراه اول',
-        '099': 'همراه اول',
-        '093': 'ایرانسل',
-        '090': 'ایرانسل',
-        '092': 'ایرانسل'
-    }
-    for prefix, carrier in carriers.items():
-        if phone_number.startswith(prefix):
-            return True, carrier
-    return False, "ناشناخته"
\ No newline at end of file
+    carrier = CARRIERS.get(phone_number[:3])
+    if carrier is None:
+        return False, "ناشناخته"
+    return True, carrier